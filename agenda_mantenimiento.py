@@ -0,0 +1,150 @@
+import heapq
+
+import numpy as np
+import pandas as pd
+
+# Puntaje de riesgo de cada valor de los campos del seguimiento (claves en minúsculas y
+# con espacios simples). El puntaje de un árbol es la suma de los cuatro; los valores que
+# no están en la tabla suman 0.
+PUNTAJES_RIESGO = {
+    'estado_salud': {
+        'bueno': 0, 'regular': 2, 'malo': 4, 'muerto': 5,
+    },
+    'riesgo': {
+        'sin riesgo de caída': 0,
+        'con riesgo de caída (bajo)': 2,
+        'con riesgo de caída (moderado)': 4,
+        'con riesgo de caída (alto)': 6,
+        'arbol parasitado (con especies vegetales)': 1,
+        'arbol parasitado (otros animales)': 1,
+        'arbol parasitado (insectos)': 2,
+        'arbol parasitado ( con hongos )': 3,
+        'otros parásitos (ramas)': 1,
+        'otros parásitos (fuste)': 2,
+        'otros parásitos (raíz )': 2,
+    },
+    'inclinacion': {
+        'sin inclinación': 0, 'leve': 1, 'moderado': 2, 'pronunciado': 3,
+    },
+    'ahuecamiento': {
+        'no': 0, 'bajo': 1, 'menor al 50% del diámetro del tronco': 1, 'moderado': 2, 'si': 2, 'base': 2,
+        'tronco': 2, 'alto': 3, 'mayor al 50% del diámetro del tronco': 3,
+    },
+}
+
+COLUMNAS_RIESGO = list(PUNTAJES_RIESGO)
+
+# Columnas de cada árbol que se muestran y exportan en la agenda
+COLUMNAS_AGENDA = ['id_arbol', 'especie', 'lat', 'lng', 'prox_fecha_mante'] + COLUMNAS_RIESGO + ['puntaje_riesgo']
+
+
+def clave_valor(valor):
+    return ' '.join(str(valor).lower().split())
+
+
+# Puntaje de riesgo de cada fila: se traduce cada categoría una sola vez y las filas
+# solo buscan el puntaje de su código (como codificar_especies en especies.py)
+def puntaje_riesgo(df):
+    puntajes = np.zeros(len(df), dtype='int64')
+    for columna, tabla in PUNTAJES_RIESGO.items():
+        valores = df[columna].astype('category')
+        por_codigo = np.array([tabla.get(clave_valor(v), 0) for v in valores.cat.categories] + [0], dtype='int64')
+        puntajes += por_codigo[valores.cat.codes.to_numpy()]
+    return puntajes
+
+
+# Tabla para consultas de rango de máximo: en el nivel j, la posición con mayor puntaje
+# entre i e i + 2**j. Con dos consultas a un nivel se obtiene el máximo de cualquier rango.
+def tabla_maximos(puntajes):
+    niveles = [np.arange(len(puntajes), dtype='int64')]
+    ancho = 1
+    while 2 * ancho <= len(puntajes):
+        anterior = niveles[-1]
+        izquierda, derecha = anterior[:len(anterior) - ancho], anterior[ancho:]
+        niveles.append(np.where(puntajes[izquierda] >= puntajes[derecha], izquierda, derecha))
+        ancho *= 2
+    return niveles
+
+
+# Agenda de mantenimientos: los árboles (con su último seguimiento) ordenados por fecha del
+# próximo mantenimiento y por id_arbol, con su puntaje de riesgo. Un rango de fechas se
+# ubica con búsqueda binaria sobre las fechas ordenadas, y los K de mayor riesgo dentro del
+# rango salen de un heap de subrangos: cada vez que se saca el máximo de un subrango se
+# agregan las dos partes que quedan a sus lados. Así cada consulta cuesta O(log n + K log K)
+# sin importar cuántos árboles vencen en el rango ni cuántos seguimientos tiene el historial.
+class AgendaMantenimiento:
+    def __init__(self, estado_arboles_df):
+        arboles = estado_arboles_df.reset_index() if 'id_arbol' not in estado_arboles_df.columns else estado_arboles_df
+        arboles = arboles.dropna(subset=['prox_fecha_mante'])
+        fechas = pd.to_datetime(arboles['prox_fecha_mante']).to_numpy(dtype='datetime64[ns]')
+        orden = np.lexsort((arboles['id_arbol'].to_numpy(), fechas))
+
+        self.fechas = fechas[orden]
+        self.puntajes = puntaje_riesgo(arboles)[orden]
+        self.arboles = arboles.iloc[orden].reset_index(drop=True).assign(puntaje_riesgo=self.puntajes)
+        self._maximos = tabla_maximos(self.puntajes)
+
+    def __len__(self):
+        return len(self.fechas)
+
+    # Posiciones [inicio, fin) de los árboles con el próximo mantenimiento entre `desde`
+    # (inclusive) y `hasta` (exclusive); sin `desde`, también los atrasados
+    def rango(self, desde=None, hasta=None):
+        inicio = 0 if desde is None else np.searchsorted(self.fechas, np.datetime64(pd.Timestamp(desde), 'ns'))
+        fin = len(self.fechas) if hasta is None else np.searchsorted(self.fechas, np.datetime64(pd.Timestamp(hasta), 'ns'))
+        return int(inicio), int(max(inicio, fin))
+
+    def _posicion_maxima(self, inicio, fin):
+        nivel = (fin - inicio).bit_length() - 1
+        izquierda = self._maximos[nivel][inicio]
+        derecha = self._maximos[nivel][fin - (1 << nivel)]
+        return int(izquierda if self.puntajes[izquierda] >= self.puntajes[derecha] else derecha)
+
+    # Árboles del rango en orden de fecha
+    def vencimientos(self, desde=None, hasta=None):
+        inicio, fin = self.rango(desde, hasta)
+        return self.arboles.iloc[inicio:fin][COLUMNAS_AGENDA]
+
+    # Los `cantidad` árboles de mayor riesgo del rango; a igual puntaje, el que vence antes
+    def prioridades(self, cantidad, desde=None, hasta=None):
+        inicio, fin = self.rango(desde, hasta)
+        posiciones = []
+        pendientes = []
+        if fin > inicio:
+            posicion = self._posicion_maxima(inicio, fin)
+            pendientes.append((-self.puntajes[posicion], posicion, inicio, fin))
+        while pendientes and len(posiciones) < cantidad:
+            _, posicion, inicio, fin = heapq.heappop(pendientes)
+            posiciones.append(posicion)
+            for parte_inicio, parte_fin in ((inicio, posicion), (posicion + 1, fin)):
+                if parte_fin > parte_inicio:
+                    maxima = self._posicion_maxima(parte_inicio, parte_fin)
+                    heapq.heappush(pendientes, (-self.puntajes[maxima], maxima, parte_inicio, parte_fin))
+        return self.arboles.iloc[posiciones][COLUMNAS_AGENDA].reset_index(drop=True)
+
+    # Rango de fechas de los próximos `dias` a partir de `hoy` (sin comienzo si se incluyen
+    # los mantenimientos atrasados)
+    def ventana(self, dias, hoy=None, atrasados=True):
+        hoy = pd.Timestamp.now().normalize() if hoy is None else pd.Timestamp(hoy).normalize()
+        return None if atrasados else hoy, hoy + pd.Timedelta(days=dias)
+
+    # Cantidad de árboles con el mantenimiento atrasado (antes de `hoy`) y de árboles que
+    # vencen en los próximos `dias` (desde `hoy`)
+    def pendientes(self, dias, hoy=None):
+        hoy, hasta = self.ventana(dias, hoy, atrasados=False)
+        inicio, fin = self.rango(hoy, hasta)
+        return inicio - self.rango(None, hoy)[0], fin - inicio
+
+    # Los `cantidad` árboles de mayor riesgo que vencen en los próximos `dias`
+    def proximos(self, dias, cantidad, hoy=None, atrasados=True):
+        return self.prioridades(cantidad, *self.ventana(dias, hoy, atrasados))
+
+
+# CSV de la ruta de una cuadrilla: los árboles en el orden en que se visitan (si no
+# traen la columna orden, el orden de las filas)
+def ruta_csv(arboles):
+    ruta = arboles.reset_index(drop=True)
+    if 'orden' not in ruta.columns:
+        ruta.insert(0, 'orden', np.arange(1, len(ruta) + 1))
+    ruta['prox_fecha_mante'] = pd.to_datetime(ruta['prox_fecha_mante']).dt.strftime('%Y-%m-%d')
+    return ruta.to_csv(index=False).encode('utf-8')
@@ -0,0 +1,400 @@
+import glob
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import uuid
+
+import pandas as pd
+
+# pyarrow es opcional: sin él se sigue leyendo directamente de los CSV
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+    feather = None
+
+DIRECTORIO_DATOS = './data'
+DIRECTORIO_ALMACEN = os.path.join(DIRECTORIO_DATOS, 'almacen')
+ARCHIVO_MANIFIESTO = 'manifiesto.json'
+
+# Tablas del almacén y el CSV de origen de cada una
+TABLAS = {
+    'registro_arboles': 'RegistroArboles_actualizado.csv',
+    'espacios_verdes': 'EspaciosVerdes.csv',
+    'puntos_verdes': 'PuntosVerdes.csv',
+    'mantenimiento_arboles': 'MantenimientoArboles.csv',
+    'barrios': 'Barrios.csv',
+}
+
+# Columnas de pocos valores distintos que se guardan como categóricas
+COLUMNAS_CATEGORICAS = {
+    'registro_arboles': ['tipo_vereda', 'lado_vereda', 'especie', 'tipo_tendido', 'activo'],
+    'espacios_verdes': ['clasificacion', 'nombre_barrio'],
+    'mantenimiento_arboles': [
+        'tipo_seguimiento', 'estado_salud', 'fuste', 'cazuela', 'ahuecamiento', 'inclinacion',
+        'altura', 'fase_vital', 'riesgo', 'levantamiento_vereda', 'tipo_tierra', 'tipo_calle', 'luz_led'
+    ],
+    'barrios': ['tipo_barrio', 'numero_ordenanza'],
+}
+
+# Columnas con geometrías WKT que se decodifican una sola vez a WKB, reproyectadas
+# a WGS84 y con su área y centroide precalculados (ver geometria_barrios.py)
+COLUMNAS_WKT = {
+    'barrios': ['the_geom_barrios'],
+}
+
+SUFIJO_WKB = '_wkb'
+
+# Tablas a las que solo se agregan filas al final del CSV (las cuadrillas suman
+# seguimientos todos los días) y la columna con el identificador creciente de cada fila.
+# Se ingestan por tramos: solo se lee lo agregado desde la última ingesta.
+TABLAS_INCREMENTALES = {
+    'mantenimiento_arboles': 'id_seguimiento',
+}
+
+# Bytes anteriores al desplazamiento que se comparan para saber si el CSV solo creció
+BYTES_CONTROL = 4096
+
+# Con más tramos que estos se vuelven a juntar en un único archivo
+MAXIMO_TRAMOS = 32
+
+# Las sesiones de Streamlit comparten el proceso: una sola ingesta incremental a la vez
+_lock_incremental = threading.Lock()
+
+# Versión del formato del almacén: al cambiar cómo se guardan las tablas, todo lo
+# ingestado con un formato anterior queda vencido
+VERSION_FORMATO = 2
+
+
+# Ruta del archivo Arrow de una tabla dentro del almacén (o de uno de sus tramos agregados)
+def ruta_tabla(nombre, directorio_almacen=DIRECTORIO_ALMACEN, tramo=0):
+    if tramo:
+        return os.path.join(directorio_almacen, f'{nombre}.{tramo}.arrow')
+    return os.path.join(directorio_almacen, f'{nombre}.arrow')
+
+
+# Huella rápida del CSV de origen (tamaño y fecha de modificación) para detectar cambios
+def huella_csv(ruta_csv):
+    estado = os.stat(ruta_csv)
+    return {'tamano': estado.st_size, 'mtime_ns': estado.st_mtime_ns, 'formato': VERSION_FORMATO}
+
+
+# Versión de los datos: cambia cuando cambia cualquiera de los CSV de origen
+# (o solo los de las tablas indicadas). Se usa como clave de las cachés de tablas derivadas.
+def version_datos(directorio_datos=DIRECTORIO_DATOS, tablas=None):
+    huellas = {}
+    for nombre in tablas or TABLAS:
+        try:
+            huellas[nombre] = huella_csv(os.path.join(directorio_datos, TABLAS[nombre]))
+        except OSError:
+            huellas[nombre] = None
+    contenido = json.dumps(huellas, sort_keys=True).encode('utf-8')
+    return hashlib.sha1(contenido).hexdigest()[:12]
+
+
+def leer_manifiesto(directorio_almacen=DIRECTORIO_ALMACEN):
+    try:
+        with open(os.path.join(directorio_almacen, ARCHIVO_MANIFIESTO), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def guardar_manifiesto(manifiesto, directorio_almacen=DIRECTORIO_ALMACEN):
+    ruta = os.path.join(directorio_almacen, ARCHIVO_MANIFIESTO)
+    ruta_temporal = ruta + '.tmp'
+    with open(ruta_temporal, 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=2)
+    os.replace(ruta_temporal, ruta)
+
+
+# Columnas derivadas (WKB, área, centroide) que no existen en el CSV y la columna WKT de la que salen
+def columnas_derivadas(nombre):
+    from geometria_barrios import COLUMNAS_GEOMETRIA
+    derivadas = {}
+    for columna in COLUMNAS_WKT.get(nombre, []):
+        derivadas[columna + SUFIJO_WKB] = columna
+        derivadas.update({derivada: columna for derivada in COLUMNAS_GEOMETRIA})
+    return derivadas
+
+
+# Aplicar tipos: categóricas y geometrías WKT decodificadas a WKB
+def tipar_tabla(nombre, df):
+    for columna in COLUMNAS_CATEGORICAS.get(nombre, []):
+        if columna in df.columns:
+            df[columna] = df[columna].astype('category')
+
+    for columna in COLUMNAS_WKT.get(nombre, []):
+        if columna in df.columns:
+            import shapely
+            from geometria_barrios import preparar_geometrias
+            geometrias = shapely.from_wkt(df[columna].to_numpy(dtype=object), on_invalid='ignore')
+            wgs84, derivadas = preparar_geometrias(geometrias)
+            df[columna + SUFIJO_WKB] = shapely.to_wkb(wgs84)
+            for derivada, valores in derivadas.items():
+                df[derivada] = valores
+    return df
+
+
+# Leer una tabla desde su CSV, limitando las columnas si se pide
+def leer_csv(nombre, columnas=None, directorio_datos=DIRECTORIO_DATOS):
+    ruta_csv = os.path.join(directorio_datos, TABLAS[nombre])
+    if columnas is None:
+        return tipar_tabla(nombre, pd.read_csv(ruta_csv))
+
+    derivadas = columnas_derivadas(nombre)
+    columnas_csv = [c for c in columnas if c not in derivadas]
+    columnas_csv += [derivadas[c] for c in columnas if c in derivadas and derivadas[c] not in columnas_csv]
+    df = tipar_tabla(nombre, pd.read_csv(ruta_csv, usecols=columnas_csv))
+    return df[list(columnas)]
+
+
+def escribir_arrow(tabla, ruta):
+    # Sin compresión, para poder leer con memory mapping sin copiar
+    feather.write_feather(tabla, ruta + '.tmp', compression='uncompressed')
+    os.replace(ruta + '.tmp', ruta)
+
+
+# Convertir una tabla CSV al almacén columnar
+def ingestar_tabla(nombre, directorio_datos=DIRECTORIO_DATOS, directorio_almacen=DIRECTORIO_ALMACEN):
+    if nombre in TABLAS_INCREMENTALES:
+        return ingestar_incremental(nombre, directorio_datos, directorio_almacen)
+
+    ruta_csv = os.path.join(directorio_datos, TABLAS[nombre])
+    huella = huella_csv(ruta_csv)
+    df = leer_csv(nombre, directorio_datos=directorio_datos)
+    escribir_arrow(pa.Table.from_pandas(df, preserve_index=False), ruta_tabla(nombre, directorio_almacen))
+    return huella
+
+
+# Leer los bytes de un CSV entre `desde` y `hasta`
+def leer_bytes_csv(ruta_csv, desde, hasta):
+    with open(ruta_csv, 'rb') as f:
+        f.seek(desde)
+        return f.read(hasta - desde)
+
+
+def suma_control(ruta_csv, desplazamiento):
+    with open(ruta_csv, 'rb') as f:
+        inicio = max(0, desplazamiento - BYTES_CONTROL)
+        f.seek(inicio)
+        return hashlib.sha1(f.read(desplazamiento - inicio)).hexdigest()
+
+
+def borrar_tramos(nombre, directorio_almacen, desde=1):
+    tramo = desde
+    while os.path.exists(ruta_tabla(nombre, directorio_almacen, tramo)):
+        os.remove(ruta_tabla(nombre, directorio_almacen, tramo))
+        tramo += 1
+
+
+# Ingesta de una tabla incremental. Si el CSV solo creció desde la última ingesta (los
+# bytes ya ingestados no cambiaron) se lee únicamente la cola y se guarda como un tramo
+# nuevo; si no, se ingesta completa con una generación nueva. El manifiesto guarda,
+# además de la huella, el desplazamiento leído, el mayor identificador y las filas de
+# cada tramo.
+def ingestar_incremental(nombre, directorio_datos=DIRECTORIO_DATOS, directorio_almacen=DIRECTORIO_ALMACEN):
+    ruta_csv = os.path.join(directorio_datos, TABLAS[nombre])
+    huella = huella_csv(ruta_csv)
+    registrada = leer_manifiesto(directorio_almacen).get(nombre, {})
+    entrada = agregar_cola(nombre, ruta_csv, huella, registrada, directorio_almacen)
+    if entrada is not None:
+        return entrada
+
+    datos = leer_bytes_csv(ruta_csv, 0, huella['tamano'])
+    df = tipar_tabla(nombre, pd.read_csv(io.BytesIO(datos)))
+    escribir_arrow(pa.Table.from_pandas(df, preserve_index=False), ruta_tabla(nombre, directorio_almacen))
+    borrar_tramos(nombre, directorio_almacen)
+    identificador = df[TABLAS_INCREMENTALES[nombre]]
+    return dict(huella, desplazamiento=len(datos), control=suma_control(ruta_csv, len(datos)),
+                columnas=list(df.columns), maximo_id=int(identificador.max()) if len(df) else None,
+                tramos=[len(df)], generacion=uuid.uuid4().hex)
+
+
+# Agregar como tramo nuevo las filas escritas al final del CSV desde la última ingesta.
+# Una última línea sin salto de línea todavía se está escribiendo: se deja para la
+# próxima ingesta. Devuelve la entrada nueva del manifiesto, o None si hay que ingestar
+# la tabla completa (el CSV se recortó o se modificó antes del desplazamiento, la cola no
+# se puede leer, o las filas nuevas no tienen identificadores mayores a los ya
+# ingestados, como el resto de una línea que una ingesta completa leyó a medio escribir).
+def agregar_cola(nombre, ruta_csv, huella, registrada, directorio_almacen):
+    desplazamiento = registrada.get('desplazamiento')
+    if (desplazamiento is None or registrada.get('formato') != VERSION_FORMATO
+            or huella['tamano'] < desplazamiento
+            or not os.path.exists(ruta_tabla(nombre, directorio_almacen))
+            or suma_control(ruta_csv, desplazamiento) != registrada['control']):
+        return None
+
+    datos = leer_bytes_csv(ruta_csv, desplazamiento, huella['tamano'])
+    datos = datos[:datos.rfind(b'\n') + 1]
+    entrada = dict(registrada, **huella)
+    if not datos.strip():
+        return entrada
+
+    try:
+        df = tipar_tabla(nombre, pd.read_csv(io.BytesIO(datos), header=None, names=registrada['columnas']))
+    except (pd.errors.ParserError, ValueError, TypeError):
+        return None
+    identificador = pd.to_numeric(df[TABLAS_INCREMENTALES[nombre]], errors='coerce')
+    if identificador.isna().any():
+        return None
+    if registrada['maximo_id'] is not None and not (identificador > registrada['maximo_id']).all():
+        return None
+
+    esquema = feather.read_table(ruta_tabla(nombre, directorio_almacen), memory_map=True).schema
+    try:
+        tabla = pa.Table.from_pandas(df, schema=esquema, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, ValueError):
+        return None
+    tramo = len(registrada['tramos'])
+    escribir_arrow(tabla, ruta_tabla(nombre, directorio_almacen, tramo))
+
+    entrada.update(
+        desplazamiento=desplazamiento + len(datos),
+        control=suma_control(ruta_csv, desplazamiento + len(datos)),
+        maximo_id=int(max(identificador.max(), registrada['maximo_id'] or identificador.max())),
+        tramos=registrada['tramos'] + [len(df)],
+    )
+    if len(entrada['tramos']) > MAXIMO_TRAMOS:
+        entrada['tramos'] = compactar(nombre, entrada['tramos'], directorio_almacen)
+    return entrada
+
+
+# Al unir tramos las categorías quedan en orden de aparición: se ordenan como en una
+# ingesta completa
+def ordenar_categorias(df):
+    for columna in df.columns:
+        if isinstance(df[columna].dtype, pd.CategoricalDtype):
+            categorias = df[columna].cat.categories
+            if not categorias.is_monotonic_increasing:
+                df[columna] = df[columna].cat.reorder_categories(categorias.sort_values())
+    return df
+
+
+# Juntar todos los tramos en el archivo principal de la tabla (las filas no cambian)
+def compactar(nombre, tramos, directorio_almacen=DIRECTORIO_ALMACEN):
+    tabla = leer_tramos(nombre, tramos, directorio_almacen=directorio_almacen)
+    escribir_arrow(tabla.combine_chunks(), ruta_tabla(nombre, directorio_almacen))
+    borrar_tramos(nombre, directorio_almacen)
+    return [tabla.num_rows]
+
+
+# Leer los tramos de una tabla incremental, opcionalmente solo las filas desde `desde`
+def leer_tramos(nombre, tramos, columnas=None, desde=0, directorio_almacen=DIRECTORIO_ALMACEN):
+    partes = []
+    inicio = 0
+    for tramo, filas in enumerate(tramos):
+        if inicio + filas > desde:
+            tabla = feather.read_table(ruta_tabla(nombre, directorio_almacen, tramo), columns=columnas,
+                                       memory_map=True)
+            partes.append(tabla.slice(max(0, desde - inicio)))
+        inicio += filas
+    if not partes:
+        return feather.read_table(ruta_tabla(nombre, directorio_almacen), columns=columnas,
+                                  memory_map=True).slice(0, 0)
+    return pa.concat_tables(partes)
+
+
+# Paso de ingesta: convierte los cinco CSV y registra sus huellas en el manifiesto
+def ingestar(directorio_datos=DIRECTORIO_DATOS, directorio_almacen=DIRECTORIO_ALMACEN, solo_vencidas=False):
+    if pa is None:
+        raise RuntimeError('Se necesita pyarrow para construir el almacén de datos')
+
+    os.makedirs(directorio_almacen, exist_ok=True)
+    manifiesto = leer_manifiesto(directorio_almacen)
+    ingestadas = []
+    for nombre in TABLAS:
+        if solo_vencidas and almacen_vigente(nombre, directorio_datos, directorio_almacen):
+            continue
+        manifiesto[nombre] = ingestar_tabla(nombre, directorio_datos, directorio_almacen)
+        ingestadas.append(nombre)
+    guardar_manifiesto(manifiesto, directorio_almacen)
+    return ingestadas
+
+
+# Una tabla está vigente si existe en el almacén y su CSV no cambió desde la ingesta
+def almacen_vigente(nombre, directorio_datos=DIRECTORIO_DATOS, directorio_almacen=DIRECTORIO_ALMACEN):
+    if not os.path.exists(ruta_tabla(nombre, directorio_almacen)):
+        return False
+    registrada = leer_manifiesto(directorio_almacen).get(nombre) or {}
+    try:
+        huella = huella_csv(os.path.join(directorio_datos, TABLAS[nombre]))
+    except OSError:
+        return False
+    return {clave: registrada.get(clave) for clave in huella} == huella
+
+
+# Poner al día una tabla incremental vencida leyendo solo lo agregado al CSV. Devuelve
+# la entrada del manifiesto (con la generación y las filas de cada tramo) o None si no
+# se puede usar el almacén.
+def actualizar_incremental(nombre, directorio_datos=DIRECTORIO_DATOS, directorio_almacen=DIRECTORIO_ALMACEN):
+    if feather is None or nombre not in TABLAS_INCREMENTALES:
+        return None
+    with _lock_incremental:
+        entrada = leer_manifiesto(directorio_almacen).get(nombre) or {}
+        if 'tramos' in entrada and almacen_vigente(nombre, directorio_datos, directorio_almacen):
+            return entrada
+        try:
+            os.makedirs(directorio_almacen, exist_ok=True)
+            entrada = ingestar_incremental(nombre, directorio_datos, directorio_almacen)
+        except OSError:
+            return None
+        manifiesto = leer_manifiesto(directorio_almacen)
+        manifiesto[nombre] = entrada
+        guardar_manifiesto(manifiesto, directorio_almacen)
+        return entrada
+
+
+# Guardar un resultado intermedio (tabla derivada) junto al almacén
+def guardar_tabla_derivada(nombre, df, directorio_almacen=DIRECTORIO_ALMACEN):
+    os.makedirs(directorio_almacen, exist_ok=True)
+    ruta = os.path.join(directorio_almacen, nombre)
+    if feather is not None:
+        feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), ruta + '.arrow.tmp',
+                              compression='uncompressed')
+        os.replace(ruta + '.arrow.tmp', ruta + '.arrow')
+    else:
+        df.to_pickle(ruta + '.pkl.tmp')
+        os.replace(ruta + '.pkl.tmp', ruta + '.pkl')
+
+
+# Leer una tabla derivada guardada con guardar_tabla_derivada (None si no existe)
+def cargar_tabla_derivada(nombre, directorio_almacen=DIRECTORIO_ALMACEN):
+    ruta = os.path.join(directorio_almacen, nombre)
+    if feather is not None and os.path.exists(ruta + '.arrow'):
+        return feather.read_table(ruta + '.arrow', memory_map=True).to_pandas()
+    if os.path.exists(ruta + '.pkl'):
+        return pd.read_pickle(ruta + '.pkl')
+    return None
+
+
+# Borrar los archivos del almacén que empiezan con `prefijo` salvo los de `vigente`
+# (las tablas derivadas de versiones anteriores de los datos)
+def borrar_anteriores(prefijo, vigente, directorio_almacen=DIRECTORIO_ALMACEN):
+    for ruta in glob.glob(os.path.join(directorio_almacen, prefijo + '*')):
+        if not os.path.basename(ruta).startswith(vigente):
+            os.remove(ruta)
+
+
+# Cargar una tabla leyendo solo las columnas pedidas; si el almacén está vencido se usa el
+# CSV (las tablas incrementales se ponen al día leyendo solo lo agregado)
+def cargar_tabla(nombre, columnas=None, directorio_datos=DIRECTORIO_DATOS, directorio_almacen=DIRECTORIO_ALMACEN):
+    entrada = actualizar_incremental(nombre, directorio_datos, directorio_almacen)
+    if entrada is not None:
+        return ordenar_categorias(
+            leer_tramos(nombre, entrada['tramos'], columnas, directorio_almacen=directorio_almacen).to_pandas()
+        )
+    if feather is not None and almacen_vigente(nombre, directorio_datos, directorio_almacen):
+        tabla = feather.read_table(ruta_tabla(nombre, directorio_almacen), columns=columnas, memory_map=True)
+        return tabla.to_pandas()
+    return leer_csv(nombre, columnas, directorio_datos)
+
+
+if __name__ == '__main__':
+    directorio = sys.argv[1] if len(sys.argv) > 1 else DIRECTORIO_DATOS
+    for nombre in ingestar(directorio, os.path.join(directorio, 'almacen')):
+        print(f"Tabla ingestada: {nombre} -> {ruta_tabla(nombre, os.path.join(directorio, 'almacen'))}")
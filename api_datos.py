@@ -0,0 +1,371 @@
+import argparse
+import asyncio
+import contextlib
+import gzip
+import hashlib
+import json
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import shapely
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+
+from almacen_datos import DIRECTORIO_DATOS, TABLAS, version_datos
+from cache_figuras import CacheFiguras
+from instantaneas import abrir_instantanea, instantaneas_activas, ruta_instantanea_actual, version_publicada
+
+# brotli es opcional: sin él las respuestas se comprimen solo con gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# API HTTP asíncrona (ASGI, con Starlette) con los mismos indicadores que muestra el
+# tablero, para otros sistemas municipales: porcentaje de árboles en mal estado, árboles
+# por estado de salud, especies, espacios verdes por barrio y mantenimientos por año, más
+# árboles y espacios verdes dentro de un rectángulo (bbox).
+#
+# Uso: python api_datos.py [--puerto 8000] [--intervalo 5]   (o uvicorn api_datos:app)
+#
+# Los indicadores se calculan una sola vez por versión de los datos (con las funciones de
+# indicadores.py, las mismas que usa la app) y cada respuesta queda serializada, con su
+# ETag y comprimida: una consulta no hace más que elegir los bytes a mandar, y con
+# If-None-Match se responde 304 sin cuerpo. Las consultas por bbox se guardan en una caché
+# LRU. Los datos se leen de la última instantánea publicada (con USAR_INSTANTANEAS=1, ver
+# precalculo.py) o del almacén; cuando cambia la versión se cargan los nuevos en otro hilo
+# y hasta que están listos se siguen sirviendo los anteriores.
+PUERTO_API = 8000
+
+# Segundos entre revisiones de la versión de los datos
+INTERVALO_S = 5
+
+# Los clientes pueden guardar una respuesta este tiempo y después revalidarla con el ETag
+SEGUNDOS_CACHE = 60
+
+# Las respuestas más chicas se mandan sin comprimir
+BYTES_MINIMOS_COMPRESION = 1024
+CALIDAD_BROTLI = 5
+
+# Elementos por consulta por bbox (se puede pedir menos con ?limite=)
+LIMITE_DEFECTO = 10_000
+LIMITE_MAXIMO = 50_000
+
+# Consultas por bbox guardadas por versión de los datos
+MAXIMO_CONSULTAS_BBOX = 256
+
+# Decimales de las coordenadas (1e-6 grados ≈ 0,1 m)
+DECIMALES = 6
+
+
+# Filas de un DataFrame como registros JSON (los valores faltantes como null)
+def registros(df):
+    return df.astype(object).where(df.notna(), None).to_dict(orient='records')
+
+
+def valor_json(valor):
+    if isinstance(valor, np.generic):
+        return valor.item()
+    if isinstance(valor, pd.Timestamp):
+        return valor.isoformat()
+    raise TypeError(f'No se puede serializar {type(valor).__name__}')
+
+
+# Respuesta ya serializada (JSON en bytes), con su ETag (hash del cuerpo) y las versiones
+# comprimidas, que se arman la primera vez que se piden
+class Respuesta:
+    def __init__(self, cuerpo):
+        self.cuerpo = cuerpo
+        self.etag = '"' + hashlib.sha1(self.cuerpo).hexdigest()[:20] + '"'
+        self._comprimidas = {}
+
+    def comprimida(self, codificacion):
+        if codificacion not in self._comprimidas:
+            if codificacion == 'br':
+                self._comprimidas[codificacion] = brotli.compress(self.cuerpo, quality=CALIDAD_BROTLI)
+            else:
+                self._comprimidas[codificacion] = gzip.compress(self.cuerpo, compresslevel=6, mtime=0)
+        return self._comprimidas[codificacion]
+
+
+# Codificación a usar según Accept-Encoding (brotli si está instalado, si no gzip)
+def elegir_codificacion(aceptadas):
+    codificaciones = {}
+    for parte in aceptadas.lower().split(','):
+        nombre, _, parametros = parte.strip().partition(';')
+        calidad = 1.0
+        if parametros.strip().startswith('q='):
+            try:
+                calidad = float(parametros.strip()[2:])
+            except ValueError:
+                calidad = 0.0
+        codificaciones[nombre.strip()] = calidad
+    for codificacion in (['br'] if brotli is not None else []) + ['gzip']:
+        if codificaciones.get(codificacion, codificaciones.get('*', 0)) > 0:
+            return codificacion
+    return None
+
+
+def respuesta_json(contenido):
+    return Respuesta(json.dumps(contenido, ensure_ascii=False, separators=(',', ':'), default=valor_json).encode('utf-8'))
+
+
+def coincide_etag(si_no_coincide, etag):
+    if not si_no_coincide:
+        return False
+    etiquetas = [etiqueta.strip().removeprefix('W/') for etiqueta in si_no_coincide.split(',')]
+    return '*' in etiquetas or etag in etiquetas
+
+
+def responder(request, respuesta):
+    encabezados = {'ETag': respuesta.etag, 'Cache-Control': f'public, max-age={SEGUNDOS_CACHE}',
+                   'Vary': 'Accept-Encoding'}
+    if coincide_etag(request.headers.get('if-none-match'), respuesta.etag):
+        return Response(status_code=304, headers=encabezados)
+    cuerpo = respuesta.cuerpo
+    if len(cuerpo) >= BYTES_MINIMOS_COMPRESION:
+        codificacion = elegir_codificacion(request.headers.get('accept-encoding', ''))
+        if codificacion is not None:
+            cuerpo = respuesta.comprimida(codificacion)
+            encabezados['Content-Encoding'] = codificacion
+    return Response(cuerpo, headers=encabezados, media_type='application/json')
+
+
+def error(mensaje, estado=400):
+    return Response(json.dumps({'error': mensaje}, ensure_ascii=False), status_code=estado,
+                    media_type='application/json')
+
+
+# Rectángulo "lng_min,lat_min,lng_max,lat_max" (en grados, WGS84)
+def leer_bbox(texto):
+    try:
+        valores = [float(valor) for valor in (texto or '').split(',')]
+    except ValueError:
+        valores = []
+    if len(valores) != 4 or not all(math.isfinite(valor) for valor in valores):
+        raise ValueError('bbox tiene que ser lng_min,lat_min,lng_max,lat_max')
+    lng_min, lat_min, lng_max, lat_max = valores
+    if lng_min > lng_max or lat_min > lat_max:
+        raise ValueError('bbox con el mínimo mayor que el máximo')
+    return tuple(round(valor, DECIMALES) for valor in valores)
+
+
+def leer_limite(texto):
+    if texto is None:
+        return LIMITE_DEFECTO
+    try:
+        limite = int(texto)
+    except ValueError:
+        limite = 0
+    if not 1 <= limite <= LIMITE_MAXIMO:
+        raise ValueError(f'limite tiene que estar entre 1 y {LIMITE_MAXIMO}')
+    return limite
+
+
+def coleccion(features, limite, cantidad):
+    return ('{"type":"FeatureCollection","cantidad":' + str(cantidad) + ',"truncado":'
+            + ('true' if cantidad > limite else 'false') + ',"features":[' + ','.join(features) + ']}')
+
+
+# Tablas que usa la API: de la instantánea publicada o del almacén
+def cargar_tablas():
+    from cubo_barrios import cargar_cubo
+    from especies import cargar_registro_especies, contar_especies
+    from estado_arboles import construir_estado_arboles
+    from indicadores import contar_mantenimientos_por_año
+    from tablas_compartidas import COLUMNAS_VISTAS, TablasCompartidas
+
+    ruta = ruta_instantanea_actual() if instantaneas_activas() else None
+    instantanea = abrir_instantanea(ruta) if ruta else None
+    if instantanea is not None:
+        return instantanea.version, {
+            'cubo': instantanea.cubo(),
+            'estado_arboles': instantanea.tabla('estado_arboles'),
+            'conteo_especies': instantanea.tabla('conteo_especies'),
+            'mantenimientos_por_año': instantanea.tabla('mantenimientos_por_año'),
+            'espacios_verdes': instantanea.tabla('espacios_verdes'),
+        }
+
+    version = version_datos()
+    tablas, _ = TablasCompartidas(COLUMNAS_VISTAS).obtener()
+    return version, {
+        'cubo': cargar_cubo(mantenimiento_arboles_df=tablas['mantenimiento_arboles']),
+        'estado_arboles': construir_estado_arboles(tablas['registro_arboles'], tablas['mantenimiento_arboles']),
+        'conteo_especies': contar_especies(tablas['registro_arboles']['especie'], cargar_registro_especies()),
+        'mantenimientos_por_año': contar_mantenimientos_por_año(tablas['mantenimiento_arboles']),
+        'espacios_verdes': tablas['espacios_verdes'],
+    }
+
+
+def version_fuente():
+    if instantaneas_activas():
+        publicada = version_publicada()
+        if publicada is not None:
+            return publicada
+    return version_datos()
+
+
+# Datos de una versión: los indicadores ya serializados y los índices para las consultas
+# por bbox (árboles ordenados por longitud, espacios verdes en un STRtree)
+class DatosApi:
+    def __init__(self):
+        from geojson_espacios import decodificar_espacios_verdes
+        from indicadores import arboles_por_estado, espacios_por_barrio, porcentaje_mal_estado
+
+        inicio = time.perf_counter()
+        self.version, tablas = cargar_tablas()
+        cubo = tablas['cubo']
+        estado = tablas['estado_arboles']
+        self.respuesta_version = respuesta_json({'version': self.version})
+        self.respuestas = {
+            'estado_salud': respuesta_json({
+                'porcentaje_mal_estado': float(porcentaje_mal_estado(cubo['arboles'])),
+                'por_estado': registros(arboles_por_estado(cubo['arboles'])),
+            }),
+            'especies': respuesta_json(registros(tablas['conteo_especies'])),
+            'espacios_por_barrio': respuesta_json(registros(espacios_por_barrio(cubo['barrios']))),
+            'mantenimientos_por_anio': respuesta_json(registros(tablas['mantenimientos_por_año'])),
+        }
+
+        # Árboles con coordenadas (una fila por id_arbol, con su último seguimiento)
+        arboles = estado.reset_index().dropna(subset=['lat', 'lng']).sort_values('lng', kind='stable')
+        self.arboles_lng = arboles['lng'].to_numpy(dtype='float64')
+        self.arboles_lat = arboles['lat'].to_numpy(dtype='float64')
+        self.arboles = registros(arboles[['id_arbol', 'especie', 'estado_salud']])
+
+        # Espacios verdes con geometría: un multipolígono por espacio con un polígono por anillo
+        anillos, _ = decodificar_espacios_verdes(os.path.join(DIRECTORIO_DATOS, TABLAS['espacios_verdes']))
+        espacios = tablas['espacios_verdes'].drop_duplicates(subset='gid')
+        geometrias, filas = [], []
+        for posicion, gid in enumerate(espacios['gid']):
+            poligonos = [shapely.Polygon(anillo[:, ::-1]) for anillo in anillos.get(gid) or [] if len(anillo) >= 4]
+            if poligonos:
+                geometrias.append(shapely.MultiPolygon(poligonos))
+                filas.append(posicion)
+        geometrias = shapely.transform(np.array(geometrias, dtype=object),
+                                       lambda coordenadas: np.round(coordenadas, DECIMALES))
+        self.espacios_arbol = shapely.STRtree(geometrias)
+        self.espacios = [
+            '{"type":"Feature","properties":' + json.dumps(propiedades, ensure_ascii=False, separators=(',', ':'), default=valor_json)
+            + ',"geometry":' + geometria + '}'
+            for propiedades, geometria in zip(registros(espacios.iloc[filas]), shapely.to_geojson(geometrias))
+        ]
+
+        self.consultas = CacheFiguras(MAXIMO_CONSULTAS_BBOX)
+        self.segundos_carga = time.perf_counter() - inicio
+
+    def consultar_arboles(self, bbox, limite):
+        lng_min, lat_min, lng_max, lat_max = bbox
+        desde = np.searchsorted(self.arboles_lng, lng_min, side='left')
+        hasta = np.searchsorted(self.arboles_lng, lng_max, side='right')
+        lat = self.arboles_lat[desde:hasta]
+        indices = desde + np.flatnonzero((lat >= lat_min) & (lat <= lat_max))
+        features = [json.dumps({
+            'type': 'Feature', 'properties': self.arboles[i],
+            'geometry': {'type': 'Point', 'coordinates': [round(float(self.arboles_lng[i]), DECIMALES),
+                                                          round(float(self.arboles_lat[i]), DECIMALES)]},
+        }, ensure_ascii=False, separators=(',', ':'), default=valor_json) for i in indices[:limite].tolist()]
+        return coleccion(features, limite, len(indices))
+
+    def consultar_espacios(self, bbox, limite):
+        indices = np.sort(self.espacios_arbol.query(shapely.box(*bbox), predicate='intersects'))
+        return coleccion([self.espacios[i] for i in indices[:limite].tolist()], limite, len(indices))
+
+    # Respuesta de una consulta por bbox, guardada en la caché LRU de esta versión
+    def consulta(self, tipo, bbox, limite):
+        consultar = self.consultar_arboles if tipo == 'arboles' else self.consultar_espacios
+        return self.consultas.obtener((tipo, bbox, limite), lambda: Respuesta(consultar(bbox, limite).encode('utf-8')))
+
+
+# Datos servidos y su actualización: cuando cambia la versión se cargan los nuevos en
+# otro hilo (el bucle de eventos sigue atendiendo con los anteriores) y se reemplazan
+class ServicioDatos:
+    def __init__(self, intervalo=INTERVALO_S):
+        self.intervalo = intervalo
+        self.datos = None
+
+    async def actualizar(self):
+        version = await asyncio.to_thread(version_fuente)
+        if self.datos is None or version != self.datos.version:
+            datos = await asyncio.to_thread(DatosApi)
+            self.datos = datos
+            print(f'Datos {datos.version} cargados ({datos.segundos_carga:.2f} s)', flush=True)
+
+    async def vigilar(self):
+        while True:
+            await asyncio.sleep(self.intervalo)
+            try:
+                await self.actualizar()
+            except Exception as excepcion:
+                print(f'Error al cargar los datos: {excepcion}', flush=True)
+
+
+servicio = ServicioDatos()
+
+
+@contextlib.asynccontextmanager
+async def ciclo_de_vida(app):
+    await servicio.actualizar()
+    tarea = asyncio.create_task(servicio.vigilar())
+    try:
+        yield
+    finally:
+        tarea.cancel()
+
+
+async def version(request):
+    return responder(request, servicio.datos.respuesta_version)
+
+
+async def indicador(request):
+    respuesta = servicio.datos.respuestas.get(request.path_params['nombre'])
+    if respuesta is None:
+        return error(f"Indicador desconocido: {request.path_params['nombre']}", 404)
+    return responder(request, respuesta)
+
+
+async def consulta_bbox(request, tipo):
+    try:
+        bbox = leer_bbox(request.query_params.get('bbox'))
+        limite = leer_limite(request.query_params.get('limite'))
+    except ValueError as excepcion:
+        return error(str(excepcion))
+    respuesta = await asyncio.to_thread(servicio.datos.consulta, tipo, bbox, limite)
+    return responder(request, respuesta)
+
+
+async def arboles(request):
+    return await consulta_bbox(request, 'arboles')
+
+
+async def espacios_verdes(request):
+    return await consulta_bbox(request, 'espacios_verdes')
+
+
+app = Starlette(routes=[
+    Route('/api/version', version),
+    Route('/api/indicadores/{nombre}', indicador),
+    Route('/api/arboles', arboles),
+    Route('/api/espacios_verdes', espacios_verdes),
+], lifespan=ciclo_de_vida)
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description='API de datos del tablero')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=PUERTO_API)
+    parser.add_argument('--intervalo', type=float, default=INTERVALO_S, help='Segundos entre revisiones de los datos')
+    args = parser.parse_args()
+
+    servicio.intervalo = args.intervalo
+    uvicorn.run(app, host=args.host, port=args.puerto, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,25 +1,52 @@
 import streamlit as st
 import pandas as pd
-import folium
-import seaborn as sns
-import matplotlib.pyplot as plt
-from folium.plugins import HeatMap
-import json
-import geopandas as gpd
-from shapely import wkt
-from streamlit_folium import folium_static
 import plotly.express as px  # Importar plotly express para gráficos interactivos
-from folium.plugins import MarkerCluster
-
-# Cargar los datasets
-@st.cache_data
-def cargar_datos():
-    registro_arboles_df = pd.read_csv('./data/RegistroArboles_actualizado.csv')
-    espacios_verdes_df = pd.read_csv('./data/EspaciosVerdes.csv')
-    puntos_verdes_df = pd.read_csv('./data/PuntosVerdes.csv')
-    mantenimiento_arboles_df = pd.read_csv('./data/MantenimientoArboles.csv')
-    barrios_df = pd.read_csv('./data/Barrios.csv')
-    return registro_arboles_df, espacios_verdes_df, puntos_verdes_df, mantenimiento_arboles_df, barrios_df
+import plotly.io as pio
+from almacen_datos import version_datos
+from geojson_espacios import decodificar_espacios_verdes
+from estado_arboles import EstadoArbolesIncremental
+from especies import cargar_registro_especies, contar_especies
+from cubo_barrios import cargar_cubo, cortar
+from indicadores import arboles_por_estado, contar_mantenimientos_por_año, espacios_por_barrio, porcentaje_mal_estado
+from normalizacion import huellas_tablas, verificacion_mutaciones_activa, verificar_sin_mutaciones
+from tablas_compartidas import COLUMNAS_VISTAS, TablasCompartidas
+from cache_figuras import CacheFiguras
+from base_datos import BaseDatos, actualizar_base, backend_activo
+from instrumentacion import cacheada, iniciar_rerun, instrumentar, medir, terminar_rerun
+from instantaneas import abrir_instantanea, instantaneas_activas, ruta_instantanea_actual
+from servidor_teselas import teselas_activas, url_teselas
+
+# folium, streamlit.components y los módulos de mapas y de barrios se importan dentro de
+# las funciones que los usan: así el arranque no los carga hasta que se abre una vista
+# que los necesita (ver perfil_importacion.py)
+
+# Columnas que usan las vistas de cada tabla: COLUMNAS_VISTAS en tablas_compartidas.py.
+# Con BACKEND_DATOS=sqlite los seguimientos no se cargan en memoria: las vistas que los
+# usan consultan la base SQLite local (ver base_datos.py)
+columnas_vistas = {nombre: columnas for nombre, columnas in COLUMNAS_VISTAS.items()
+                   if not (backend_activo() and nombre == 'mantenimiento_arboles')}
+
+# Cargar los datasets desde el almacén columnar (o desde los CSV si está vencido) y
+# normalizarlos una sola vez: coordenadas, especies y fechas. Las tablas se comparten sin
+# copiar entre reruns y sesiones (cache_resource), así que las vistas solo las leen; con
+# VERIFICAR_MUTACIONES=1 se comprueba al final de cada rerun. En cada rerun se recarga solo
+# la tabla cuyo CSV cambió, y de MantenimientoArboles solo las filas agregadas, sin tener
+# que limpiar la caché a mano.
+@st.cache_resource
+def obtener_tablas_compartidas():
+    return TablasCompartidas(columnas_vistas, verificar=verificacion_mutaciones_activa())
+
+# Con USAR_INSTANTANEAS=1 se lee la última instantánea publicada por precalculo.py: las
+# tablas, las tablas derivadas y las figuras ya vienen armadas y la sesión no calcula nada.
+# Cuando se publica una nueva, el próximo rerun pasa a ella. Sin instantánea publicada se
+# calcula todo desde los CSV como siempre.
+@st.cache_resource(max_entries=1)
+def obtener_instantanea(ruta):
+    return abrir_instantanea(ruta)
+
+# Medición del rerun: cada vista, carga, figura y envío al navegador queda registrado con
+# su tiempo, filas, bytes y aciertos de caché (ver instrumentacion.py)
+rerun = iniciar_rerun()
 
 # Configuración de la página
 st.set_page_config(page_title="Gestion Corrientes Verde", layout="wide")
@@ -42,7 +69,22 @@ st.markdown(
 
 
 # Cargar los datos
-registro_arboles_df, espacios_verdes_df, puntos_verdes_df, mantenimiento_arboles_df, barrios_df = cargar_datos()
+ruta_instantanea = ruta_instantanea_actual() if instantaneas_activas() else None
+instantanea = obtener_instantanea(ruta_instantanea) if ruta_instantanea else None
+tablas_compartidas = obtener_tablas_compartidas()
+with medir('tablas_compartidas', 'carga') as medicion:
+    if instantanea is not None:
+        # Los seguimientos solo se usan a través de las tablas derivadas de la instantánea
+        tablas = instantanea.tablas([nombre for nombre in columnas_vistas if nombre != 'mantenimiento_arboles'])
+        huellas = huellas_tablas(tablas) if verificacion_mutaciones_activa() else {}
+    else:
+        tablas, huellas = tablas_compartidas.obtener()
+    medicion['filas'] = sum(len(df) for df in tablas.values())
+registro_arboles_df = tablas['registro_arboles']
+espacios_verdes_df = tablas['espacios_verdes']
+puntos_verdes_df = tablas['puntos_verdes']
+mantenimiento_arboles_df = tablas.get('mantenimiento_arboles')
+barrios_df = tablas['barrios']
 
 # Cargar el archivo CSS
 with open('styles.css') as f:
@@ -53,29 +95,166 @@ st.markdown("""
     <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0-beta3/css/all.min.css">
 """, unsafe_allow_html=True)
 
-# Función para calcular el porcentaje de árboles en mal estado
-def calcular_porcentaje_mal_estado():
-    arboles_mantenimiento_df = pd.merge(
-        registro_arboles_df,
-        mantenimiento_arboles_df,
-        on='id_arbol', 
-        how='left'
+# Tabla de estado de árboles (último seguimiento por árbol e indicadores derivados),
+# construida solo en las vistas que la usan y puesta al día con los seguimientos nuevos
+@st.cache_resource
+def obtener_estado_incremental():
+    return EstadoArbolesIncremental()
+
+@instrumentar('carga')
+def obtener_estado_arboles(version):
+    if instantanea is not None:
+        return instantanea.tabla('estado_arboles')
+    return obtener_estado_incremental().obtener(
+        registro_arboles_df, mantenimiento_arboles_df, tablas_compartidas.recargas['mantenimiento_arboles']
     )
-    # Árboles en estado 'Malo' y 'Regular'
-    arboles_malos = arboles_mantenimiento_df[
-        arboles_mantenimiento_df['estado_salud'].isin(['Malo', 'Regular'])
-    ]
-    porcentaje_malos = (len(arboles_malos) / len(arboles_mantenimiento_df)) * 100
-    return porcentaje_malos
 
-# Guardar el porcentaje en una variable local para usarla más tarde
-porcentaje_arboles_malos = calcular_porcentaje_mal_estado()
+# Árboles por especie canónica con la marca de nativa, contados sobre los códigos de la
+# columna categórica (una sola vez por versión de los datos)
+@cacheada(st.cache_resource(max_entries=1))
+def obtener_conteo_especies(version):
+    if instantanea is not None:
+        return instantanea.tabla('conteo_especies')
+    return contar_especies(registro_arboles_df['especie'], cargar_registro_especies())
+
+# Cubo de indicadores por barrio (árboles por barrio, especie y estado de salud; espacios
+# verdes por barrio y clasificación) guardado en el almacén: los gráficos lo cortan en
+# lugar de agrupar las filas. Con seguimientos nuevos se actualiza solo lo que cambió.
+@cacheada(st.cache_resource(max_entries=1))
+def obtener_cubo_barrios(version):
+    if instantanea is not None:
+        return instantanea.cubo()
+    return cargar_cubo(mantenimiento_arboles_df=mantenimiento_arboles_df)
+
+# Base SQLite puesta al día con los CSV (solo con el backend activo): se copian las
+# tablas que cambiaron y, de MantenimientoArboles, solo las filas agregadas
+@cacheada(st.cache_resource(max_entries=1))
+def obtener_base(version):
+    actualizar_base()
+    return BaseDatos()
+
+# Agenda de mantenimientos (árboles ordenados por fecha del próximo mantenimiento, con su
+# puntaje de riesgo), armada sobre el último seguimiento de cada árbol
+@cacheada(st.cache_resource(max_entries=1))
+def obtener_agenda(version):
+    from agenda_mantenimiento import AgendaMantenimiento
+    if instantanea is not None:
+        return AgendaMantenimiento(obtener_estado_arboles(version))
+    if backend_activo():
+        return AgendaMantenimiento(obtener_base(version).ultimos_seguimientos())
+    return AgendaMantenimiento(obtener_estado_arboles(version))
+
+# Distancias de cada árbol al espacio verde y al punto verde más cercanos y cobertura de
+# cada barrio (porcentaje a menos de 300 m), guardadas en el almacén por versión
+@cacheada(st.cache_resource(max_entries=1))
+def obtener_cobertura(version):
+    from cobertura_verde import cargar_cobertura, cargar_distancias_arboles
+    if instantanea is not None:
+        return instantanea.tabla('distancias_verdes'), instantanea.tabla('cobertura_verde')
+    return cargar_distancias_arboles(), cargar_cobertura()
+
+# Con MAPAS_CON_TESELAS=1 los mapas de espacios verdes y de cobertura no llevan las
+# geometrías en el HTML: el navegador las pide como teselas vectoriales a un servidor local
+# que se arranca una sola vez (ver teselas_vectoriales.py y servidor_teselas.py)
+@st.cache_resource
+def obtener_servidor_teselas():
+    from servidor_teselas import iniciar_servidor
+    return iniciar_servidor(None)
+
+# MBTiles de la versión que se muestra (el de la instantánea o el del almacén), que pasa a
+# servir el servidor de teselas
+@cacheada(st.cache_resource(max_entries=1))
+def obtener_teselas(version):
+    from teselas_vectoriales import cargar_mbtiles
+    ruta = instantanea.ruta_teselas() if instantanea is not None else None
+    ruta = ruta or cargar_mbtiles()
+    servidor = obtener_servidor_teselas()
+    if servidor is not None:
+        servidor.ruta_mbtiles = ruta
+    return ruta
+
+# Caché LRU de mapas y gráficos ya serializados (HTML o JSON), compartida entre reruns y
+# sesiones: al volver a una vista o clasificación ya vista no se reconstruye nada
+@st.cache_resource
+def obtener_cache_figuras():
+    return CacheFiguras()
+
+cache_figuras = obtener_cache_figuras()
+cache_figuras.instantanea = instantanea
+
+# Versión de los datos que se muestran: la de la instantánea o la de los CSV
+def version_vista():
+    return instantanea.version if instantanea is not None else version_datos()
+
+# Mostrar un mapa ya serializado a HTML, con el mismo tamaño que usaba folium_static
+def mostrar_mapa(html, width=700, height=500):
+    import streamlit.components.v1 as components
+    with medir('mapa', 'envio') as medicion:
+        components.html(html, height=height + 10, width=width)
+        medicion['bytes'] = len(html.encode('utf-8'))
+
+# Mostrar un gráfico de plotly guardado como JSON
+def mostrar_figura(texto, **kwargs):
+    with medir('grafico', 'envio') as medicion:
+        st.plotly_chart(pio.from_json(texto), **kwargs)
+        medicion['bytes'] = len(texto.encode('utf-8'))
+
+# Mostrar una tabla (Streamlit la manda al navegador en formato Arrow)
+def mostrar_tabla(df, **kwargs):
+    import pyarrow as pa
+    with medir('tabla', 'envio') as medicion:
+        st.dataframe(df, **kwargs)
+        medicion['filas'] = len(df)
+        medicion['bytes'] = pa.Table.from_pandas(df, preserve_index=False).nbytes
+
+# Función para calcular el porcentaje de árboles en mal estado ('Malo' y 'Regular')
+def calcular_porcentaje_mal_estado():
+    return porcentaje_mal_estado(obtener_cubo_barrios(version_vista())['arboles'])
+
+# Mapa de puntos verdes y espacios verdes de una clasificación, guardado ya serializado
+@cache_figuras.memorizar
+def mapa_puntos_espacios(clasificacion, version):
+    import folium
+    from capa_marcadores import agregar_marcadores
 
-# Crear una función para mostrar los mapas de puntos verdes y espacios verdes
-def mostrar_mapa_puntos_espacios(espacios_verdes_filtrados):
+    espacios_verdes_filtrados = filtrar_espacios_verdes(clasificacion)
     centro_mapa = [-27.48, -58.83]
     mapa = folium.Map(location=centro_mapa, zoom_start=13)
 
+    # Añadir los puntos verdes en una sola capa agrupada (los popups se arman en el navegador)
+    agregar_marcadores(mapa, puntos_verdes_df.dropna(subset=['lat', 'lng']), "Punto verde: {ubicacion}", icono='leaf')
+
+    # Con teselas, los espacios verdes se dibujan desde las teselas vectoriales y la
+    # clasificación se filtra en el navegador
+    if teselas_activas():
+        from capa_teselas import CapaTeselas
+        CapaTeselas(
+            url_teselas(version), 'espacios_verdes', {'color': 'blue', 'fillOpacity': 0.3},
+            filtro=('clasificacion', clasificacion) if clasificacion and clasificacion != "TODOS" else None,
+            plantilla_popup="Espacio verde: {gid}"
+        ).add_to(mapa)
+        return mapa
+
+    # Polígonos de los espacios verdes, decodificados una sola vez por versión del archivo
+    poligonos_espacios, reporte_geojson = decodificar_espacios_verdes()
+
+    # Añadir los espacios verdes filtrados
+    for gid in espacios_verdes_filtrados['gid']:
+        anillos = poligonos_espacios.get(gid)
+        if anillos is None:
+            continue
+        folium.Polygon(
+            locations=anillos[0].tolist() if len(anillos) == 1 else [[anillo.tolist()] for anillo in anillos],
+            color='blue',
+            fill=True,
+            fill_opacity=0.3,
+            popup=f"Espacio verde: {gid}"
+        ).add_to(mapa)
+    return mapa
+
+# Crear una función para mostrar los mapas de puntos verdes y espacios verdes
+@instrumentar('vista')
+def mostrar_mapa_puntos_espacios(espacios_verdes_filtrados, clasificacion):
     # Calcular la cantidad de puntos verdes y espacios verdes
     cantidad_puntos_verdes = puntos_verdes_df.dropna(subset=['lat', 'lng']).shape[0]
     cantidad_espacios_verdes = espacios_verdes_filtrados.shape[0]
@@ -107,50 +286,27 @@ def mostrar_mapa_puntos_espacios(espacios_verdes_filtrados):
             </div>
         """, unsafe_allow_html=True)
 
-    # Añadir los puntos verdes
-    for _, fila in puntos_verdes_df.dropna(subset=['lat', 'lng']).iterrows():
-        folium.Marker(
-            location=[fila['lat'], fila['lng']],
-            popup=f"Punto verde: {fila['ubicacion']}",
-            icon=folium.Icon(color='green', icon='leaf')
-        ).add_to(mapa)
-
-    # Añadir los espacios verdes filtrados
-    for _, fila in espacios_verdes_filtrados.iterrows():
-        try:
-            geo_data = json.loads(fila['st_asgeojson'])
-            coords = geo_data['coordinates'][0]
-            folium.Polygon(
-                locations=[(coord[1], coord[0]) for coord in coords],
-                color='blue',
-                fill=True,
-                fill_opacity=0.3,
-                popup=f"Espacio verde: {fila.get('gid', 'Sin nombre')}"
-            ).add_to(mapa)
-        except Exception:
-            continue
-
-    # Mostrar el mapa
-    folium_static(mapa)
-
-# Crear un gráfico de estados de salud de los árboles
-def grafico_estado_salud():
-    st.write("""
-        Los árboles son esenciales para la salud de nuestra ciudad como la calidad del aire y así también para el bienestar de los ciudadanos.
-        En esta sección, se analiza el estado de salud de los árboles de la ciudad de Corrientes, 
-        ayudando a identificar áreas que requieren mayor mantenimiento para su conservación, asegurando que nuestros árboles 
-        sigan beneficiando a la comunidad y al medio ambiente.
-    """)
-    
-    arboles_mantenimiento_df = pd.merge(
-        registro_arboles_df,
-        mantenimiento_arboles_df,
-        on='id_arbol', 
-        how='left'
-    )
-    
+    # Reporte de los polígonos de espacios verdes (decodificados una sola vez por versión del archivo)
+    if instantanea is not None:
+        reporte_geojson = instantanea.reporte_geojson
+    else:
+        _, reporte_geojson = decodificar_espacios_verdes()
+
+    # Mostrar el mapa (se construye solo la primera vez para cada clasificación)
+    if teselas_activas():
+        obtener_teselas(version_vista())
+    mostrar_mapa(mapa_puntos_espacios(clasificacion, version_vista()))
+
+    # Informar los espacios verdes cuya geometría no se pudo leer
+    if reporte_geojson['fallidas']:
+        st.caption(f"Espacios verdes sin geometría válida: {reporte_geojson['fallidas']} "
+                   f"(gid: {', '.join(str(gid) for gid in reporte_geojson['ids_fallidos'])})")
+
+# Gráficos del estado de salud, guardados ya serializados por versión de los datos
+@cache_figuras.memorizar
+def figura_estado_salud(version):
     # Conteo del estado de salud
-    conteo_estado_salud = arboles_mantenimiento_df['estado_salud'].value_counts().reset_index()
+    conteo_estado_salud = arboles_por_estado(obtener_cubo_barrios(version)['arboles'])
     conteo_estado_salud.columns = ['Estado de Salud', 'Cantidad']
 
     # Crear el gráfico de barras interactivo con Plotly Express
@@ -188,20 +344,19 @@ def grafico_estado_salud():
     fig.update_traces(
         hovertemplate='<b>Estado de Salud:</b> %{x}<br><b>Cantidad de Árboles:</b> %{y}<extra></extra>'
     )
-    
-    # Mostrar el gráfico en Streamlit
-    st.plotly_chart(fig)
+    return fig
 
-    # Mostrar el porcentaje de árboles que requieren mantenimiento
-    porcentaje_arboles_malos = calcular_porcentaje_mal_estado()  # Asegúrate de que esta función esté definida
-    st.write(f"**Porcentaje de árboles que necesitan mantenimiento**: {porcentaje_arboles_malos:.2f}%")
+@cache_figuras.memorizar
+def figura_dona_mantenimiento(version):
+    arboles = obtener_cubo_barrios(version)['arboles']
+    totales = cortar(arboles)
 
     # Crear gráfico de dona para el porcentaje de árboles que requieren mantenimiento
     estado_mantenimiento = ['Malo', 'Regular', 'No Requiere Mantenimiento']
     cantidades = [
-        len(arboles_mantenimiento_df[arboles_mantenimiento_df['estado_salud'] == 'Malo']),
-        len(arboles_mantenimiento_df[arboles_mantenimiento_df['estado_salud'] == 'Regular']),
-        len(arboles_mantenimiento_df) - len(arboles_mantenimiento_df[arboles_mantenimiento_df['estado_salud'].isin(['Malo', 'Regular'])])
+        int(cortar(arboles, estado_salud='Malo')['cantidad_arboles']),
+        int(cortar(arboles, estado_salud='Regular')['cantidad_arboles']),
+        int(totales['cantidad_arboles'] - totales['arboles_requieren_mantenimiento'])
     ]
 
     fig_dona = px.pie(
@@ -239,26 +394,18 @@ def grafico_estado_salud():
             font=dict(color='#333', size=14)  # Color del texto y tamaño
         )
     )
-
-    # Mostrar la gráfica de dona justo debajo del texto
-    st.plotly_chart(fig_dona, use_container_width=True)
-
-    # Parte adicional: Gráfico de mantenimientos realizados por año
-    st.subheader("Mantenimientos realizados por año")
-
-    # Asegurarse de que la columna 'fecha_mantenimiento' esté en formato de fecha
-    mantenimiento_arboles_df['prox_fecha_mante'] = pd.to_datetime(mantenimiento_arboles_df['prox_fecha_mante'], errors='coerce')
-
-    # Extraer el año del mantenimiento
-    mantenimiento_arboles_df['año_mantenimiento'] = mantenimiento_arboles_df['prox_fecha_mante'].dt.year
-
-    # Filtrar años válidos
-    primer_año = mantenimiento_arboles_df['año_mantenimiento'].min()
-    ultimo_año = mantenimiento_arboles_df['año_mantenimiento'].max()
-    mantenimientos_por_año = mantenimiento_arboles_df[mantenimiento_arboles_df['año_mantenimiento'].between(primer_año, ultimo_año)]
-
-    # Contar el número de mantenimientos por año
-    mantenimientos_por_año = mantenimientos_por_año.groupby('año_mantenimiento').size().reset_index(name='cantidad_mantenimientos')
+    return fig_dona
+
+@cache_figuras.memorizar
+def figura_mantenimientos_por_año(version):
+    if instantanea is not None:
+        mantenimientos_por_año = instantanea.tabla('mantenimientos_por_año')
+    elif backend_activo():
+        # Con el backend SQLite el conteo lo hace la base sobre la tabla de seguimientos
+        mantenimientos_por_año = obtener_base(version).mantenimientos_por_año()
+    else:
+        # Todos los seguimientos cuentan; el año de prox_fecha_mante viene de la normalización
+        mantenimientos_por_año = contar_mantenimientos_por_año(mantenimiento_arboles_df)
 
     # Crear el gráfico de línea para mostrar los mantenimientos a través de los años
     fig_mantenimientos = px.line(
@@ -289,52 +436,109 @@ def grafico_estado_salud():
     fig_mantenimientos.update_traces(
         hovertemplate='<b>Año:</b> %{x}<br><b>Cantidad de Mantenimientos:</b> %{y}<extra></extra>'
     )
-    
-    # Mostrar el gráfico de mantenimientos en Streamlit
-    st.plotly_chart(fig_mantenimientos)
-
+    return fig_mantenimientos
 
-# Crear una función para mostrar el mapa de árboles mediante un mapa de calor, la cantidad total y especies
-# Mapa de calor de árboles
-def mostrar_mapa_calor_arboles():
-    centro_mapa = [-27.48, -58.83]
-    heatmap = folium.Map(location=centro_mapa, zoom_start=13)
+# Crear un gráfico de estados de salud de los árboles
+@instrumentar('vista')
+def grafico_estado_salud():
+    st.write("""
+        Los árboles son esenciales para la salud de nuestra ciudad como la calidad del aire y así también para el bienestar de los ciudadanos.
+        En esta sección, se analiza el estado de salud de los árboles de la ciudad de Corrientes, 
+        ayudando a identificar áreas que requieren mayor mantenimiento para su conservación, asegurando que nuestros árboles 
+        sigan beneficiando a la comunidad y al medio ambiente.
+    """)
     
-    # Datos para el HeatMap
-    heat_data = [[row['lat'], row['lng']] for index, row in registro_arboles_df.dropna(subset=['lat', 'lng']).iterrows()]
-    HeatMap(heat_data).add_to(heatmap)
+    # Mostrar el gráfico en Streamlit
+    mostrar_figura(figura_estado_salud(version_vista()))
 
-    # Mostrar el mapa
-    folium_static(heatmap)
+    # Mostrar el porcentaje de árboles que requieren mantenimiento
+    porcentaje_arboles_malos = calcular_porcentaje_mal_estado()  # Asegúrate de que esta función esté definida
+    st.write(f"**Porcentaje de árboles que necesitan mantenimiento**: {porcentaje_arboles_malos:.2f}%")
 
-    # Reemplazar valores nulos en la columna 'especie' con 'Especie desconocida'
-    registro_arboles_df['especie'] = registro_arboles_df['especie'].fillna('Especie desconocida').str.strip().str.lower()
+    # Mostrar la gráfica de dona justo debajo del texto
+    mostrar_figura(figura_dona_mantenimiento(version_vista()), use_container_width=True)
 
-    # Asegurar de que todas las variaciones de nombres similares estén unificadas
-    registro_arboles_df['especie'] = registro_arboles_df['especie'].replace({
-            'sin información': 'especie desconocida',  # Unificar variantes
-            'desconocido': 'especie desconocida',
-            'sin identificar': 'especie desconocida'
-    })
+    # Parte adicional: Gráfico de mantenimientos realizados por año
+    st.subheader("Mantenimientos realizados por año")
 
-    # Convertir a mayúsculas solo la primera letra de cada palabra (si es necesario para mantener estilo)
-    registro_arboles_df['especie'] = registro_arboles_df['especie'].str.title()
+    # Mostrar el gráfico de mantenimientos en Streamlit
+    mostrar_figura(figura_mantenimientos_por_año(version_vista()))
+
+# Rutas de las cuadrillas para los árboles elegidos: paquetes diarios de árboles vecinos,
+# cada uno saliendo del punto verde más cercano (por versión de los datos y parámetros)
+@cacheada(st.cache_data(max_entries=16))
+def obtener_rutas(version, arboles, paradas):
+    from rutas_cuadrillas import planificar_rutas
+    return planificar_rutas(arboles, puntos_verdes_df, paradas)
+
+# Agenda de mantenimientos: los árboles que vencen en los próximos días, de mayor a menor
+# riesgo, repartidos en rutas diarias para las cuadrillas que se pueden descargar
+@instrumentar('vista')
+def mostrar_agenda_mantenimiento():
+    from agenda_mantenimiento import ruta_csv
+    from rutas_cuadrillas import PARADAS_POR_PAQUETE, resumen_rutas
 
-    # Calcular la cantidad total de árboles
-    cantidad_arboles = registro_arboles_df.dropna(subset=['lat', 'lng']).shape[0]
+    st.write("""
+        Listado de los árboles cuyo próximo mantenimiento vence en los próximos días, ordenados por riesgo
+        según su estado de salud, el riesgo de caída o parasitado, la inclinación y el ahuecamiento.
+        Los árboles se reparten en recorridos diarios para las cuadrillas, que se pueden descargar.
+    """)
 
-    # Calcular la cantidad de especies de árboles y sus nombres
-    especies_conteo = registro_arboles_df['especie'].value_counts()
-    cantidad_especies = especies_conteo.shape[0]
+    dias = st.sidebar.slider("Días hacia adelante:", min_value=1, max_value=365, value=30)
+    atrasados = st.sidebar.checkbox("Incluir mantenimientos atrasados", value=True)
+    cantidad = st.sidebar.number_input("Cantidad de árboles:", min_value=1, max_value=5000, value=50)
+    paradas = st.sidebar.number_input("Árboles por día de cuadrilla:", min_value=1, max_value=500,
+                                      value=PARADAS_POR_PAQUETE)
+
+    agenda = obtener_agenda(version_vista())
+    desde, hasta = agenda.ventana(dias, atrasados=atrasados)
+    atrasados_total, proximos = agenda.pendientes(dias)
+    prioridades = agenda.prioridades(int(cantidad), desde, hasta)
+
+    st.write(f"**Árboles con mantenimiento pendiente en los próximos {dias} días**: {proximos}")
+    st.write(f"**Árboles con mantenimiento atrasado**: {atrasados_total}")
+    mostrar_tabla(prioridades, hide_index=True)
+
+    # Recorridos diarios: cada paquete sale del punto verde más cercano
+    st.subheader("Rutas de las cuadrillas")
+    rutas = obtener_rutas(version_vista(), prioridades, int(paradas))
+    mostrar_tabla(resumen_rutas(rutas), hide_index=True)
+    st.download_button(
+        "Descargar rutas de las cuadrillas (CSV)", ruta_csv(rutas),
+        file_name=f"rutas_mantenimiento_{dias}_dias.csv", mime='text/csv'
+    )
 
-    # Mostrar la cantidad total de árboles
-    st.write(f"**Cantidad total de árboles**: {cantidad_arboles}")
 
-    # Mostrar la cantidad total de especies de árboles
-    st.write(f"**Cantidad total de especies de árboles**: {cantidad_especies}")
+# Crear una función para mostrar el mapa de árboles mediante un mapa de calor, la cantidad total y especies
+# Mapa de calor de árboles
+# Grilla de densidad de árboles para el zoom del mapa, calculada una vez por versión de los datos
+@cacheada(st.cache_data)
+def obtener_grillas_calor(version):
+    from mapa_calor import precalcular_grillas
+    arboles = registro_arboles_df.dropna(subset=['lat', 'lng'])
+    return precalcular_grillas(arboles['lat'].to_numpy(), arboles['lng'].to_numpy())
+
+# Mapa de calor de árboles, guardado ya serializado por versión de los datos
+@cache_figuras.memorizar
+def mapa_calor_arboles(version):
+    import folium
+    from mapa_calor import agregar_mapa_calor
 
+    centro_mapa = [-27.48, -58.83]
+    heatmap = folium.Map(location=centro_mapa, zoom_start=13)
+    
+    # Datos para el HeatMap: puntos ponderados por celda de la grilla de densidad,
+    # así el tamaño de la página no crece con la cantidad de árboles
+    arboles = registro_arboles_df.dropna(subset=['lat', 'lng'])
+    agregar_mapa_calor(heatmap, arboles['lat'], arboles['lng'], modo='ponderado', zoom=13,
+                       grillas=obtener_grillas_calor(version))
+    return heatmap
+
+# Gráfico de cantidad de árboles por especie (con los nombres de especie ya unificados)
+@cache_figuras.memorizar
+def figura_especies(version):
     # Mostrar un gráfico de líneas de la cantidad de árboles por especie
-    conteo_especies = especies_conteo.reset_index()
+    conteo_especies = obtener_conteo_especies(version)[['especie', 'cantidad']]
     conteo_especies.columns = ['Especie', 'Cantidad']
 
     # Crear el gráfico de barras horizontales para especies de arboles
@@ -383,37 +587,11 @@ def mostrar_mapa_calor_arboles():
 )
 
     fig.update_yaxes(tickfont=dict(size=9))  # Ajustar el tamaño de fuente de las etiquetas
+    return fig
 
-    # Mostrar el gráfico 
-    st.plotly_chart(fig)
-
-    # Se defineuna lista de especies nativas de Corrientes a traves de fuentes externas consultadas
-    especies_nativas_corrientes = ['Jacarandá', 'Lapacho Rosado', 'Lapacho amarillo', 'Lapacho', 'Ingá', 'Ceibo', 'Ombú', 'Sauce', 'Urunday',
-    'Pata de Buey (Nativa)', 'Ñangapirí','Palo Borracho', 'Guayaba', 'Mango', 'Sauce criollo', 'Albizia', 'Mamon','Ambaí','Lapachillo','Curupí',
-    'Tipa Blanca', 'Tecoma Lapachillo','Timbó Colorado','Timbó Blanco', 'Ibirá Pitá']
-
-   # Convertir la lista de especies nativas a minúsculas para la comparación
-    especies_nativas_corrientes = [especie.lower().strip() for especie in especies_nativas_corrientes]
-
-    # Filtrar las especies presentes en el dataset
-    especies_presentes = registro_arboles_df['especie'].unique()
-
-    # Normalizar las especies presentes también
-    especies_presentes = [especie.lower().strip() for especie in especies_presentes]
-
-    # Comparar las especies nativas presentes en el dataset (normalizadas)
-    especies_nativas_presentes = [especie for especie in especies_presentes if especie in especies_nativas_corrientes]
-
-    # Calcular la cantidad de especies totales y especies nativas
-    cantidad_total_especies = len(especies_presentes)
-    cantidad_especies_nativas = len(especies_nativas_presentes)
-
-    # Calcular el porcentaje de especies nativas sobre el total de especies
-    porcentaje_especies_nativas = (cantidad_especies_nativas / cantidad_total_especies) * 100
-
-    # Mostrar la cantidad y el porcentaje de especies nativas
-    st.write(f"**Cantidad de especies nativas**: {cantidad_especies_nativas}")
-
+# Gráfico de dona del porcentaje de especies nativas
+@cache_figuras.memorizar
+def figura_dona_nativas(porcentaje_especies_nativas):
     # Calcular el porcentaje de especies no nativas
     porcentaje_no_nativas = 100 - porcentaje_especies_nativas
 
@@ -452,6 +630,40 @@ def mostrar_mapa_calor_arboles():
          bordercolor='rgba(76, 175, 80, 1)',  # Borde verde
          font=dict(color='#333', size=14)  # Color del texto y tamaño
     ))
+    return fig_dona_porcentaje
+
+@instrumentar('vista')
+def mostrar_mapa_calor_arboles():
+    # Mostrar el mapa
+    mostrar_mapa(mapa_calor_arboles(version_vista()))
+
+    # Los nombres de especie ya vienen unificados desde la carga (ver especies.py)
+
+    # Calcular la cantidad total de árboles
+    cantidad_arboles = registro_arboles_df.dropna(subset=['lat', 'lng']).shape[0]
+
+    # Calcular la cantidad de especies de árboles y cuántas son nativas
+    conteo_especies = obtener_conteo_especies(version_vista())
+    cantidad_especies = len(conteo_especies)
+    cantidad_especies_nativas = int(conteo_especies['nativa'].sum())
+
+    # Mostrar la cantidad total de árboles
+    st.write(f"**Cantidad total de árboles**: {cantidad_arboles}")
+
+    # Mostrar la cantidad total de especies de árboles
+    st.write(f"**Cantidad total de especies de árboles**: {cantidad_especies}")
+
+    # Mostrar el gráfico 
+    mostrar_figura(figura_especies(version_vista()))
+
+    # Las especies nativas de Corrientes (fuentes externas consultadas, ver
+    # ESPECIES_NATIVAS_CORRIENTES en especies.py) vienen marcadas en el registro de especies
+
+    # Calcular el porcentaje de especies nativas sobre el total de especies
+    porcentaje_especies_nativas = (cantidad_especies_nativas / cantidad_especies) * 100
+
+    # Mostrar la cantidad y el porcentaje de especies nativas
+    st.write(f"**Cantidad de especies nativas**: {cantidad_especies_nativas}")
 
     # Crear columnas para alinear texto y gráfico de dona
     col1, col2 = st.columns([0.5, 1.2])  # Ajustar el tamaño de las columnas
@@ -460,25 +672,17 @@ def mostrar_mapa_calor_arboles():
     st.write(f"**Porcentaje de especies nativas**: ")
 
     # Mostrar la gráfica de dona justo debajo del texto
-    st.plotly_chart(fig_dona_porcentaje, use_container_width=True)
+    mostrar_figura(figura_dona_nativas(porcentaje_especies_nativas), use_container_width=True)
     # Texto con enlace usando markdown
     st.write(f"**Fuente de árboles nativos de Argentina**: (https://www.argentina.gob.ar/interior/ambiente/parquesnacionales/recursos-didacticos/arboles-nativos)")
     st.write(f"**Fuente de árboles nativos de Corrientes**: (https://www.corrientes.com.ar/flora-fauna.php)")
     st.write(f"**Fuente de árboles nativos de Corrientes**: (https://www.facebook.com/permalink.php/?story_fbid=760536454553050&id=261603547779679&locale=es_LA)")
 
-# Función para mostrar un gráfico de torta con el porcentaje de espacios verdes por barrio
-def mostrar_grafico_espacios_barrios():
-    # Contar el número de espacios verdes por barrio
-    espacios_verdes_por_barrio = espacios_verdes_df.groupby('id_barrios').size().reset_index(name='cantidad_espacios_verdes')
-
-    # Combinar los datos de barrios y espacios verdes
-    barrios_con_datos = barrios_df.merge(espacios_verdes_por_barrio, left_on='id_barrios', right_on='id_barrios', how='left').fillna(0)
-
-    # Calcular el total de espacios verdes
-    total_espacios_verdes = barrios_con_datos['cantidad_espacios_verdes'].sum()
-
-    # Calcular el porcentaje de espacios verdes por barrio
-    barrios_con_datos['porcentaje_espacios_verdes'] = (barrios_con_datos['cantidad_espacios_verdes'] / total_espacios_verdes) * 100
+# Gráfico de torta del porcentaje de espacios verdes por barrio
+@cache_figuras.memorizar
+def figura_espacios_por_barrio(version):
+    # Número y porcentaje de espacios verdes por barrio, del resumen por barrio del cubo
+    barrios_con_datos = espacios_por_barrio(obtener_cubo_barrios(version)['barrios'])
 
     # Defino la combinación de colores fuera de la función de la gráfica
     set3_color = px.colors.qualitative.Set3
@@ -518,15 +722,51 @@ def mostrar_grafico_espacios_barrios():
             font=dict(color='#333')  # Texto en color gris oscuro
         )
     )
+    return fig
+
+# Gráfico de cantidad de árboles por barrio
+@cache_figuras.memorizar
+def figura_arboles_por_barrio(version):
+    # Cantidad de árboles por barrio (asignados con el índice espacial de barrios), del cubo
+    arboles_por_barrio = obtener_cubo_barrios(version)['barrios']
+    arboles_por_barrio = arboles_por_barrio[arboles_por_barrio['cantidad_arboles'] > 0].sort_values('cantidad_arboles')
+
+    fig_arboles = px.bar(
+        arboles_por_barrio,
+        x='cantidad_arboles',
+        y='nombre_barrio',
+        orientation='h',
+        title='Cantidad de Árboles por Barrio',
+        labels={'cantidad_arboles': 'Cantidad de Árboles', 'nombre_barrio': 'Barrio'},
+        color_discrete_sequence=[px.colors.qualitative.Plotly[2]],
+    )
+
+    fig_arboles.update_layout(
+        plot_bgcolor='rgba(255, 255, 255, 0.9)',  # Fondo de la gráfica
+        paper_bgcolor='rgba(255, 255, 255, 0.9)',  # Fondo del papel (área exterior)
+        height=max(400, 22 * len(arboles_por_barrio)),  # Alto según la cantidad de barrios
+        yaxis=dict(tickmode='linear', dtick=1, automargin=True),
+    )
+
+    fig_arboles.update_traces(
+        hovertemplate='<b>Barrio:</b> %{y}<br><b>Cantidad de Árboles:</b> %{x}<extra></extra>'
+    )
+    return fig_arboles
 
+# Función para mostrar un gráfico de torta con el porcentaje de espacios verdes por barrio
+@instrumentar('vista')
+def mostrar_grafico_espacios_barrios():
     # Calcular la cantidad de barrios
-    cantidad_barrios = len(barrios_con_datos)
+    cantidad_barrios = len(barrios_df)
 
     # Mostrar el texto de la cantidad de barrios en Streamlit
     st.markdown(f"**Cantidad de barrios:** {cantidad_barrios}")
 
     # Mostrar el gráfico en Streamlit
-    st.plotly_chart(fig)
+    mostrar_figura(figura_espacios_por_barrio(version_vista()))
+
+    # Cantidad de árboles por barrio
+    mostrar_figura(figura_arboles_por_barrio(version_vista()))
 
     st.markdown("""
 ## Conclusiones y Recomendaciones:
@@ -544,59 +784,136 @@ def filtrar_espacios_verdes(clasificacion):
         return espacios_verdes_df[espacios_verdes_df['clasificacion'] == clasificacion]
     return espacios_verdes_df
 
-# Nueva función para mostrar la gráfica de espacios verdes como gráfica de torta
-def mostrar_grafica_espacios_verdes(espacios_verdes_filtrados):
-    if clasificacion_espacio == "TODOS":
-        conteo_por_clasificacion = espacios_verdes_filtrados['clasificacion'].value_counts().reset_index()
-        conteo_por_clasificacion.columns = ['Clasificación', 'Cantidad']
-
-         # Crear gráfica de barras verticales interactiva
-        fig = px.bar(
-            conteo_por_clasificacion,
-            x='Clasificación',
-            y='Cantidad',
-            title='Cantidad de Espacios Verdes por Clasificación',
-            color='Clasificación',  # Color por clasificación
-            color_discrete_sequence=[
-                px.colors.qualitative.Pastel[3],  
-                px.colors.qualitative.Pastel[4], 
-                px.colors.qualitative.Pastel[5],    
-                px.colors.qualitative.Pastel[1],  
-                px.colors.qualitative.Pastel[7],       
-                px.colors.qualitative.Pastel[8],       
-                px.colors.qualitative.Pastel[9],
-            ]
-        )
+# Gráfico de cantidad de espacios verdes por clasificación
+@cache_figuras.memorizar
+def figura_espacios_por_clasificacion(clasificacion, version):
+    espacios = obtener_cubo_barrios(version)['espacios']
+    filtros = {'clasificacion': clasificacion} if clasificacion and clasificacion != "TODOS" else {}
+    conteo_por_clasificacion = cortar(espacios, ['clasificacion'], **filtros)['cantidad_espacios_verdes']
+    conteo_por_clasificacion = conteo_por_clasificacion.sort_values(ascending=False, kind='stable').reset_index()
+    conteo_por_clasificacion.columns = ['Clasificación', 'Cantidad']
 
-       # Personalizar el layout para la gráfica de barras
-        fig.update_layout(
-            plot_bgcolor='rgba(255, 255, 255, 0.9)',  # Fondo de la gráfica
-            paper_bgcolor='rgba(255, 255, 255, 0.9)',  # Fondo del papel (área exterior)
-            height=600,  # Ajustar la altura de la gráfica
-            width=700,   # Ajustar el ancho de la gráfica
-            showlegend=False,  # Ocultar leyenda para barras
-            margin=dict(l=40, r=40, t=40, b=80),  # Ajustar márgenes
-        )
+     # Crear gráfica de barras verticales interactiva
+    fig = px.bar(
+        conteo_por_clasificacion,
+        x='Clasificación',
+        y='Cantidad',
+        title='Cantidad de Espacios Verdes por Clasificación',
+        color='Clasificación',  # Color por clasificación
+        color_discrete_sequence=[
+            px.colors.qualitative.Pastel[3],  
+            px.colors.qualitative.Pastel[4], 
+            px.colors.qualitative.Pastel[5],    
+            px.colors.qualitative.Pastel[1],  
+            px.colors.qualitative.Pastel[7],       
+            px.colors.qualitative.Pastel[8],       
+            px.colors.qualitative.Pastel[9],
+        ]
+    )
 
-        # Personalizar los trazos y las etiquetas de hover
-        fig.update_traces(
-            hovertemplate='<b>Clasificación:</b> %{x}<br><b>Cantidad:</b> %{y}<extra></extra>',  # Extra elimina el color al lado del hover
-            hoverlabel=dict(
-                bgcolor='white',  # Fondo blanco
-                bordercolor='green',  # Borde verde
-                font=dict(size=14, color='black'),  # Tamaño y color del texto
-            ),
-        )
+   # Personalizar el layout para la gráfica de barras
+    fig.update_layout(
+        plot_bgcolor='rgba(255, 255, 255, 0.9)',  # Fondo de la gráfica
+        paper_bgcolor='rgba(255, 255, 255, 0.9)',  # Fondo del papel (área exterior)
+        height=600,  # Ajustar la altura de la gráfica
+        width=700,   # Ajustar el ancho de la gráfica
+        showlegend=False,  # Ocultar leyenda para barras
+        margin=dict(l=40, r=40, t=40, b=80),  # Ajustar márgenes
+    )
 
+    # Personalizar los trazos y las etiquetas de hover
+    fig.update_traces(
+        hovertemplate='<b>Clasificación:</b> %{x}<br><b>Cantidad:</b> %{y}<extra></extra>',  # Extra elimina el color al lado del hover
+        hoverlabel=dict(
+            bgcolor='white',  # Fondo blanco
+            bordercolor='green',  # Borde verde
+            font=dict(size=14, color='black'),  # Tamaño y color del texto
+        ),
+    )
+    return fig
 
+# Nueva función para mostrar la gráfica de espacios verdes como gráfica de torta
+@instrumentar('vista')
+def mostrar_grafica_espacios_verdes(espacios_verdes_filtrados):
+    if clasificacion_espacio == "TODOS":
         # Mostrar gráfica de barras en Streamlit
-        st.plotly_chart(fig)
+        mostrar_figura(figura_espacios_por_clasificacion(clasificacion_espacio, version_vista()))
+
+# Mapa coroplético de la cobertura de espacios verdes y puntos verdes por barrio
+@cache_figuras.memorizar
+def mapa_cobertura_barrios(version):
+    from cobertura_verde import RADIO_COBERTURA_M
+    from coropletico import crear_mapa_coropletico
+
+    cobertura = obtener_cobertura(version)[1].copy()
+    capas = [
+        ('porcentaje_cubierto_espacios', 'YlGn_09', f'% del barrio a menos de {RADIO_COBERTURA_M} m de un espacio verde'),
+        ('porcentaje_cubierto_puntos', 'BuPu_09', f'% del barrio a menos de {RADIO_COBERTURA_M} m de un punto verde'),
+    ]
+    # Las capas se colorean con porcentajes enteros
+    for columna, _, _ in capas:
+        cobertura[columna] = cobertura[columna].round()
+    return crear_mapa_coropletico(cobertura, capas, url_teselas=url_teselas(version) if teselas_activas() else None)
+
+# Vista de cobertura: qué tan cerca de un espacio verde o de un punto verde están los
+# árboles y los barrios
+@instrumentar('vista')
+def mostrar_cobertura_verde():
+    from cobertura_verde import RADIO_COBERTURA_M
+
+    distancias, cobertura = obtener_cobertura(version_vista())
+    distancia_espacio = distancias['distancia_espacio_verde_m'].dropna()
+    distancia_punto = distancias['distancia_punto_verde_m'].dropna()
+    if not distancia_espacio.empty:
+        cubiertos = (distancia_espacio <= RADIO_COBERTURA_M).mean() * 100
+        st.write(f"**Árboles a menos de {RADIO_COBERTURA_M} m de un espacio verde**: {cubiertos:.2f}%")
+        st.write(f"**Distancia mediana de un árbol al espacio verde más cercano**: {distancia_espacio.median():.0f} m")
+    if not distancia_punto.empty:
+        st.write(f"**Distancia mediana de un árbol al punto verde más cercano**: {distancia_punto.median():.0f} m")
+
+    if teselas_activas():
+        obtener_teselas(version_vista())
+    mostrar_mapa(mapa_cobertura_barrios(version_vista()))
+
+    # Barrios con menos superficie cubierta por espacios verdes
+    st.markdown("**Barrios con menor cobertura de espacios verdes**")
+    menor_cobertura = cobertura.sort_values(['porcentaje_cubierto_espacios', 'porcentaje_cubierto_puntos'], kind='stable')
+    mostrar_tabla(
+        menor_cobertura[['nombre_barrio', 'porcentaje_cubierto_espacios', 'porcentaje_cubierto_puntos',
+                         'cantidad_arboles', 'porcentaje_arboles_cubiertos']].head(15).round(1).rename(columns={
+            'nombre_barrio': 'Barrio',
+            'porcentaje_cubierto_espacios': '% cubierto (espacios verdes)',
+            'porcentaje_cubierto_puntos': '% cubierto (puntos verdes)',
+            'cantidad_arboles': 'Árboles',
+            'porcentaje_arboles_cubiertos': '% de árboles cubiertos',
+        }),
+        hide_index=True,
+    )
+
+# Panel de depuración: las mediciones del rerun que acaba de terminar y el estado de la
+# caché de figuras
+def mostrar_panel_instrumentacion(rerun):
+    registro = rerun.registro()
+    figuras = cache_figuras.estadisticas()
+    with st.sidebar.expander("Instrumentación del rerun", expanded=True):
+        st.write(f"**Rerun**: {registro['segundos']:.3f} s")
+        st.write(f"**Enviado al navegador**: {registro['bytes_enviados'] / 1024:.1f} KB")
+        st.write(f"**Cachés**: {registro['aciertos']} aciertos, {registro['fallos']} fallos")
+        mediciones = pd.DataFrame(registro['mediciones'],
+                                  columns=['tipo', 'nombre', 'nivel', 'segundos', 'filas', 'bytes', 'cache'])
+        # Las mediciones anidadas se muestran con sangría debajo de la que las contiene
+        mediciones['nombre'] = ['\u2003' * nivel + nombre for nivel, nombre in zip(mediciones['nivel'], mediciones['nombre'])]
+        st.dataframe(mediciones.drop(columns='nivel').astype({'filas': 'Int64', 'bytes': 'Int64'}), hide_index=True)
+        st.caption(f"Caché de figuras: {figuras['entradas']}/{figuras['maximo']} entradas, "
+                   f"{figuras['tasa_aciertos']:.0%} de aciertos, {figuras['bytes'] / 1024 / 1024:.1f} MB")
 
 # Sidebar para navegación
 st.sidebar.title("Opciones de visualización")
 opcion = st.sidebar.selectbox(
     "Selecciona una visualización:",
-    ["Puntos y Espacios Verdes", "Árboles y Especies", "Estado de Salud de Árboles", "Espacios Verdes en Barrios"]
+    ["Puntos y Espacios Verdes", "Árboles y Especies", "Estado de Salud de Árboles", "Espacios Verdes en Barrios",
+     "Agenda de Mantenimiento", "Cobertura de Espacios Verdes"],
+    key='vista'
 )
 
 # Mostrar las visualizaciones según la opción seleccionada
@@ -616,7 +933,7 @@ if opcion == "Puntos y Espacios Verdes":
     # Filtrar los espacios verdes según la clasificación seleccionada
     espacios_verdes_filtrados = filtrar_espacios_verdes(clasificacion_espacio)
     # Mostrar el mapa de puntos y espacios verdes filtrados
-    mostrar_mapa_puntos_espacios(espacios_verdes_filtrados)
+    mostrar_mapa_puntos_espacios(espacios_verdes_filtrados, clasificacion_espacio)
     # Mostrar la gráfica de espacios verdes según clasificación
     mostrar_grafica_espacios_verdes(espacios_verdes_filtrados)
 
@@ -635,6 +952,12 @@ elif opcion == "Estado de Salud de Árboles":
 elif opcion == "Espacios Verdes en Barrios":
     st.subheader("Gráfico de Espacios Verdes en los Barrios de la Ciudad")
     mostrar_grafico_espacios_barrios()
+elif opcion == "Agenda de Mantenimiento":
+    st.subheader("Agenda de Mantenimiento de Árboles")
+    mostrar_agenda_mantenimiento()
+elif opcion == "Cobertura de Espacios Verdes":
+    st.subheader("Cobertura de Espacios Verdes y Puntos Verdes")
+    mostrar_cobertura_verde()
 
 # Footer
 st.markdown("""
@@ -646,3 +969,13 @@ st.markdown("""
         <p>© 2024 Desarrollado por Leguiza Agustina</p>
     </div>
 """, unsafe_allow_html=True)
+
+# Cerrar la medición del rerun (se escribe en el registro estructurado) y, con el modo
+# de depuración activado, mostrar el panel de instrumentación
+terminar_rerun(rerun, opcion)
+if st.sidebar.toggle("Modo depuración", key='depuracion'):
+    mostrar_panel_instrumentacion(rerun)
+
+# Modo de verificación: falla si alguna vista modificó las tablas compartidas
+if verificacion_mutaciones_activa():
+    verificar_sin_mutaciones(tablas, huellas)
@@ -0,0 +1,94 @@
+import os
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from almacen_datos import (DIRECTORIO_ALMACEN, DIRECTORIO_DATOS, borrar_anteriores, cargar_tabla,
+                           cargar_tabla_derivada, guardar_tabla_derivada, version_datos)
+
+PREFIJO_ASIGNACIONES = 'arboles_barrios_'
+
+# Índices construidos en este proceso, por directorio y versión de Barrios.csv
+_indices = {}
+
+
+# Construir el índice espacial (STRtree) sobre los polígonos de los barrios, ya
+# reproyectados a WGS84 en el almacén
+def construir_indice(barrios_df):
+    geometrias = shapely.from_wkb(barrios_df['the_geom_barrios_wkb'].to_numpy(dtype=object))
+    validas = ~shapely.is_missing(geometrias)
+    return {
+        'arbol': shapely.STRtree(geometrias[validas]),
+        'ids': barrios_df['id_barrios'].to_numpy()[validas],
+    }
+
+
+# Índice de barrios de la versión actual de los datos (se construye una vez por proceso)
+def indice_barrios(directorio_datos=DIRECTORIO_DATOS, directorio_almacen=DIRECTORIO_ALMACEN):
+    version = version_datos(directorio_datos, tablas=['barrios'])
+    clave = (os.path.abspath(directorio_datos), version)
+    if clave not in _indices:
+        barrios = cargar_tabla('barrios', ['id_barrios', 'the_geom_barrios_wkb'], directorio_datos, directorio_almacen)
+        _indices.clear()
+        _indices[clave] = construir_indice(barrios)
+    return _indices[clave], version
+
+
+# Asignar en bloque el barrio de cada punto (lat, lng en WGS84). Devuelve un arreglo
+# con el id_barrios de cada punto, o NA si el punto no cae en ningún barrio.
+def asignar_barrio(lat, lng, indice=None):
+    if indice is None:
+        indice, _ = indice_barrios()
+    lat = np.asarray(lat, dtype='float64')
+    lng = np.asarray(lng, dtype='float64')
+
+    puntos = shapely.points(lng, lat)
+    indices_puntos, indices_barrios = indice['arbol'].query(puntos, predicate='within')
+
+    # Si un punto cae en más de un polígono (bordes superpuestos) se toma el primero
+    primeros = np.unique(indices_puntos, return_index=True)[1]
+    resultado = pd.array([pd.NA] * len(lat), dtype='Int64')
+    resultado[indices_puntos[primeros]] = indice['ids'][indices_barrios[primeros]]
+    return resultado
+
+
+# Asignar un barrio a cada árbol reutilizando las asignaciones guardadas en disco:
+# solo se calculan los árboles nuevos o con coordenadas distintas. Si cambian los
+# barrios se descarta todo lo guardado. Devuelve id_arbol, lat, lng, id_barrios.
+def asignar_arboles(registro_arboles_df, directorio_datos=DIRECTORIO_DATOS, directorio_almacen=DIRECTORIO_ALMACEN):
+    indice, version = indice_barrios(directorio_datos, directorio_almacen)
+    nombre = PREFIJO_ASIGNACIONES + version
+
+    arboles = registro_arboles_df[['id_arbol', 'lat', 'lng']].dropna(subset=['lat', 'lng'])
+    arboles = arboles.drop_duplicates(subset='id_arbol', keep='first')
+
+    guardadas = cargar_tabla_derivada(nombre, directorio_almacen)
+    if guardadas is None:
+        guardadas = pd.DataFrame({'id_arbol': pd.Series(dtype='int64'), 'lat': pd.Series(dtype='float64'),
+                                  'lng': pd.Series(dtype='float64'), 'id_barrios': pd.Series(dtype='Int64')})
+
+    # Árboles que ya tienen barrio con las mismas coordenadas
+    previas = arboles.merge(guardadas, on=['id_arbol', 'lat', 'lng'], how='left', indicator=True)
+    pendientes = previas['_merge'] == 'left_only'
+    if not pendientes.any():
+        return previas.drop(columns='_merge')
+
+    previas.loc[pendientes, 'id_barrios'] = asignar_barrio(
+        previas.loc[pendientes, 'lat'], previas.loc[pendientes, 'lng'], indice
+    )
+    asignaciones = previas.drop(columns='_merge')
+    asignaciones['id_barrios'] = asignaciones['id_barrios'].astype('Int64')
+
+    # Conservar también las asignaciones guardadas de árboles que no vinieron en este lote
+    asignaciones_guardar = pd.concat(
+        [guardadas[~guardadas['id_arbol'].isin(asignaciones['id_arbol'])], asignaciones], ignore_index=True
+    )
+    guardar_tabla_derivada(nombre, asignaciones_guardar, directorio_almacen)
+    borrar_anteriores(PREFIJO_ASIGNACIONES, nombre, directorio_almacen)
+    return asignaciones
+
+
+# Cantidad de árboles por barrio
+def contar_arboles_por_barrio(asignaciones):
+    return asignaciones.dropna(subset=['id_barrios']).groupby('id_barrios').size().rename('cantidad_arboles')
@@ -0,0 +1,253 @@
+import os
+import sqlite3
+import threading
+from contextlib import closing
+
+import pandas as pd
+
+from almacen_datos import (DIRECTORIO_ALMACEN, DIRECTORIO_DATOS, TABLAS, actualizar_incremental, cargar_tabla,
+                           leer_tramos, version_datos)
+from estado_arboles import ESTADOS_REQUIEREN_MANTENIMIENTO
+from normalizacion import normalizar_tabla
+
+# Backend opcional: con BACKEND_DATOS=sqlite la app no carga los seguimientos en memoria
+# y las consultas sobre ellos van a una base SQLite local (con las mismas cinco tablas de
+# los CSV, ya normalizadas, más índices, un R-tree de árboles y el último seguimiento de
+# cada árbol). SQLite viene con Python, así que no hace falta instalar nada.
+VARIABLE_BACKEND = 'BACKEND_DATOS'
+BACKEND_SQLITE = 'sqlite'
+
+RUTA_BASE = os.path.join(DIRECTORIO_ALMACEN, 'corrientes_verde.sqlite')
+
+# Versión del esquema de la base: al cambiar las tablas derivadas se arma de nuevo
+VERSION_ESQUEMA = 2
+
+# Columnas del último seguimiento de cada árbol que se guardan en ultimo_seguimiento
+COLUMNAS_ULTIMO = ['id_seguimiento', 'fecha_hora', 'estado_salud', 'prox_fecha_mante', 'riesgo', 'inclinacion',
+                   'ahuecamiento']
+
+# Filas por lote al copiar las tablas del almacén a la base
+FILAS_POR_LOTE = 50_000
+
+INDICES = {
+    'registro_arboles': [['id_arbol'], ['id_barrios'], ['especie']],
+    'mantenimiento_arboles': [['id_arbol'], ['estado_salud'], ['prox_fecha_mante']],
+    'espacios_verdes': [['id_barrios'], ['clasificacion']],
+    'barrios': [['id_barrios']],
+    'ultimo_seguimiento': [['estado_salud'], ['prox_fecha_mante']],
+}
+
+ESQUEMA = '''
+CREATE TABLE IF NOT EXISTS versiones (
+    tabla TEXT PRIMARY KEY, version TEXT, generacion TEXT, filas INTEGER
+);
+CREATE TABLE IF NOT EXISTS ultimo_seguimiento (
+    id_arbol INTEGER PRIMARY KEY, id_seguimiento INTEGER, fecha_hora TIMESTAMP,
+    estado_salud TEXT, prox_fecha_mante TIMESTAMP, riesgo TEXT, inclinacion TEXT, ahuecamiento TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS arboles_rtree USING rtree(id, lat_min, lat_max, lng_min, lng_max);
+'''
+
+# Último seguimiento de cada árbol con la misma política que estado_arboles.py (por
+# fecha_hora con las fechas vacías primero y, a igual fecha, por id_seguimiento): las filas
+# nuevas se recorren en ese orden y cada una reemplaza a la guardada si no va antes
+ACTUALIZAR_ULTIMO = f'''
+INSERT INTO ultimo_seguimiento (id_arbol, {', '.join(COLUMNAS_ULTIMO)})
+SELECT id_arbol, {', '.join(COLUMNAS_ULTIMO)} FROM mantenimiento_arboles
+WHERE rowid > ? AND id_arbol IS NOT NULL
+ORDER BY fecha_hora NULLS FIRST, id_seguimiento
+ON CONFLICT (id_arbol) DO UPDATE SET
+    {', '.join(f'{columna} = excluded.{columna}' for columna in COLUMNAS_ULTIMO)}
+WHERE (excluded.fecha_hora IS NOT NULL AND (fecha_hora IS NULL OR excluded.fecha_hora > fecha_hora
+       OR (excluded.fecha_hora = fecha_hora AND excluded.id_seguimiento > id_seguimiento)))
+   OR (excluded.fecha_hora IS NULL AND fecha_hora IS NULL AND excluded.id_seguimiento > id_seguimiento)
+'''
+
+_lock_base = threading.Lock()
+
+
+def backend_activo():
+    return os.environ.get(VARIABLE_BACKEND, '').lower() == BACKEND_SQLITE
+
+
+def conectar(ruta=RUTA_BASE, solo_lectura=False):
+    if solo_lectura:
+        return sqlite3.connect(f'file:{ruta}?mode=ro', uri=True, check_same_thread=False)
+    os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+    return sqlite3.connect(ruta, check_same_thread=False)
+
+
+# Lotes de una tabla del almacén, ya normalizados. De las tablas incrementales se leen
+# por tramos y solo desde la fila `desde`.
+def lotes_tabla(nombre, entrada, desde, directorio_datos, directorio_almacen):
+    if entrada is None:
+        yield normalizar_tabla(nombre, cargar_tabla(nombre, None, directorio_datos, directorio_almacen))
+        return
+    tabla = leer_tramos(nombre, entrada['tramos'], desde=desde, directorio_almacen=directorio_almacen)
+    for lote in tabla.to_batches(max_chunksize=FILAS_POR_LOTE):
+        yield normalizar_tabla(nombre, lote.to_pandas())
+
+
+def crear_indices(con, nombre):
+    for columnas in INDICES.get(nombre, []):
+        con.execute(f'CREATE INDEX IF NOT EXISTS "ix_{nombre}_{"_".join(columnas)}" ON "{nombre}" ({", ".join(columnas)})')
+
+
+# Barrio de cada árbol (columna id_barrios) y R-tree de sus coordenadas
+def indexar_arboles(con, registro_arboles_df, directorio_datos, directorio_almacen):
+    from barrios_espacial import asignar_arboles
+
+    asignaciones = asignar_arboles(registro_arboles_df, directorio_datos, directorio_almacen)
+    con.execute('UPDATE registro_arboles SET id_barrios = NULL')
+    con.executemany('UPDATE registro_arboles SET id_barrios = ? WHERE id_arbol = ?', [
+        (None if pd.isna(id_barrios) else int(id_barrios), int(id_arbol))
+        for id_arbol, id_barrios in asignaciones[['id_arbol', 'id_barrios']].itertuples(index=False)
+    ])
+    con.execute('DELETE FROM arboles_rtree')
+    con.execute('''INSERT INTO arboles_rtree
+                   SELECT rowid, lat, lat, lng, lng FROM registro_arboles WHERE lat IS NOT NULL AND lng IS NOT NULL''')
+
+
+# Poner la base al día con el almacén: se copian de nuevo solo las tablas cuyo CSV cambió
+# y, de las tablas incrementales con la misma generación, solo las filas agregadas (el
+# último seguimiento por árbol se actualiza con esas filas).
+def actualizar_base(ruta=RUTA_BASE, directorio_datos=DIRECTORIO_DATOS, directorio_almacen=DIRECTORIO_ALMACEN):
+    with _lock_base:
+        return _actualizar_base(ruta, directorio_datos, directorio_almacen)
+
+
+def _actualizar_base(ruta, directorio_datos, directorio_almacen):
+    # Una base con otro esquema se descarta entera
+    if os.path.exists(ruta):
+        with closing(conectar(ruta)) as con:
+            version = con.execute('PRAGMA user_version').fetchone()[0]
+        if version != VERSION_ESQUEMA:
+            os.remove(ruta)
+
+    # closing cierra la conexión; el `with` de sqlite3 solo confirma o deshace la transacción
+    with closing(conectar(ruta)) as con, con:
+        con.execute(f'PRAGMA user_version = {VERSION_ESQUEMA}')
+        con.executescript(ESQUEMA)
+        registradas = {fila[0]: fila[1:] for fila in con.execute('SELECT * FROM versiones')}
+        actualizadas = []
+        for nombre in TABLAS:
+            version = version_datos(directorio_datos, tablas=[nombre])
+            registrada_version, generacion, filas = registradas.get(nombre, (None, None, 0))
+            if registrada_version == version:
+                continue
+
+            entrada = actualizar_incremental(nombre, directorio_datos, directorio_almacen)
+            agregar = entrada is not None and generacion == entrada['generacion'] and sum(entrada['tramos']) >= filas
+            if not agregar:
+                con.execute(f'DROP TABLE IF EXISTS "{nombre}"')
+                if nombre == 'mantenimiento_arboles':
+                    con.execute('DELETE FROM ultimo_seguimiento')
+                filas = 0
+
+            ultima_fila = filas and con.execute(f'SELECT MAX(rowid) FROM "{nombre}"').fetchone()[0]
+            for df in lotes_tabla(nombre, entrada, filas, directorio_datos, directorio_almacen):
+                if nombre == 'registro_arboles':
+                    df = df.assign(id_barrios=pd.array([pd.NA] * len(df), dtype='Int64'))
+                df.to_sql(nombre, con, if_exists='append', index=False, chunksize=FILAS_POR_LOTE)
+            if nombre == 'mantenimiento_arboles':
+                con.execute(ACTUALIZAR_ULTIMO, (ultima_fila or 0,))
+            crear_indices(con, nombre)
+
+            con.execute('INSERT OR REPLACE INTO versiones VALUES (?, ?, ?, ?)', (
+                nombre, version, entrada['generacion'] if entrada else None,
+                sum(entrada['tramos']) if entrada else None,
+            ))
+            actualizadas.append(nombre)
+        # El barrio de cada árbol depende del registro y de los barrios
+        if {'registro_arboles', 'barrios'} & set(actualizadas):
+            registro = normalizar_tabla('registro_arboles', cargar_tabla(
+                'registro_arboles', ['id_arbol', 'lat', 'lng'], directorio_datos, directorio_almacen
+            ))
+            indexar_arboles(con, registro, directorio_datos, directorio_almacen)
+        crear_indices(con, 'ultimo_seguimiento')
+        return actualizadas
+
+
+# Capa de consultas que usan las vistas con el backend SQLite. Cada consulta abre su
+# propia conexión de solo lectura, así se puede usar desde varias sesiones a la vez.
+class BaseDatos:
+    def __init__(self, ruta=RUTA_BASE):
+        self.ruta = ruta
+
+    def consultar(self, sql, parametros=()):
+        with closing(conectar(self.ruta, solo_lectura=True)) as con:
+            return pd.read_sql_query(sql, con, params=parametros)
+
+    # Estado de salud del último seguimiento de cada árbol del registro
+    def conteo_estado_salud(self):
+        return self.consultar('''
+            SELECT u.estado_salud, COUNT(*) AS cantidad
+            FROM (SELECT DISTINCT id_arbol FROM registro_arboles) r
+            JOIN ultimo_seguimiento u USING (id_arbol)
+            WHERE u.estado_salud IS NOT NULL
+            GROUP BY u.estado_salud ORDER BY cantidad DESC, u.estado_salud
+        ''')
+
+    def porcentaje_requiere_mantenimiento(self):
+        marcas = ', '.join('?' * len(ESTADOS_REQUIEREN_MANTENIMIENTO))
+        fila = self.consultar(f'''
+            SELECT COUNT(*) AS arboles, COALESCE(SUM(u.estado_salud IN ({marcas})), 0) AS requieren
+            FROM (SELECT DISTINCT id_arbol FROM registro_arboles) r
+            LEFT JOIN ultimo_seguimiento u USING (id_arbol)
+        ''', ESTADOS_REQUIEREN_MANTENIMIENTO).iloc[0]
+        return fila['requieren'] / fila['arboles'] * 100 if fila['arboles'] else 0.0
+
+    # Seguimientos por año del próximo mantenimiento (usa el índice de prox_fecha_mante)
+    def mantenimientos_por_año(self):
+        return self.consultar('''
+            SELECT CAST(strftime('%Y', prox_fecha_mante) AS INTEGER) AS año_mantenimiento,
+                   COUNT(*) AS cantidad_mantenimientos
+            FROM mantenimiento_arboles
+            WHERE prox_fecha_mante IS NOT NULL
+            GROUP BY año_mantenimiento ORDER BY año_mantenimiento
+        ''')
+
+    # Cada árbol del registro (su primera fila) con su último seguimiento, como la tabla
+    # de estado de estado_arboles.py: es lo que usa la agenda de mantenimientos
+    def ultimos_seguimientos(self):
+        ultimos = self.consultar(f'''
+            SELECT r.id_arbol, r.especie, r.lat, r.lng, {', '.join(f'u.{columna}' for columna in COLUMNAS_ULTIMO)}
+            FROM registro_arboles r JOIN ultimo_seguimiento u USING (id_arbol)
+            WHERE r.rowid IN (SELECT MIN(rowid) FROM registro_arboles GROUP BY id_arbol)
+        ''')
+        for columna in ['fecha_hora', 'prox_fecha_mante']:
+            ultimos[columna] = pd.to_datetime(ultimos[columna], errors='coerce')
+        return ultimos
+
+    # Árboles con el próximo mantenimiento entre dos fechas (usa el índice de prox_fecha_mante)
+    def proximos_mantenimientos(self, desde, hasta):
+        return self.consultar('''
+            SELECT id_arbol, estado_salud, prox_fecha_mante FROM ultimo_seguimiento
+            WHERE prox_fecha_mante >= ? AND prox_fecha_mante < ? ORDER BY prox_fecha_mante
+        ''', (str(pd.Timestamp(desde)), str(pd.Timestamp(hasta))))
+
+    def seguimientos_arbol(self, id_arbol):
+        return self.consultar('SELECT * FROM mantenimiento_arboles WHERE id_arbol = ? ORDER BY fecha_hora, id_seguimiento',
+                              (int(id_arbol),))
+
+    # Árboles dentro de un rectángulo de coordenadas. El R-tree guarda las cajas en float32
+    # redondeadas hacia afuera, así que da candidatos y se filtra con las coordenadas exactas.
+    def arboles_en_rectangulo(self, lat_min, lat_max, lng_min, lng_max):
+        return self.consultar('''
+            SELECT a.id_arbol, a.especie, a.lat, a.lng FROM arboles_rtree t
+            JOIN registro_arboles a ON a.rowid = t.id
+            WHERE t.lat_max >= :lat_min AND t.lat_min <= :lat_max AND t.lng_max >= :lng_min AND t.lng_min <= :lng_max
+              AND a.lat BETWEEN :lat_min AND :lat_max AND a.lng BETWEEN :lng_min AND :lng_max
+        ''', {'lat_min': lat_min, 'lat_max': lat_max, 'lng_min': lng_min, 'lng_max': lng_max})
+
+    def arboles_por_barrio(self):
+        return self.consultar('''
+            SELECT id_barrios, COUNT(DISTINCT id_arbol) AS cantidad_arboles FROM registro_arboles
+            WHERE id_barrios IS NOT NULL GROUP BY id_barrios
+        ''')
+
+    def espacios_por_barrio(self):
+        return self.consultar('''
+            SELECT id_barrios, COUNT(*) AS cantidad_espacios_verdes FROM espacios_verdes
+            WHERE id_barrios IS NOT NULL GROUP BY id_barrios
+        ''')
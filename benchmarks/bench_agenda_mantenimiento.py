@@ -0,0 +1,93 @@
+# Benchmark de la agenda de mantenimientos (agenda_mantenimiento.py): con cada vez más
+# árboles mide cuánto tarda en armarse la agenda y cuánto tarda una consulta de los K de
+# mayor riesgo en una ventana de fechas al azar, contra filtrar y ordenar la tabla.
+#
+# Uso: python benchmarks/bench_agenda_mantenimiento.py [--arboles 10000 100000 1000000]
+#                                                      [--consultas 200] [--salida resultados.json]
+#
+# La agenda se arma sobre el último seguimiento de cada árbol, así que su tamaño depende
+# de la cantidad de árboles y no del largo del historial de seguimientos. Los árboles
+# sintéticos toman los valores de riesgo de los seguimientos reales. Se corre desde la
+# raíz del repositorio.
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from agenda_mantenimiento import COLUMNAS_RIESGO, AgendaMantenimiento
+from almacen_datos import DIRECTORIO_DATOS, TABLAS
+
+
+def arboles_sinteticos(seguimientos, cantidad, generador):
+    arboles = pd.DataFrame({
+        'id_arbol': np.arange(cantidad),
+        'especie': 'Sintética',
+        'lat': generador.uniform(-27.52, -27.42, cantidad),
+        'lng': generador.uniform(-58.87, -58.73, cantidad),
+        'prox_fecha_mante': pd.Timestamp('2023-01-01') + pd.to_timedelta(generador.integers(0, 5 * 365, cantidad), 'D'),
+    })
+    for columna in COLUMNAS_RIESGO:
+        valores = seguimientos[columna].dropna().to_numpy()
+        arboles[columna] = pd.Categorical(valores[generador.integers(0, len(valores), cantidad)])
+    return arboles
+
+
+def medir(arboles, consultas, generador):
+    inicio = time.perf_counter()
+    agenda = AgendaMantenimiento(arboles)
+    segundos_armado = time.perf_counter() - inicio
+
+    tiempos_agenda, tiempos_ordenar = [], []
+    for _ in range(consultas):
+        desde = pd.Timestamp('2023-01-01') + pd.Timedelta(days=int(generador.integers(0, 5 * 365)))
+        hasta = desde + pd.Timedelta(days=int(generador.integers(1, 365)))
+        cantidad = int(generador.integers(10, 200))
+
+        inicio = time.perf_counter()
+        prioridades = agenda.prioridades(cantidad, desde, hasta)
+        tiempos_agenda.append(time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        ventana = agenda.arboles[agenda.arboles['prox_fecha_mante'].between(desde, hasta, inclusive='left')]
+        ordenados = ventana.sort_values('puntaje_riesgo', ascending=False, kind='stable').head(cantidad)
+        tiempos_ordenar.append(time.perf_counter() - inicio)
+        assert prioridades['id_arbol'].tolist() == ordenados['id_arbol'].tolist()
+
+    return {
+        'arboles': len(arboles), 'segundos_armado': round(segundos_armado, 3),
+        'ms_consulta_p50': round(np.percentile(tiempos_agenda, 50) * 1000, 3),
+        'ms_consulta_max': round(max(tiempos_agenda) * 1000, 3),
+        'ms_ordenar_p50': round(np.percentile(tiempos_ordenar, 50) * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de la agenda de mantenimientos')
+    parser.add_argument('--arboles', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--consultas', type=int, default=200)
+    parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+    args = parser.parse_args()
+
+    seguimientos = pd.read_csv(os.path.join(DIRECTORIO_DATOS, TABLAS['mantenimiento_arboles']), usecols=COLUMNAS_RIESGO)
+    generador = np.random.default_rng(0)
+    resultados = []
+    for cantidad in args.arboles:
+        resultado = medir(arboles_sinteticos(seguimientos, cantidad, generador), args.consultas, generador)
+        resultados.append(resultado)
+        print(f"{resultado['arboles']:>9} árboles  armado {resultado['segundos_armado']:>6.2f} s"
+              f"  consulta p50 {resultado['ms_consulta_p50']:>7.2f} ms  máx {resultado['ms_consulta_max']:>7.2f} ms"
+              f"  | filtrar y ordenar p50 {resultado['ms_ordenar_p50']:>8.2f} ms")
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+# Benchmark de la API de datos (ver api_datos.py) contra un servidor ya levantado
+# (python api_datos.py): N clientes con conexiones keep-alive piden la misma ruta durante
+# unos segundos y se mide el throughput y la latencia de cada escenario (indicadores sin y
+# con If-None-Match, con gzip, y consultas por bbox que se repiten o no).
+#
+# Uso: python benchmarks/bench_api.py [--url http://127.0.0.1:8000] [--clientes 50]
+#                                      [--segundos 5] [--salida resultados.json]
+import argparse
+import asyncio
+import json
+import random
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+BBOX_CIUDAD = (-58.87, -27.51, -58.74, -27.43)
+LADO_BBOX = 0.01
+
+
+def bbox_al_azar(generador):
+    lng = generador.uniform(BBOX_CIUDAD[0], BBOX_CIUDAD[2] - LADO_BBOX)
+    lat = generador.uniform(BBOX_CIUDAD[1], BBOX_CIUDAD[3] - LADO_BBOX)
+    return f'{lng:.4f},{lat:.4f},{lng + LADO_BBOX:.4f},{lat + LADO_BBOX:.4f}'
+
+
+async def leer_respuesta(lector):
+    encabezados = (await lector.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+    estado = int(encabezados[0].split()[1])
+    largo = 0
+    for linea in encabezados[1:]:
+        nombre, _, valor = linea.partition(':')
+        if nombre.lower() == 'content-length':
+            largo = int(valor)
+    cuerpo = await lector.readexactly(largo)
+    return estado, cuerpo
+
+
+# Un cliente con una conexión keep-alive que repite pedidos hasta el final
+async def cliente(host, puerto, rutas, encabezados, final, latencias, bytes_recibidos):
+    lector, escritor = await asyncio.open_connection(host, puerto)
+    extra = ''.join(f'{nombre}: {valor}\r\n' for nombre, valor in encabezados.items())
+    try:
+        while time.perf_counter() < final:
+            ruta = rutas()
+            inicio = time.perf_counter()
+            escritor.write(f'GET {ruta} HTTP/1.1\r\nHost: {host}\r\n{extra}\r\n'.encode('latin-1'))
+            estado, cuerpo = await leer_respuesta(lector)
+            latencias.append(time.perf_counter() - inicio)
+            bytes_recibidos.append(len(cuerpo))
+            if estado not in (200, 304):
+                raise RuntimeError(f'{ruta}: {estado}')
+    finally:
+        escritor.close()
+
+
+async def medir(url, nombre, rutas, clientes, segundos, encabezados=None):
+    partes = urlsplit(url)
+    latencias, bytes_recibidos = [], []
+    inicio = time.perf_counter()
+    final = inicio + segundos
+    await asyncio.gather(*(cliente(partes.hostname, partes.port or 80, rutas, encabezados or {},
+                                   final, latencias, bytes_recibidos) for _ in range(clientes)))
+    duracion = time.perf_counter() - inicio
+    latencias = np.array(latencias) * 1000
+    return {
+        'escenario': nombre,
+        'pedidos': len(latencias),
+        'pedidos_por_segundo': round(len(latencias) / duracion, 1),
+        'bytes_medios': round(float(np.mean(bytes_recibidos)), 1),
+        'p50_ms': round(float(np.percentile(latencias, 50)), 2),
+        'p99_ms': round(float(np.percentile(latencias, 99)), 2),
+    }
+
+
+async def medir_todo(url, clientes, segundos):
+    import urllib.request
+
+    with urllib.request.urlopen(f'{url}/api/indicadores/especies') as respuesta:
+        etag = respuesta.headers['ETag']
+    generador = random.Random(0)
+    bboxes_repetidas = [bbox_al_azar(generador) for _ in range(32)]
+    escenarios = [
+        ('indicadores', lambda: '/api/indicadores/especies', None),
+        ('indicadores, If-None-Match', lambda: '/api/indicadores/especies', {'If-None-Match': etag}),
+        ('indicadores, gzip', lambda: '/api/indicadores/especies', {'Accept-Encoding': 'gzip'}),
+        ('árboles, bbox repetidas', lambda: f'/api/arboles?bbox={generador.choice(bboxes_repetidas)}', None),
+        ('árboles, bbox nuevas', lambda: f'/api/arboles?bbox={bbox_al_azar(generador)}', None),
+        ('espacios verdes, bbox nuevas', lambda: f'/api/espacios_verdes?bbox={bbox_al_azar(generador)}', None),
+    ]
+    return [await medir(url, nombre, rutas, clientes, segundos, encabezados)
+            for nombre, rutas, encabezados in escenarios]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de la API de datos')
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--clientes', type=int, default=50)
+    parser.add_argument('--segundos', type=float, default=5)
+    parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+    args = parser.parse_args()
+
+    resultados = asyncio.run(medir_todo(args.url.rstrip('/'), args.clientes, args.segundos))
+    for resultado in resultados:
+        print(f"{resultado['escenario']:<30} {resultado['pedidos_por_segundo']:>9.1f} pedidos/s"
+              f"  {resultado['bytes_medios'] / 1024:>7.1f} KB  p50 {resultado['p50_ms']:>7.2f} ms"
+              f"  p99 {resultado['p99_ms']:>7.2f} ms")
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
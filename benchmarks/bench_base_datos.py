@@ -0,0 +1,152 @@
+# Benchmark del backend SQLite (base_datos.py) con un historial de seguimientos de
+# millones de filas: mide cuánto tarda en armarse la base y en ponerse al día con filas
+# agregadas al CSV, y el tiempo y la memoria máxima de un proceso que solo consulta la
+# base, contra cargar los seguimientos en memoria y armar la tabla de estado.
+#
+# Uso: python benchmarks/bench_base_datos.py [--escalas 10 100 300] [--nuevos 1000]
+#                                            [--salida resultados.json]
+#
+# El historial sintético son los seguimientos reales repetidos `escala` veces con
+# id_seguimiento nuevos (ver bench_ingesta_incremental.py). Cada paso corre en un
+# proceso aparte para que la memoria máxima sea la de ese caso (en Linux un proceso hijo
+# hereda la memoria máxima del padre, así que el proceso principal no carga datos). Se
+# corre desde la raíz del repositorio.
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from almacen_datos import DIRECTORIO_DATOS, TABLAS
+
+COLUMNAS_SEGUIMIENTOS = ['id_seguimiento', 'id_arbol', 'fecha_hora', 'estado_salud', 'prox_fecha_mante']
+
+
+def memoria_maxima_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def preparar(directorio, escala, nuevos):
+    from bench_ingesta_incremental import historial_sintetico
+
+    for archivo in TABLAS.values():
+        shutil.copy(os.path.join(DIRECTORIO_DATOS, archivo), directorio)
+    seguimientos = pd.read_csv(os.path.join(DIRECTORIO_DATOS, TABLAS['mantenimiento_arboles']))
+    seguimientos = seguimientos.sort_values('id_seguimiento', ignore_index=True)
+    historial = historial_sintetico(seguimientos, escala)
+    historial.to_csv(os.path.join(directorio, TABLAS['mantenimiento_arboles']), index=False)
+    agregados = historial.sample(nuevos, random_state=0).assign(
+        id_seguimiento=lambda df: historial['id_seguimiento'].max() + 1 + pd.RangeIndex(len(df))
+    )
+    agregados.to_csv(os.path.join(directorio, 'agregados.csv'), index=False, header=False)
+    return {'seguimientos': len(historial)}
+
+
+def medir_sqlite(directorio):
+    from base_datos import actualizar_base
+
+    ruta = os.path.join(directorio, 'base.sqlite')
+    almacen = os.path.join(directorio, 'almacen')
+    inicio = time.perf_counter()
+    actualizar_base(ruta, directorio, almacen)
+    segundos_armado = time.perf_counter() - inicio
+
+    with open(os.path.join(directorio, 'agregados.csv'), encoding='utf-8') as agregados, \
+            open(os.path.join(directorio, TABLAS['mantenimiento_arboles']), 'a', encoding='utf-8') as csv:
+        csv.write(agregados.read())
+    inicio = time.perf_counter()
+    actualizar_base(ruta, directorio, almacen)
+    segundos_actualizacion = time.perf_counter() - inicio
+
+    return {'segundos_armado': round(segundos_armado, 3), 'segundos_actualizacion': round(segundos_actualizacion, 3),
+            'memoria_mb': memoria_maxima_mb()}
+
+
+# Lo que hace un worker de la app con el backend activo: solo consultar la base ya armada
+def medir_consultas(directorio):
+    from base_datos import BaseDatos
+
+    base = BaseDatos(os.path.join(directorio, 'base.sqlite'))
+    inicio = time.perf_counter()
+    porcentaje = base.porcentaje_requiere_mantenimiento()
+    base.mantenimientos_por_año()
+    base.conteo_estado_salud()
+    return {'segundos_consultas': round(time.perf_counter() - inicio, 4), 'porcentaje': round(porcentaje, 4),
+            'memoria_mb': memoria_maxima_mb()}
+
+
+def medir_memoria(directorio):
+    from almacen_datos import cargar_tabla
+    from estado_arboles import construir_estado_arboles, porcentaje_requiere_mantenimiento
+    from normalizacion import normalizar_tabla
+
+    inicio = time.perf_counter()
+    registro = normalizar_tabla('registro_arboles', cargar_tabla(
+        'registro_arboles', ['id_arbol', 'especie', 'lat', 'lng'], directorio, os.path.join(directorio, 'almacen')
+    ))
+    seguimientos = normalizar_tabla('mantenimiento_arboles', cargar_tabla(
+        'mantenimiento_arboles', COLUMNAS_SEGUIMIENTOS, directorio, os.path.join(directorio, 'almacen')
+    ))
+    porcentaje = porcentaje_requiere_mantenimiento(construir_estado_arboles(registro, seguimientos))
+    return {'segundos_carga': round(time.perf_counter() - inicio, 3), 'porcentaje': round(porcentaje, 4),
+            'memoria_mb': memoria_maxima_mb()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del backend SQLite de seguimientos')
+    parser.add_argument('--escalas', type=int, nargs='+', default=[10, 100, 300])
+    parser.add_argument('--nuevos', type=int, default=1000)
+    parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+    parser.add_argument('--caso', help=argparse.SUPPRESS)
+    parser.add_argument('--directorio', help=argparse.SUPPRESS)
+    parser.add_argument('--escala', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Un paso corrido en un proceso aparte
+    if args.caso == 'preparar':
+        print(json.dumps(preparar(args.directorio, args.escala, args.nuevos)))
+        return
+    if args.caso:
+        medir = {'sqlite': medir_sqlite, 'consultas': medir_consultas, 'memoria': medir_memoria}[args.caso]
+        print(json.dumps(medir(args.directorio)))
+        return
+
+    resultados = []
+    for escala in args.escalas:
+        directorio = tempfile.mkdtemp(prefix='bench_base_datos_')
+        try:
+            resultado = {'nuevos': args.nuevos}
+            for caso in ['preparar', 'sqlite', 'consultas', 'memoria']:
+                salida = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), '--caso', caso, '--directorio', directorio,
+                     '--escala', str(escala), '--nuevos', str(args.nuevos)],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+                resultado[caso] = json.loads(salida.strip().splitlines()[-1])
+        finally:
+            shutil.rmtree(directorio)
+        seguimientos = resultado.pop('preparar')['seguimientos']
+        resultado['seguimientos'] = seguimientos
+        resultados.append(resultado)
+        sqlite, consultas, memoria = resultado['sqlite'], resultado['consultas'], resultado['memoria']
+        assert consultas['porcentaje'] == memoria['porcentaje']
+        print(f"{seguimientos:>9} seguimientos  sqlite: armado {sqlite['segundos_armado']:>7.2f} s"
+              f"  +{args.nuevos} {sqlite['segundos_actualizacion']:>6.2f} s"
+              f"  consultas {consultas['segundos_consultas']:>6.3f} s {consultas['memoria_mb']:>7.1f} MB"
+              f" | en memoria: {memoria['segundos_carga']:>6.2f} s {memoria['memoria_mb']:>7.1f} MB")
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# Benchmark de las distancias a espacios y puntos verdes (cobertura_verde.py): con cada vez
+# más árboles al azar en la ciudad mide cuánto tarda en calcular la distancia de cada uno
+# al espacio verde y al punto verde más cercanos con el índice espacial, contra medir la
+# distancia a todas las geometrías (en una muestra, para que la comparación no tarde horas),
+# y cuánto tarda la cobertura de todos los barrios.
+#
+# Uso: python benchmarks/bench_cobertura_verde.py [--arboles 10000 100000 1000000]
+#                                                 [--muestra 200] [--salida resultados.json]
+#
+# Se corre desde la raíz del repositorio.
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import shapely
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from almacen_datos import cargar_tabla
+from cobertura_verde import cobertura_barrios, distancia_mas_cercana, geometrias_verdes
+from geometria_barrios import proyectar_puntos
+
+
+def medir(cantidad, poligonos, puntos, muestra, generador):
+    x, y = proyectar_puntos(generador.uniform(-27.52, -27.42, cantidad), generador.uniform(-58.87, -58.73, cantidad))
+    resultado = {'arboles': cantidad}
+    for nombre, geometrias in [('espacios', poligonos), ('puntos', puntos)]:
+        inicio = time.perf_counter()
+        distancias = distancia_mas_cercana(x, y, geometrias)
+        resultado[f'segundos_{nombre}'] = round(time.perf_counter() - inicio, 3)
+
+        # Todas contra todas en una muestra, y la misma respuesta que con el índice
+        elegidos = generador.choice(cantidad, min(muestra, cantidad), replace=False)
+        inicio = time.perf_counter()
+        todas = shapely.distance(shapely.points(x[elegidos], y[elegidos])[:, None], geometrias[None, :]).min(axis=1)
+        por_arbol = (time.perf_counter() - inicio) / len(elegidos)
+        assert np.allclose(todas, distancias[elegidos])
+        resultado[f'segundos_{nombre}_todas_estimado'] = round(por_arbol * cantidad, 3)
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de la cobertura de espacios verdes')
+    parser.add_argument('--arboles', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--muestra', type=int, default=200)
+    parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+    args = parser.parse_args()
+
+    poligonos, puntos = geometrias_verdes()
+    generador = np.random.default_rng(0)
+    resultados = []
+    for cantidad in args.arboles:
+        resultado = medir(cantidad, poligonos, puntos, args.muestra, generador)
+        resultados.append(resultado)
+        print(f"{cantidad:>9} árboles  espacios {resultado['segundos_espacios']:>6.2f} s"
+              f" (todas {resultado['segundos_espacios_todas_estimado']:>8.2f} s)"
+              f"  puntos {resultado['segundos_puntos']:>6.2f} s (todas {resultado['segundos_puntos_todas_estimado']:>7.2f} s)")
+
+    barrios = cargar_tabla('barrios', ['id_barrios', 'nombre_barrio', 'the_geom_barrios_wkb'])
+    inicio = time.perf_counter()
+    cobertura_barrios(barrios, poligonos, puntos)
+    segundos = round(time.perf_counter() - inicio, 3)
+    print(f"cobertura de {barrios['id_barrios'].nunique()} barrios: {segundos:.2f} s")
+    resultados.append({'barrios': int(barrios['id_barrios'].nunique()), 'segundos_cobertura': segundos})
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+# Benchmark del mapa coroplético de barrios: compara dos folium.Choropleth con la
+# geometría completa (enfoque anterior, el GeoJSON se escribe una vez por capa) contra
+# el GeoJSON compartido y simplificado de cada nivel de detalle.
+#
+# Uso: python benchmarks/bench_coropletico.py [--salida resultados.json]
+#
+# Para cada variante mide el tamaño del HTML, el tiempo de armado en Python, la cantidad
+# de vértices que dibuja el navegador y la mayor distancia (en metros) entre la
+# geometría simplificada y la original, comparada con el tamaño de un píxel a zoom 13.
+import argparse
+import json
+import os
+import sys
+import time
+
+import folium
+import numpy as np
+import shapely
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from almacen_datos import cargar_tabla
+from coropletico import ZOOMS_DETALLE, crear_mapa_coropletico, metros_por_pixel, precalcular_niveles, unir_por_barrio
+from geometria_barrios import CRS_METRICO_CORRIENTES, barrios_geodataframe, reproyectar
+
+CENTRO_MAPA = [-27.48, -58.83]
+ZOOM_CIUDAD = 13
+CAPAS = [
+    ('cantidad_arboles', 'YlGn_09', 'Cantidad de Árboles por Barrio'),
+    ('cantidad_espacios_verdes', 'BuPu_09', 'Cantidad de Espacios Verdes por Barrio'),
+]
+
+
+# Datos de prueba: barrios con conteos aleatorios (el tamaño no depende de los valores)
+def barrios_con_conteos(semilla=0):
+    barrios = cargar_tabla('barrios')
+    generador = np.random.default_rng(semilla)
+    barrios['cantidad_arboles'] = generador.integers(0, 1300, len(barrios))
+    barrios['cantidad_espacios_verdes'] = generador.integers(0, 30, len(barrios))
+    return barrios
+
+
+def mapa_anterior(barrios):
+    barrios_gdf = barrios_geodataframe(barrios).drop(columns=['crs_origen'])
+    mapa = folium.Map(location=CENTRO_MAPA, zoom_start=ZOOM_CIUDAD)
+    for columna, paleta, leyenda in CAPAS:
+        folium.Choropleth(
+            geo_data=barrios_gdf.to_json(),
+            name=leyenda,
+            data=barrios_gdf,
+            columns=['id_barrios', columna],
+            key_on='feature.properties.id_barrios',
+            fill_color=paleta.split('_')[0],
+            fill_opacity=0.7,
+            line_opacity=0.2,
+            legend_name=leyenda
+        ).add_to(mapa)
+    folium.LayerControl().add_to(mapa)
+    return mapa
+
+
+# Mayor desvío (Hausdorff, en metros) entre la geometría simplificada y la original
+def desvio_maximo(originales, simplificadas):
+    a = reproyectar(originales, 'EPSG:4326', CRS_METRICO_CORRIENTES)
+    b = reproyectar(simplificadas, 'EPSG:4326', CRS_METRICO_CORRIENTES)
+    return float(np.nanmax(shapely.hausdorff_distance(a, b)))
+
+
+def medir(nombre, construir):
+    inicio = time.perf_counter()
+    html = construir().get_root().render()
+    segundos = time.perf_counter() - inicio
+    return {'variante': nombre, 'bytes_html': len(html.encode('utf-8')), 'segundos': round(segundos, 4)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del mapa coroplético de barrios')
+    parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+    args = parser.parse_args()
+
+    barrios = barrios_con_conteos()
+    originales = shapely.from_wkb(barrios['the_geom_barrios_wkb'].to_numpy(dtype=object))
+    inicio = time.perf_counter()
+    niveles = precalcular_niveles(barrios)
+    print(f"Niveles de detalle precalculados en {time.perf_counter() - inicio:.3f} s")
+
+    resultado = medir('completa, un GeoJSON por capa', lambda: mapa_anterior(barrios))
+    resultado.update({'vertices': int(shapely.get_num_coordinates(originales).sum()), 'desvio_m': 0.0})
+    resultados = [resultado]
+
+    # Para comparar geometrías, la original también unida por id_barrios
+    codigos, ids = barrios['id_barrios'].factorize()
+    originales_por_id = unir_por_barrio(originales, codigos, len(ids))
+
+    # Cada nivel se dibuja en un mapa a zoom de ciudad para comparar tamaños
+    for zoom in ZOOMS_DETALLE:
+        columna = f'wkb_z{zoom}'
+        simplificadas = shapely.from_wkb(niveles[columna].to_numpy(dtype=object))
+        niveles_zoom = niveles.assign(**{f'wkb_z{ZOOM_CIUDAD}': niveles[columna]})
+        resultado = medir(f'compartida, detalle z{zoom}', lambda: crear_mapa_coropletico(
+            barrios, CAPAS, CENTRO_MAPA, zoom=ZOOM_CIUDAD, niveles=niveles_zoom
+        ))
+        resultado.update({
+            'vertices': int(shapely.get_num_coordinates(simplificadas).sum()),
+            'desvio_m': round(desvio_maximo(originales_por_id, simplificadas), 2),
+        })
+        resultados.append(resultado)
+
+    print(f"Tamaño de un píxel a zoom {ZOOM_CIUDAD}: {metros_por_pixel(ZOOM_CIUDAD):.1f} m")
+    for resultado in resultados:
+        print(f"{resultado['variante']:<34} {resultado['bytes_html'] / 1024:>8.1f} KB  {resultado['segundos']:>7.3f} s"
+              f"  {resultado['vertices']:>6} vértices  desvío máx. {resultado['desvio_m']:>6.2f} m")
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
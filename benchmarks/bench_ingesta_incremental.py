@@ -0,0 +1,100 @@
+# Benchmark de la ingesta incremental de MantenimientoArboles: con un historial de
+# seguimientos cada vez más grande se agregan filas nuevas al CSV y se mide cuánto tarda
+# en ponerse al día la app (tablas compartidas y tabla de estado por árbol) leyendo solo
+# lo agregado, contra volver a leer el CSV completo y rearmar la tabla de estado.
+#
+# Uso: python benchmarks/bench_ingesta_incremental.py [--escalas 1 10 50] [--nuevos 100 1000]
+#                                                     [--salida resultados.json]
+#
+# El historial sintético son los seguimientos reales repetidos `escala` veces con
+# id_seguimiento nuevos. Se corre desde la raíz del repositorio.
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from almacen_datos import DIRECTORIO_DATOS, TABLAS, leer_csv
+from estado_arboles import EstadoArbolesIncremental, construir_estado_arboles
+from normalizacion import normalizar_tabla
+from tablas_compartidas import TablasCompartidas
+
+COLUMNAS = {
+    'registro_arboles': ['id_arbol', 'especie', 'lat', 'lng'],
+    'mantenimiento_arboles': ['id_seguimiento', 'id_arbol', 'fecha_hora', 'estado_salud', 'prox_fecha_mante'],
+}
+
+
+def historial_sintetico(seguimientos, escala):
+    paso = int(seguimientos['id_seguimiento'].max()) + 1
+    partes = [seguimientos.assign(id_seguimiento=seguimientos['id_seguimiento'] + i * paso) for i in range(escala)]
+    return pd.concat(partes, ignore_index=True)
+
+
+def medir(directorio, historial, nuevos):
+    ruta = os.path.join(directorio, TABLAS['mantenimiento_arboles'])
+    historial.to_csv(ruta, index=False)
+    tablas = TablasCompartidas(COLUMNAS, directorio, os.path.join(directorio, 'almacen'))
+    estado = EstadoArbolesIncremental()
+    datos, _ = tablas.obtener()
+    estado.obtener(datos['registro_arboles'], datos['mantenimiento_arboles'], tablas.recargas['mantenimiento_arboles'])
+
+    agregados = historial.sample(nuevos, random_state=0).assign(
+        id_seguimiento=lambda df: historial['id_seguimiento'].max() + 1 + pd.RangeIndex(len(df))
+    )
+    agregados.to_csv(ruta, index=False, header=False, mode='a')
+
+    inicio = time.perf_counter()
+    datos, _ = tablas.obtener()
+    incremental = estado.obtener(datos['registro_arboles'], datos['mantenimiento_arboles'],
+                                 tablas.recargas['mantenimiento_arboles'])
+    segundos_incremental = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    mantenimiento = normalizar_tabla('mantenimiento_arboles', leer_csv(
+        'mantenimiento_arboles', COLUMNAS['mantenimiento_arboles'], directorio
+    ))
+    completo = construir_estado_arboles(datos['registro_arboles'], mantenimiento)
+    segundos_completo = time.perf_counter() - inicio
+
+    assert incremental['estado_salud'].astype(object).equals(completo['estado_salud'].astype(object))
+    return {'seguimientos': len(historial), 'nuevos': nuevos, 'segundos_incremental': round(segundos_incremental, 4),
+            'segundos_completo': round(segundos_completo, 4)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de la ingesta incremental de seguimientos')
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--nuevos', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+    args = parser.parse_args()
+
+    seguimientos = pd.read_csv(os.path.join(DIRECTORIO_DATOS, TABLAS['mantenimiento_arboles']))
+    seguimientos = seguimientos.sort_values('id_seguimiento', ignore_index=True)
+    resultados = []
+    for escala in args.escalas:
+        historial = historial_sintetico(seguimientos, escala)
+        for nuevos in args.nuevos:
+            directorio = tempfile.mkdtemp(prefix='bench_ingesta_')
+            try:
+                shutil.copy(os.path.join(DIRECTORIO_DATOS, TABLAS['registro_arboles']), directorio)
+                resultado = medir(directorio, historial, nuevos)
+            finally:
+                shutil.rmtree(directorio)
+            resultados.append(resultado)
+            print(f"{resultado['seguimientos']:>9} seguimientos  +{nuevos:<6} incremental {resultado['segundos_incremental']:>7.3f} s"
+                  f"  completo {resultado['segundos_completo']:>7.3f} s")
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
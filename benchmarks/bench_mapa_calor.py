@@ -0,0 +1,76 @@
+# Benchmark del mapa de calor: compara el HeatMap con todos los puntos (enfoque anterior)
+# contra la grilla de densidad precalculada (puntos ponderados e imagen superpuesta).
+#
+# Uso: python benchmarks/bench_mapa_calor.py [--escalas 1 10 100] [--salida resultados.json]
+#
+# Mide el tamaño del HTML generado, el tiempo de armado y renderizado del mapa en Python
+# y la cantidad de puntos que el navegador tiene que dibujar (el tiempo de render en el
+# navegador crece con esa cantidad).
+import argparse
+import json
+import os
+import sys
+import time
+
+import folium
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from almacen_datos import cargar_tabla
+from coordenadas import sanear_coordenadas
+from mapa_calor import agregar_mapa_calor, grilla_densidad, puntos_ponderados
+
+CENTRO_MAPA = [-27.48, -58.83]
+MODOS = ['puntos', 'ponderado', 'imagen']
+
+
+# Censo sintético: los árboles reales repetidos `escala` veces con un desplazamiento
+# aleatorio de unos metros
+def arboles_sinteticos(lat, lng, escala, semilla=0):
+    generador = np.random.default_rng(semilla)
+    lat = np.tile(lat, escala) + generador.normal(0, 0.0005, len(lat) * escala)
+    lng = np.tile(lng, escala) + generador.normal(0, 0.0005, len(lng) * escala)
+    return lat, lng
+
+
+def medir(lat, lng, modo, zoom=13):
+    inicio = time.perf_counter()
+    mapa = folium.Map(location=CENTRO_MAPA, zoom_start=zoom)
+    agregar_mapa_calor(mapa, lat, lng, modo=modo, zoom=zoom)
+    html = mapa.get_root().render()
+    segundos = time.perf_counter() - inicio
+
+    if modo == 'puntos':
+        puntos = len(lat)
+    elif modo == 'ponderado':
+        puntos = len(puntos_ponderados(*grilla_densidad(lat, lng, zoom)))
+    else:
+        puntos = 0
+    return {'modo': modo, 'arboles': len(lat), 'bytes_html': len(html.encode('utf-8')),
+            'segundos': round(segundos, 4), 'puntos_navegador': puntos}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del mapa de calor de árboles')
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+    args = parser.parse_args()
+
+    registro = sanear_coordenadas(cargar_tabla('registro_arboles', ['lat', 'lng'])).dropna(subset=['lat', 'lng'])
+    resultados = []
+    for escala in args.escalas:
+        lat, lng = arboles_sinteticos(registro['lat'].to_numpy(), registro['lng'].to_numpy(), escala)
+        for modo in MODOS:
+            resultado = medir(lat, lng, modo)
+            resultados.append(resultado)
+            print(f"{resultado['arboles']:>9} árboles  {modo:<10} {resultado['bytes_html'] / 1024:>10.1f} KB"
+                  f"  {resultado['segundos']:>8.3f} s  {resultado['puntos_navegador']:>9} puntos")
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
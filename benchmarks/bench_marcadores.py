@@ -0,0 +1,86 @@
+# Benchmark de los marcadores de árboles: compara un folium.Marker por fila (enfoque
+# anterior, con iterrows) contra la capa agrupada que arma los marcadores en el navegador.
+#
+# Uso: python benchmarks/bench_marcadores.py [--escalas 1 10 100] [--escala-maxima-anterior 10]
+#                                            [--salida resultados.json]
+#
+# Mide el tamaño del HTML generado y el tiempo de armado y renderizado del mapa en Python.
+# El enfoque anterior solo se mide hasta --escala-maxima-anterior porque tarda minutos.
+import argparse
+import json
+import os
+import sys
+import time
+
+import folium
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from almacen_datos import cargar_tabla
+from capa_marcadores import agregar_marcadores
+from coordenadas import sanear_coordenadas
+from bench_mapa_calor import arboles_sinteticos
+
+CENTRO_MAPA = [-27.48, -58.83]
+
+
+def mapa_anterior(arboles):
+    mapa = folium.Map(location=CENTRO_MAPA, zoom_start=13)
+    for _, fila in arboles.iterrows():
+        folium.Marker(
+            location=[fila['lat'], fila['lng']],
+            popup=f"Árbol: {fila['id_arbol']}, Especie: {fila['especie']}",
+            icon=folium.Icon(color='green', icon='tree')
+        ).add_to(mapa)
+    return mapa
+
+
+def mapa_capa(arboles):
+    mapa = folium.Map(location=CENTRO_MAPA, zoom_start=13)
+    agregar_marcadores(mapa, arboles, "Árbol: {id_arbol}, Especie: {especie}", icono='tree')
+    return mapa
+
+
+def medir(arboles, variante, construir):
+    inicio = time.perf_counter()
+    html = construir(arboles).get_root().render()
+    segundos = time.perf_counter() - inicio
+    return {'variante': variante, 'arboles': len(arboles), 'bytes_html': len(html.encode('utf-8')),
+            'segundos': round(segundos, 4)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de los marcadores de árboles')
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--escala-maxima-anterior', type=int, default=10)
+    parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+    args = parser.parse_args()
+
+    registro = sanear_coordenadas(cargar_tabla('registro_arboles', ['id_arbol', 'especie', 'lat', 'lng']))
+    registro = registro.dropna(subset=['lat', 'lng'])
+    resultados = []
+    for escala in args.escalas:
+        lat, lng = arboles_sinteticos(registro['lat'].to_numpy(), registro['lng'].to_numpy(), escala)
+        arboles = pd.DataFrame({
+            'id_arbol': range(len(lat)),
+            'especie': pd.concat([registro['especie']] * escala, ignore_index=True),
+            'lat': lat,
+            'lng': lng,
+        })
+        variantes = [('capa agrupada', mapa_capa)]
+        if escala <= args.escala_maxima_anterior:
+            variantes.insert(0, ('un Marker por fila', mapa_anterior))
+        for variante, construir in variantes:
+            resultado = medir(arboles, variante, construir)
+            resultados.append(resultado)
+            print(f"{resultado['arboles']:>9} árboles  {variante:<20} {resultado['bytes_html'] / 1024:>10.1f} KB"
+                  f"  {resultado['segundos']:>8.3f} s")
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
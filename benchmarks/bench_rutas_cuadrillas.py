@@ -0,0 +1,80 @@
+# Benchmark de la planificación de rutas de cuadrillas (rutas_cuadrillas.py): con cada vez
+# más paradas al azar en la ciudad mide cuánto tarda en repartirlas en paquetes y ordenar
+# cada paquete, en un solo proceso y con un proceso por núcleo, y cuánto acorta 2-opt el
+# recorrido del vecino más cercano.
+#
+# Uso: python benchmarks/bench_rutas_cuadrillas.py [--paradas 1000 5000 20000] [--por-paquete 40]
+#                                                  [--salida resultados.json]
+#
+# Se corre desde la raíz del repositorio.
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from almacen_datos import DIRECTORIO_DATOS, TABLAS
+from rutas_cuadrillas import matriz_distancias, planificar_rutas, vecino_mas_cercano
+
+
+def paradas_sinteticas(cantidad, generador):
+    return pd.DataFrame({
+        'id_arbol': np.arange(cantidad),
+        'lat': generador.uniform(-27.52, -27.42, cantidad),
+        'lng': generador.uniform(-58.87, -58.73, cantidad),
+    })
+
+
+# Largo total con solo el vecino más cercano, para comparar con el de las rutas
+def largo_vecino_mas_cercano(rutas, puntos_verdes):
+    from geometria_barrios import proyectar_puntos
+
+    total = 0.0
+    depositos = puntos_verdes.set_index('ubicacion')
+    for _, ruta in rutas.groupby('paquete'):
+        deposito = depositos.loc[ruta['punto_verde'].iloc[0]]
+        x, y = proyectar_puntos(np.r_[deposito['lat'], ruta['lat']], np.r_[deposito['lng'], ruta['lng']])
+        distancias = matriz_distancias(x, y)
+        recorrido = vecino_mas_cercano(distancias)
+        total += distancias[recorrido[:-1], recorrido[1:]].sum()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de las rutas de cuadrillas')
+    parser.add_argument('--paradas', type=int, nargs='+', default=[1000, 5000, 20000])
+    parser.add_argument('--por-paquete', type=int, default=40)
+    parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+    args = parser.parse_args()
+
+    puntos_verdes = pd.read_csv(os.path.join(DIRECTORIO_DATOS, TABLAS['puntos_verdes'])).dropna(subset=['lat', 'lng'])
+    generador = np.random.default_rng(0)
+    resultados = []
+    for cantidad in args.paradas:
+        paradas = paradas_sinteticas(cantidad, generador)
+        resultado = {'paradas': cantidad, 'por_paquete': args.por_paquete}
+        for procesos in sorted({1, os.cpu_count()}):
+            inicio = time.perf_counter()
+            rutas = planificar_rutas(paradas, puntos_verdes, args.por_paquete, procesos=procesos)
+            resultado[f'segundos_{procesos}_procesos'] = round(time.perf_counter() - inicio, 3)
+        resultado['paquetes'] = int(rutas['paquete'].nunique())
+        resultado['km_2opt'] = round(rutas['distancia_m'].sum() / 1000, 1)
+        resultado['km_vecino_mas_cercano'] = round(largo_vecino_mas_cercano(rutas, puntos_verdes) / 1000, 1)
+        resultados.append(resultado)
+        tiempos = '  '.join(f"{clave.split('_')[1]} proc. {valor:>6.2f} s"
+                            for clave, valor in resultado.items() if clave.startswith('segundos_'))
+        print(f"{cantidad:>7} paradas  {resultado['paquetes']:>4} paquetes  {tiempos}"
+              f"  | {resultado['km_2opt']:>8.1f} km (vecino más cercano {resultado['km_vecino_mas_cercano']:.1f} km)")
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+# Benchmark de los mapas con teselas vectoriales (ver teselas_vectoriales.py): para cada
+# escala de datos sintéticos (ver datos_sinteticos.py) compara el HTML de los mapas con las
+# geometrías adentro (espacios verdes y coroplético de barrios, como los arma la app sin
+# MAPAS_CON_TESELAS) contra los mismos mapas con las geometrías en teselas, y mide la
+# generación del MBTiles y lo que pide el navegador para ver la ciudad a zoom 13.
+#
+# Uso: python benchmarks/bench_teselas.py [--escalas 1 10 100] [--salida resultados.json]
+#
+# Por variante: tamaño del HTML y tiempo de armado en Python. Por escala: tiempo y tamaño
+# del MBTiles, cantidad y tamaño (comprimido) de las teselas de cada zoom y bytes de las
+# teselas de una vista de 1000 x 600 píxeles en el centro de la ciudad.
+import argparse
+import json
+import math
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import closing
+
+import folium
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from almacen_datos import TABLAS, cargar_tabla, ingestar
+from capa_teselas import CapaTeselas
+from coropletico import crear_mapa_coropletico, precalcular_niveles
+from geojson_espacios import decodificar_espacios_verdes
+from teselas_vectoriales import generar_mbtiles, mercator, resumen_mbtiles
+
+CENTRO_MAPA = [-27.48, -58.83]
+ZOOM_CIUDAD = 13
+VISTA_PIXELES = (1000, 600)
+URL_TESELAS = 'http://localhost:8765/teselas/{z}/{x}/{y}.pbf'
+CAPAS = [
+    ('cantidad_arboles', 'YlGn_09', 'Cantidad de Árboles por Barrio'),
+    ('cantidad_espacios_verdes', 'BuPu_09', 'Cantidad de Espacios Verdes por Barrio'),
+]
+
+
+def medir(nombre, construir):
+    inicio = time.perf_counter()
+    html = construir().get_root().render()
+    segundos = time.perf_counter() - inicio
+    return {'variante': nombre, 'bytes_html': len(html.encode('utf-8')), 'segundos': round(segundos, 4)}
+
+
+# Mapa de espacios verdes con un polígono de folium por espacio, como en la app
+def mapa_espacios_embebido(directorio_datos, directorio_almacen):
+    espacios = cargar_tabla('espacios_verdes', ['gid'], directorio_datos, directorio_almacen)
+    anillos, _ = decodificar_espacios_verdes(os.path.join(directorio_datos, TABLAS['espacios_verdes']))
+    mapa = folium.Map(location=CENTRO_MAPA, zoom_start=ZOOM_CIUDAD)
+    for gid in espacios['gid']:
+        anillos_espacio = anillos.get(gid)
+        if anillos_espacio is None:
+            continue
+        folium.Polygon(
+            locations=anillos_espacio[0].tolist() if len(anillos_espacio) == 1
+            else [[anillo.tolist()] for anillo in anillos_espacio],
+            color='blue', fill=True, fill_opacity=0.3, popup=f"Espacio verde: {gid}"
+        ).add_to(mapa)
+    return mapa
+
+
+def mapa_espacios_teselas():
+    mapa = folium.Map(location=CENTRO_MAPA, zoom_start=ZOOM_CIUDAD)
+    CapaTeselas(URL_TESELAS, 'espacios_verdes', {'color': 'blue', 'fillOpacity': 0.3},
+                plantilla_popup="Espacio verde: {gid}").add_to(mapa)
+    return mapa
+
+
+# Bytes de las teselas que pide el navegador para una vista centrada en la ciudad
+def bytes_vista(ruta, zoom=ZOOM_CIUDAD, pixeles=VISTA_PIXELES):
+    x, y = mercator(CENTRO_MAPA[1], CENTRO_MAPA[0])
+    escala = 2 ** zoom * 256
+    columnas = range(math.floor((x * escala - pixeles[0] / 2) / 256), math.floor((x * escala + pixeles[0] / 2) / 256) + 1)
+    filas = range(math.floor((y * escala - pixeles[1] / 2) / 256), math.floor((y * escala + pixeles[1] / 2) / 256) + 1)
+    with closing(sqlite3.connect(f'file:{ruta}?mode=ro', uri=True)) as conexion:
+        tamaños = [conexion.execute(
+            'SELECT LENGTH(tile_data) FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?',
+            (zoom, columna, (1 << zoom) - 1 - fila)
+        ).fetchone() for columna in columnas for fila in filas]
+    return {'teselas': len(tamaños), 'bytes': sum(t[0] for t in tamaños if t)}
+
+
+def medir_escala(escala):
+    from datos_sinteticos import generar
+
+    directorio = tempfile.mkdtemp(prefix='bench_teselas_')
+    try:
+        directorio_datos = os.path.join(directorio, 'data')
+        directorio_almacen = os.path.join(directorio_datos, 'almacen')
+        filas = generar(directorio_datos, escala)
+        ingestar(directorio_datos, directorio_almacen)
+
+        ruta = os.path.join(directorio, 'teselas.mbtiles')
+        inicio = time.perf_counter()
+        generar_mbtiles(ruta, directorio_datos, directorio_almacen)
+        resultado = {
+            'escala': escala,
+            'arboles': filas['registro_arboles'],
+            'segundos_mbtiles': round(time.perf_counter() - inicio, 3),
+            'bytes_mbtiles': os.path.getsize(ruta),
+            'zooms': resumen_mbtiles(ruta).to_dict(orient='records'),
+            'vista': bytes_vista(ruta),
+        }
+
+        barrios = cargar_tabla('barrios', None, directorio_datos, directorio_almacen)
+        generador = np.random.default_rng(0)
+        barrios['cantidad_arboles'] = generador.integers(0, 1300, len(barrios))
+        barrios['cantidad_espacios_verdes'] = generador.integers(0, 30, len(barrios))
+        niveles = precalcular_niveles(barrios)
+        resultado['variantes'] = [
+            medir('espacios verdes, embebido', lambda: mapa_espacios_embebido(directorio_datos, directorio_almacen)),
+            medir('espacios verdes, teselas', mapa_espacios_teselas),
+            medir('coroplético, embebido', lambda: crear_mapa_coropletico(barrios, CAPAS, niveles=niveles)),
+            medir('coroplético, teselas', lambda: crear_mapa_coropletico(barrios, CAPAS, url_teselas=URL_TESELAS)),
+        ]
+        return resultado
+    finally:
+        shutil.rmtree(directorio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de los mapas con teselas vectoriales')
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+    args = parser.parse_args()
+
+    resultados = []
+    for escala in args.escalas:
+        resultado = medir_escala(escala)
+        resultados.append(resultado)
+        print(f"escala {escala:>4}: {resultado['arboles']:>8} árboles  MBTiles {resultado['bytes_mbtiles'] / 2 ** 20:>7.1f} MB"
+              f" en {resultado['segundos_mbtiles']:>7.2f} s  vista z{ZOOM_CIUDAD}: {resultado['vista']['teselas']}"
+              f" teselas, {resultado['vista']['bytes'] / 1024:.1f} KB")
+        for zoom in resultado['zooms']:
+            print(f"    z{zoom['zoom']:<3} {zoom['teselas']:>7} teselas  {zoom['bytes'] / 2 ** 20:>7.2f} MB"
+                  f"  máx. {zoom['bytes_maximo'] / 1024:>6.1f} KB")
+        for variante in resultado['variantes']:
+            print(f"  {variante['variante']:<28} {variante['bytes_html'] / 1024:>9.1f} KB  {variante['segundos']:>7.3f} s")
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False, default=int)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+# Benchmark de las vistas de la app con datos sintéticos a escala de ciudad (ver
+# datos_sinteticos.py): para cada escala genera los CSV, arma el almacén y corre la app
+# sin servidor (streamlit.testing.AppTest), como la ve un usuario que abre cada vista.
+# Por vista mide:
+#   - la primera ejecución (carga de las tablas compartidas más la vista inicial),
+#   - la vista abierta por primera vez (frío) y otra vez (caliente, con las cachés),
+#   - la memoria máxima del proceso,
+#   - el tamaño de lo que se manda al navegador: HTML de los mapas, JSON de los gráficos y
+#     Arrow de las tablas.
+#
+# Uso: python benchmarks/bench_vistas.py [--escalas 10 100 1000] [--vistas "Árboles y Especies" ...]
+#                                        [--instantaneas] [--salida resultados.json]
+#
+# Con --instantaneas se arma la instantánea con precalculo.py después de la ingesta y las
+# vistas se leen de ella (USAR_INSTANTANEAS=1), como con el proceso de precálculo corriendo.
+#
+# Los resultados en JSON (con el commit) sirven para comparar entre versiones. Cada vista
+# corre en un proceso aparte para que la memoria máxima sea la de esa vista, con el
+# directorio temporal como directorio de trabajo (la app lee ./data y styles.css). Con
+# escala 1000 los CSV ocupan unos 2 GB. Se corre desde la raíz del repositorio.
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+RUTA_APP = os.path.join(RAIZ, 'app.py')
+RUTA_PRECALCULO = os.path.join(RAIZ, 'precalculo.py')
+
+VISTA_INICIAL = 'Puntos y Espacios Verdes'
+
+# Vistas de la app y las funciones de app.py que ejercita cada una
+VISTAS = {
+    'Puntos y Espacios Verdes': ['TablasCompartidas.obtener', 'mostrar_mapa_puntos_espacios', 'mostrar_grafica_espacios_verdes'],
+    'Árboles y Especies': ['mostrar_mapa_calor_arboles'],
+    'Estado de Salud de Árboles': ['grafico_estado_salud', 'calcular_porcentaje_mal_estado'],
+    'Espacios Verdes en Barrios': ['mostrar_grafico_espacios_barrios'],
+    'Agenda de Mantenimiento': ['mostrar_agenda_mantenimiento'],
+    'Cobertura de Espacios Verdes': ['mostrar_cobertura_verde'],
+}
+
+# Tipos de elemento de Streamlit según lo que mandan al navegador
+ELEMENTOS_HTML = ['iframe']
+ELEMENTOS_JSON = ['plotly_chart']
+ELEMENTOS_TABLAS = ['dataframe']
+
+TIEMPO_MAXIMO_S = 3600
+
+
+def memoria_maxima_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def preparar(directorio, escala, instantaneas=False):
+    from almacen_datos import ingestar
+    from datos_sinteticos import generar
+
+    inicio = time.perf_counter()
+    filas = generar(os.path.join(directorio, 'data'), escala)
+    segundos_generar = time.perf_counter() - inicio
+    shutil.copy(os.path.join(RAIZ, 'styles.css'), directorio)
+
+    inicio = time.perf_counter()
+    ingestar(os.path.join(directorio, 'data'), os.path.join(directorio, 'data', 'almacen'))
+    resultado = {'filas': filas, 'segundos_generar': round(segundos_generar, 3),
+                 'segundos_ingesta': round(time.perf_counter() - inicio, 3)}
+
+    if instantaneas:
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, RUTA_PRECALCULO, '--una-vez'], cwd=directorio, check=True,
+                       capture_output=True)
+        resultado['segundos_precalculo'] = round(time.perf_counter() - inicio, 3)
+    return resultado
+
+
+def bytes_elementos(at, tipos):
+    return sum(elemento.proto.ByteSize() for tipo in tipos for elemento in at.get(tipo))
+
+
+def medir_vista(directorio, vista):
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(directorio)
+    at = AppTest.from_file(RUTA_APP, default_timeout=TIEMPO_MAXIMO_S)
+    inicio = time.perf_counter()
+    at.run()
+    segundos_carga = time.perf_counter() - inicio
+
+    segundos_frio = segundos_carga
+    if vista != VISTA_INICIAL:
+        inicio = time.perf_counter()
+        at.sidebar.selectbox(key='vista').set_value(vista).run()
+        segundos_frio = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    at.run()
+    segundos_caliente = time.perf_counter() - inicio
+
+    return {
+        'funciones': VISTAS[vista],
+        'segundos_carga_inicial': round(segundos_carga, 3),
+        'segundos_frio': round(segundos_frio, 3),
+        'segundos_caliente': round(segundos_caliente, 3),
+        'memoria_mb': memoria_maxima_mb(),
+        'bytes_html': bytes_elementos(at, ELEMENTOS_HTML),
+        'bytes_json': bytes_elementos(at, ELEMENTOS_JSON),
+        'bytes_tablas': bytes_elementos(at, ELEMENTOS_TABLAS),
+        'errores': [str(excepcion.value) for excepcion in at.exception],
+    }
+
+
+def commit_actual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def correr_caso(*argumentos):
+    salida = subprocess.run(
+        [sys.executable, os.path.abspath(__file__)] + [str(argumento) for argumento in argumentos],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(salida.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de las vistas de la app con datos sintéticos')
+    parser.add_argument('--escalas', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--vistas', nargs='+', choices=list(VISTAS), default=list(VISTAS))
+    parser.add_argument('--instantaneas', action='store_true',
+                        help='Leer las vistas de la instantánea armada por precalculo.py')
+    parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+    parser.add_argument('--caso', help=argparse.SUPPRESS)
+    parser.add_argument('--directorio', help=argparse.SUPPRESS)
+    parser.add_argument('--escala', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--vista', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Un paso corrido en un proceso aparte
+    if args.caso == 'preparar':
+        print(json.dumps(preparar(args.directorio, args.escala, args.instantaneas)))
+        return
+    if args.caso == 'vista':
+        print(json.dumps(medir_vista(args.directorio, args.vista)))
+        return
+
+    # Las vistas (procesos hijos) heredan la variable
+    if args.instantaneas:
+        from instantaneas import VARIABLE_INSTANTANEAS
+        os.environ[VARIABLE_INSTANTANEAS] = '1'
+
+    resultados = {'commit': commit_actual(), 'instantaneas': args.instantaneas, 'escalas': []}
+    for escala in args.escalas:
+        directorio = tempfile.mkdtemp(prefix='bench_vistas_')
+        try:
+            resultado = {'escala': escala, **correr_caso('--caso', 'preparar', '--directorio', directorio,
+                                                          '--escala', escala,
+                                                          *(['--instantaneas'] if args.instantaneas else []))}
+            print(f"escala {escala:>5}: {resultado['filas']['registro_arboles']:>9} árboles, "
+                  f"{resultado['filas']['mantenimiento_arboles']:>9} seguimientos "
+                  f"(ingesta {resultado['segundos_ingesta']:.2f} s"
+                  + (f", precálculo {resultado['segundos_precalculo']:.2f} s" if args.instantaneas else '') + ")")
+            resultado['vistas'] = {}
+            for vista in args.vistas:
+                medicion = correr_caso('--caso', 'vista', '--directorio', directorio, '--vista', vista)
+                resultado['vistas'][vista] = medicion
+                print(f"  {vista:<30} carga {medicion['segundos_carga_inicial']:>7.2f} s"
+                      f"  frío {medicion['segundos_frio']:>7.2f} s  caliente {medicion['segundos_caliente']:>6.2f} s"
+                      f"  {medicion['memoria_mb']:>7.1f} MB  html {medicion['bytes_html'] / 1024:>8.1f} KB"
+                      f"  json {medicion['bytes_json'] / 1024:>8.1f} KB  tablas {medicion['bytes_tablas'] / 1024:>7.1f} KB"
+                      + (f"  ERRORES: {medicion['errores']}" if medicion['errores'] else ''))
+        finally:
+            shutil.rmtree(directorio)
+        resultados['escalas'].append(resultado)
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+# Generador de datos sintéticos a escala de ciudad para los benchmarks: escribe los CSV
+# de origen (RegistroArboles_actualizado, MantenimientoArboles, EspaciosVerdes, Barrios y
+# PuntosVerdes) con las mismas columnas y formatos que los reales, `escala` veces más
+# grandes. Cada copia es la ciudad real completa (árboles, seguimientos, plazas, barrios
+# y puntos verdes) desplazada a otra celda de una grilla de ciudades vecinas, con
+# identificadores nuevos: así los barrios siguen conteniendo a sus árboles y espacios
+# verdes y las uniones espaciales se comportan como en la ciudad real. La grilla tiene
+# que caber en la caja de la provincia (fuera de ella las coordenadas no son válidas,
+# ver coordenadas.py); si no entra, todas las copias se achican por igual alrededor de su
+# centro. Los valores mal cargados del original (coordenadas con texto, GeoJSON roto) se
+# copian tal cual.
+#
+# Uso: python benchmarks/datos_sinteticos.py DIRECTORIO [--escala 10]
+#
+# Las filas se escriben ciudad por ciudad, así que la memoria no crece con la escala.
+import argparse
+import itertools
+import json
+import math
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import shapely
+from pyproj import Transformer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from almacen_datos import DIRECTORIO_DATOS, TABLAS
+from coordenadas import LIMITES_CORRIENTES
+from geometria_barrios import CRS_METRICO_CORRIENTES, CRS_WGS84, detectar_crs
+
+# Separación entre ciudades vecinas de la grilla y distancia mínima al borde de la provincia
+MARGEN_M = 2_000
+
+
+# Caja de la provincia en metros (el rectángulo que queda dentro de las cuatro esquinas)
+def caja_metros(transformador, margen=MARGEN_M):
+    (lat_min, lat_max), (lng_min, lng_max) = LIMITES_CORRIENTES['lat'], LIMITES_CORRIENTES['lng']
+    x, y = transformador.transform([lng_min, lng_min, lng_max, lng_max], [lat_min, lat_max, lat_min, lat_max])
+    return (max(x[0], x[1]) + margen, max(y[0], y[2]) + margen,
+            min(x[2], x[3]) - margen, min(y[1], y[3]) - margen)
+
+
+# Celdas (columna, fila) de la grilla de ciudades que caen dentro de la caja, ordenadas
+# desde la ciudad real (la celda (0, 0))
+def celdas_dentro(centro, ancho, alto, caja):
+    xmin, ymin, xmax, ymax = caja
+    columnas = range(math.ceil((xmin + ancho / 2 - centro[0]) / ancho), math.floor((xmax - ancho / 2 - centro[0]) / ancho) + 1)
+    filas = range(math.ceil((ymin + alto / 2 - centro[1]) / alto), math.floor((ymax - alto / 2 - centro[1]) / alto) + 1)
+    return sorted(itertools.product(columnas, filas), key=lambda celda: (max(abs(celda[0]), abs(celda[1])), celda[1], celda[0]))
+
+
+# Celdas para `cantidad` copias y el factor por el que hay que achicar cada copia para que
+# todas entren en la caja
+def celdas_grilla(cantidad, centro, ancho, alto, caja):
+    factor = 1.0
+    while True:
+        celdas = celdas_dentro(centro, ancho * factor, alto * factor, caja)
+        if len(celdas) >= cantidad:
+            return celdas[:cantidad], factor
+        factor *= 0.95
+
+
+# Mover coordenadas de la ciudad real a una celda de la grilla: en metros, se achican por
+# `factor` alrededor del centro de la ciudad y se desplazan `dx`, `dy`
+class Desplazador:
+    def __init__(self, crs_barrios):
+        self.a_metros = Transformer.from_crs(CRS_WGS84, CRS_METRICO_CORRIENTES, always_xy=True)
+        self.a_grados = Transformer.from_crs(CRS_METRICO_CORRIENTES, CRS_WGS84, always_xy=True)
+        self.barrios_a_metros = Transformer.from_crs(crs_barrios, CRS_METRICO_CORRIENTES, always_xy=True)
+        self.metros_a_barrios = Transformer.from_crs(CRS_METRICO_CORRIENTES, crs_barrios, always_xy=True)
+        self.centro = (0.0, 0.0)
+        self.factor = 1.0
+
+    def _mover(self, x, y, dx, dy):
+        cx, cy = self.centro
+        return (np.asarray(x) - cx) * self.factor + cx + dx, (np.asarray(y) - cy) * self.factor + cy + dy
+
+    # Mover puntos lat/lng (NaN queda NaN)
+    def lat_lng(self, lat, lng, dx, dy):
+        x, y = self.a_metros.transform(np.asarray(lng, dtype='float64'), np.asarray(lat, dtype='float64'))
+        lng, lat = self.a_grados.transform(*self._mover(x, y, dx, dy))
+        return np.asarray(lat), np.asarray(lng)
+
+    # Mover geometrías en el CRS de origen de los barrios
+    def geometrias_barrios(self, geometrias, dx, dy):
+        def mover(coordenadas):
+            x, y = self.barrios_a_metros.transform(coordenadas[:, 0], coordenadas[:, 1])
+            return np.column_stack(self.metros_a_barrios.transform(*self._mover(x, y, dx, dy)))
+        return shapely.transform(geometrias, mover)
+
+
+# Mover las coordenadas [lng, lat] anidadas de un GeoJSON ya decodificado
+def mover_geojson(geometria, desplazador, dx, dy):
+    def mover(coordenadas):
+        if coordenadas and isinstance(coordenadas[0], (int, float)):
+            return coordenadas
+        if coordenadas and isinstance(coordenadas[0][0], (int, float)):
+            puntos = np.asarray(coordenadas, dtype='float64')
+            lat, lng = desplazador.lat_lng(puntos[:, 1], puntos[:, 0], dx, dy)
+            return np.column_stack([lng, lat]).tolist()
+        return [mover(parte) for parte in coordenadas]
+    return dict(geometria, coordinates=mover(geometria['coordinates']))
+
+
+def leer_originales(directorio_datos):
+    return {nombre: pd.read_csv(os.path.join(directorio_datos, archivo), dtype=str, keep_default_na=False)
+            for nombre, archivo in TABLAS.items()}
+
+
+# Paso de identificadores para que cada copia tenga ids que no se pisen con las otras
+def paso_ids(valores):
+    numeros = pd.to_numeric(valores, errors='coerce')
+    return int(10 ** math.ceil(math.log10(max(numeros.max(), 1) + 1)))
+
+
+def sumar_ids(valores, desplazamiento):
+    numeros = pd.to_numeric(valores, errors='coerce')
+    return valores.where(numeros.isna(), (numeros + desplazamiento).astype('Int64').astype(str))
+
+
+# Reemplazar las coordenadas que son números; las que no (texto mal cargado, vacías) quedan igual
+def mover_columnas_lat_lng(df, desplazador, dx, dy):
+    lat = pd.to_numeric(df['lat'], errors='coerce')
+    lng = pd.to_numeric(df['lng'], errors='coerce')
+    validas = lat.notna() & lng.notna()
+    nuevas_lat, nuevas_lng = desplazador.lat_lng(lat[validas], lng[validas], dx, dy)
+    df.loc[validas, 'lat'] = nuevas_lat.astype(str)
+    df.loc[validas, 'lng'] = nuevas_lng.astype(str)
+    return df
+
+
+def generar(directorio, escala, directorio_datos=DIRECTORIO_DATOS):
+    originales = leer_originales(directorio_datos)
+    os.makedirs(directorio, exist_ok=True)
+
+    geometrias = shapely.from_wkt(originales['barrios']['the_geom_barrios'].replace('', None).to_numpy(dtype=object))
+    desplazador = Desplazador(detectar_crs(geometrias))
+    xmin, ymin, xmax, ymax = shapely.total_bounds(shapely.transform(geometrias, lambda c: np.column_stack(
+        desplazador.barrios_a_metros.transform(c[:, 0], c[:, 1])
+    )))
+    desplazador.centro = ((xmin + xmax) / 2, (ymin + ymax) / 2)
+    celdas, desplazador.factor = celdas_grilla(escala, desplazador.centro, xmax - xmin + MARGEN_M,
+                                               ymax - ymin + MARGEN_M, caja_metros(desplazador.a_metros))
+    ancho, alto = (xmax - xmin + MARGEN_M) * desplazador.factor, (ymax - ymin + MARGEN_M) * desplazador.factor
+
+    geojson = []
+    for texto in originales['espacios_verdes']['st_asgeojson']:
+        try:
+            geojson.append(json.loads(texto))
+        except ValueError:
+            geojson.append(None)
+
+    pasos = {
+        'id_arbol': paso_ids(pd.concat([originales['registro_arboles']['id_arbol'],
+                                        originales['mantenimiento_arboles']['id_arbol']])),
+        'id_seguimiento': paso_ids(originales['mantenimiento_arboles']['id_seguimiento']),
+        'gid_espacios': paso_ids(originales['espacios_verdes']['gid']),
+        'gid_puntos': paso_ids(originales['puntos_verdes']['gid']),
+        'id_barrios': paso_ids(pd.concat([originales['barrios']['id_barrios'],
+                                          originales['espacios_verdes']['id_barrios']])),
+    }
+
+    filas = dict.fromkeys(TABLAS, 0)
+    for copia, (columna, fila) in enumerate(celdas):
+        dx, dy = columna * ancho, fila * alto
+        # La ciudad real sin achicar se copia tal cual
+        mover = (dx, dy, desplazador.factor) != (0, 0, 1.0)
+        tablas = {nombre: df.copy() for nombre, df in originales.items()}
+
+        registro = tablas['registro_arboles']
+        registro['id_arbol'] = sumar_ids(registro['id_arbol'], copia * pasos['id_arbol'])
+        if mover:
+            mover_columnas_lat_lng(registro, desplazador, dx, dy)
+
+        seguimientos = tablas['mantenimiento_arboles']
+        seguimientos['id_seguimiento'] = sumar_ids(seguimientos['id_seguimiento'], copia * pasos['id_seguimiento'])
+        seguimientos['id_arbol'] = sumar_ids(seguimientos['id_arbol'], copia * pasos['id_arbol'])
+
+        espacios = tablas['espacios_verdes']
+        espacios['gid'] = sumar_ids(espacios['gid'], copia * pasos['gid_espacios'])
+        espacios['id_barrios'] = sumar_ids(espacios['id_barrios'], copia * pasos['id_barrios'])
+        if mover:
+            espacios['st_asgeojson'] = [
+                texto if geometria is None else json.dumps(mover_geojson(geometria, desplazador, dx, dy),
+                                                           separators=(',', ':'))
+                for texto, geometria in zip(originales['espacios_verdes']['st_asgeojson'], geojson)
+            ]
+
+        puntos = tablas['puntos_verdes']
+        puntos['gid'] = sumar_ids(puntos['gid'], copia * pasos['gid_puntos'])
+        if mover:
+            mover_columnas_lat_lng(puntos, desplazador, dx, dy)
+
+        barrios = tablas['barrios']
+        barrios['id_barrios'] = sumar_ids(barrios['id_barrios'], copia * pasos['id_barrios'])
+        if mover:
+            movidas = desplazador.geometrias_barrios(geometrias, dx, dy)
+            barrios['the_geom_barrios'] = [
+                texto if geometria is None else shapely.to_wkt(geometria, rounding_precision=-1)
+                for texto, geometria in zip(originales['barrios']['the_geom_barrios'], movidas)
+            ]
+
+        for nombre, df in tablas.items():
+            df.to_csv(os.path.join(directorio, TABLAS[nombre]), mode='w' if copia == 0 else 'a',
+                      header=copia == 0, index=False)
+            filas[nombre] += len(df)
+    return filas
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generar datos sintéticos a escala de ciudad')
+    parser.add_argument('directorio', help='Directorio donde escribir los CSV')
+    parser.add_argument('--escala', type=int, default=10, help='Copias de la ciudad')
+    args = parser.parse_args()
+    for nombre, cantidad in generar(args.directorio, args.escala).items():
+        print(f"{TABLAS[nombre]:<36} {cantidad:>10} filas")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+import functools
+import threading
+from collections import OrderedDict
+
+from instrumentacion import anotar, medir
+
+# Cantidad máxima de mapas y gráficos guardados (los mapas ocupan entre 100 KB y 1 MB)
+MAXIMO_ENTRADAS = 32
+
+
+# Serializar un mapa de folium a HTML (igual que folium_static) o una figura de plotly a JSON
+def serializar(valor):
+    # folium se importa recién acá, así las vistas sin mapas no lo cargan
+    if type(valor).__module__.startswith('folium'):
+        import folium
+        return folium.Figure().add_child(valor).render()
+    if hasattr(valor, 'to_json'):
+        return valor.to_json()
+    return valor
+
+
+def tamaño(valor):
+    return len(valor) if isinstance(valor, (str, bytes)) else None
+
+
+# Caché LRU de mapas y gráficos ya serializados. Se comparte entre reruns y sesiones de
+# Streamlit, por eso las operaciones sobre las entradas van con un lock.
+class CacheFiguras:
+    def __init__(self, maximo=MAXIMO_ENTRADAS):
+        self.maximo = maximo
+        self.aciertos = 0
+        self.fallos = 0
+        # Instantánea de la que se leen las figuras que no están en memoria (ver instantaneas.py)
+        self.instantanea = None
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    # Devolver el valor guardado para `clave` o construirlo, serializarlo y guardarlo
+    def obtener(self, clave, construir):
+        with self._lock:
+            if clave in self._entradas:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                valor = self._entradas[clave]
+                anotar(cache='acierto', bytes=tamaño(valor))
+                return valor
+            self.fallos += 1
+
+        # Figura ya armada en la instantánea; si no está, se arma (y en preparación se guarda)
+        instantanea = self.instantanea
+        valor = instantanea.leer_figura(clave) if instantanea is not None else None
+        if valor is None:
+            anotar(cache='fallo')
+            valor = serializar(construir())
+            if instantanea is not None:
+                instantanea.guardar_figura(clave, valor)
+        else:
+            anotar(cache='instantanea')
+        with self._lock:
+            self._entradas[clave] = valor
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.maximo:
+                self._entradas.popitem(last=False)
+        anotar(bytes=tamaño(valor))
+        return valor
+
+    # Decorador: la clave es el nombre de la función más sus argumentos (por ejemplo
+    # la versión de los datos y la clasificación elegida). Cada llamada se mide como una
+    # figura del rerun (ver instrumentacion.py).
+    def memorizar(self, funcion):
+        @functools.wraps(funcion)
+        def envuelta(*args):
+            with medir(funcion.__name__, 'figura'):
+                return self.obtener((funcion.__name__,) + args, lambda: funcion(*args))
+        return envuelta
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+            self.aciertos = 0
+            self.fallos = 0
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'entradas': len(self._entradas),
+                'maximo': self.maximo,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': self.aciertos / consultas if consultas else 0.0,
+                'bytes': sum(tamaño(v) or 0 for v in self._entradas.values()),
+            }
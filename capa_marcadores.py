@@ -0,0 +1,122 @@
+import json
+
+import numpy as np
+import pandas as pd
+from folium.plugins import MarkerCluster
+from folium.template import Template
+
+# Las coordenadas se mandan como enteros en unidades de 1e-5 grados (≈ 1 m) respecto de
+# la esquina sudoeste de los puntos: en la ciudad son números de 4 o 5 cifras
+ESCALA_COORDENADAS = 100_000
+
+TEXTO_SIN_DATO = 'Sin información'
+
+
+# Codificar una columna de atributos para el navegador: los números van tal cual (NaN
+# como null) y los textos como un código por fila más la lista de categorías
+def codificar_atributo(valores):
+    serie = pd.Series(valores).reset_index(drop=True).infer_objects()
+    if pd.api.types.is_bool_dtype(serie) or not pd.api.types.is_numeric_dtype(serie):
+        codigos, categorias = pd.factorize(serie.astype(object), use_na_sentinel=True)
+        return {'categorias': [str(c) for c in categorias], 'codigos': codigos.tolist()}
+    if pd.api.types.is_integer_dtype(serie) and not serie.isna().any():
+        return serie.astype('int64').tolist()
+    numeros = serie.astype('float64').to_numpy()
+    if np.all(np.isnan(numeros) | (numeros == np.round(numeros))):
+        return [None if np.isnan(v) else int(v) for v in numeros.tolist()]
+    return [None if np.isnan(v) else v for v in numeros.tolist()]
+
+
+# Armar los datos compactos de la capa: coordenadas en enteros y atributos por columna
+def datos_marcadores(lat, lng, atributos=None):
+    lat = np.asarray(lat, dtype='float64')
+    lng = np.asarray(lng, dtype='float64')
+    validos = ~(np.isnan(lat) | np.isnan(lng))
+    lat, lng = lat[validos], lng[validos]
+    origen_lat = float(lat.min()) if len(lat) else 0.0
+    origen_lng = float(lng.min()) if len(lng) else 0.0
+
+    columnas = {}
+    for nombre, valores in (atributos or {}).items():
+        columnas[nombre] = codificar_atributo(pd.Series(valores).reset_index(drop=True)[validos])
+
+    return {
+        'origen': [origen_lat, origen_lng],
+        'escala': ESCALA_COORDENADAS,
+        'lat': np.round((lat - origen_lat) * ESCALA_COORDENADAS).astype('int64').tolist(),
+        'lng': np.round((lng - origen_lng) * ESCALA_COORDENADAS).astype('int64').tolist(),
+        'atributos': columnas,
+    }
+
+
+# Capa de marcadores agrupados que se arma en el navegador a partir de arreglos: un
+# solo ícono compartido y el texto de cada popup se genera recién al abrirlo,
+# reemplazando las {columnas} de la plantilla por los atributos del punto
+class CapaMarcadores(MarkerCluster):
+    _template = Template(u"""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function() {
+                var datos = {{ this.datos }};
+                var icono = L.AwesomeMarkers.icon({{ this.icono|tojson }});
+                var plantilla = {{ this.plantilla|tojson }};
+                var sinDato = {{ this.sin_dato|tojson }};
+
+                function valor(columna, i) {
+                    var atributo = datos.atributos[columna];
+                    if (atributo === undefined) { return '{' + columna + '}'; }
+                    var v = Array.isArray(atributo) ? atributo[i]
+                        : (atributo.codigos[i] < 0 ? null : atributo.categorias[atributo.codigos[i]]);
+                    return v === null ? sinDato : String(v);
+                }
+
+                function popup(i) {
+                    var div = document.createElement('div');
+                    div.textContent = plantilla.replace(/\\{(\\w+)\\}/g, function(_, columna) {
+                        return valor(columna, i);
+                    });
+                    return div;
+                }
+
+                var cluster = L.markerClusterGroup({{ this.options|tojavascript }});
+                var marcadores = new Array(datos.lat.length);
+                for (var i = 0; i < datos.lat.length; i++) {
+                    var marcador = L.marker([
+                        datos.origen[0] + datos.lat[i] / datos.escala,
+                        datos.origen[1] + datos.lng[i] / datos.escala
+                    ], {icon: icono});
+                    {% if this.plantilla %}marcador.bindPopup(popup.bind(null, i));{% endif %}
+                    marcadores[i] = marcador;
+                }
+                cluster.addLayers(marcadores);
+                {% if this.show %}cluster.addTo({{ this._parent.get_name() }});{% endif %}
+                return cluster;
+            })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, lat, lng, atributos=None, plantilla_popup=None, color='green', icono='leaf',
+                 name=None, overlay=True, control=True, show=True, **kwargs):
+        kwargs.setdefault('chunked_loading', True)
+        super().__init__(name=name, overlay=overlay, control=control, show=show, **kwargs)
+        self._name = 'CapaMarcadores'
+        # Los datos van dentro de un <script>: un texto con "</script>" lo cerraría, así que
+        # cada "<" se escribe como \u003c (en JSON y en JavaScript es el mismo carácter)
+        self.datos = json.dumps(datos_marcadores(lat, lng, atributos), ensure_ascii=False,
+                                separators=(',', ':')).replace('<', '\\u003c')
+        self.icono = {'markerColor': color, 'icon': icono, 'prefix': 'glyphicon', 'iconColor': 'white'}
+        self.plantilla = plantilla_popup or ''
+        self.sin_dato = TEXTO_SIN_DATO
+
+
+# Agregar al mapa una capa de marcadores a partir de un DataFrame con lat y lng.
+# `plantilla_popup` usa las columnas entre llaves, por ejemplo "Árbol: {id_arbol}".
+def agregar_marcadores(mapa, df, plantilla_popup=None, columnas=None, color='green', icono='leaf', nombre=None):
+    if columnas is None:
+        columnas = [c for c in df.columns if plantilla_popup and '{' + c + '}' in plantilla_popup]
+    capa = CapaMarcadores(
+        df['lat'].to_numpy(dtype='float64'), df['lng'].to_numpy(dtype='float64'),
+        atributos={c: df[c] for c in columnas}, plantilla_popup=plantilla_popup,
+        color=color, icono=icono, name=nombre
+    )
+    capa.add_to(mapa)
+    return capa
@@ -0,0 +1,79 @@
+import folium
+from folium.elements import JSCSSMixin
+from folium.template import Template
+
+from teselas_vectoriales import CAPAS, ZOOM_MAXIMO
+
+TEXTO_SIN_DATO = 'Sin información'
+
+
+# Capa de Leaflet que dibuja una de las capas de las teselas vectoriales (ver
+# teselas_vectoriales.py) con Leaflet.VectorGrid: el navegador pide solo las teselas que se
+# ven y el HTML del mapa no lleva ninguna geometría. Las demás capas de la tesela no se
+# dibujan. Opcionalmente:
+# - `colores`: color de relleno por valor de la propiedad `clave` (mapas coropléticos)
+# - `filtro`: (propiedad, valor) de los elementos que se dibujan
+# - `plantilla_popup`: texto al hacer clic, con las propiedades entre llaves; {valor} es el
+#   de `valores` para la `clave` del elemento
+class CapaTeselas(JSCSSMixin, folium.map.Layer):
+    _template = Template(u"""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function() {
+                var colores = {{ this.colores|tojson }};
+                var valores = {{ this.valores|tojson }};
+                var clave = {{ this.clave|tojson }};
+                var filtro = {{ this.filtro|tojson }};
+                var estilo = {{ this.estilo|tojson }};
+                var plantilla = {{ this.plantilla|tojson }};
+                var sinDato = {{ this.sin_dato|tojson }};
+
+                var estilos = {};
+                {{ this.capas|tojson }}.forEach(function(capa) { estilos[capa] = []; });
+                estilos[{{ this.capa|tojson }}] = function(p) {
+                    if (filtro !== null && String(p[filtro[0]]) !== filtro[1]) { return []; }
+                    var s = Object.assign({}, estilo);
+                    if (colores !== null) { s.fillColor = colores[p[clave]] || '#cccccc'; }
+                    return s;
+                };
+
+                var capa = L.vectorGrid.protobuf({{ this.url|tojson }}, {
+                    vectorTileLayerStyles: estilos,
+                    interactive: plantilla !== '',
+                    maxNativeZoom: {{ this.zoom_maximo }}
+                });
+                if (plantilla !== '') {
+                    capa.on('click', function(e) {
+                        var p = e.layer.properties;
+                        var div = document.createElement('div');
+                        div.textContent = plantilla.replace(/\\{(\\w+)\\}/g, function(_, columna) {
+                            var v = columna === 'valor' && valores !== null ? valores[p[clave]] : p[columna];
+                            return v === undefined || v === null ? sinDato : String(v);
+                        });
+                        L.popup().setLatLng(e.latlng).setContent(div).openOn({{ this._parent.get_name() }});
+                    });
+                }
+                {% if this.show %}capa.addTo({{ this._parent.get_name() }});{% endif %}
+                return capa;
+            })();
+        {% endmacro %}
+    """)
+
+    default_js = [
+        ('vectorGrid', 'https://unpkg.com/leaflet.vectorgrid@1.3.0/dist/Leaflet.VectorGrid.bundled.js'),
+    ]
+
+    def __init__(self, url, capa, estilo, colores=None, valores=None, clave=None, filtro=None,
+                 plantilla_popup=None, name=None, overlay=True, control=True, show=True):
+        super().__init__(name=name, overlay=overlay, control=control, show=show)
+        self._name = 'CapaTeselas'
+        self.url = url
+        self.capa = capa
+        self.capas = list(CAPAS)
+        self.estilo = {'fill': True, **estilo}
+        self.colores = colores
+        self.valores = valores
+        self.clave = clave
+        self.filtro = None if filtro is None else [filtro[0], str(filtro[1])]
+        self.plantilla = plantilla_popup or ''
+        self.sin_dato = TEXTO_SIN_DATO
+        self.zoom_maximo = ZOOM_MAXIMO
@@ -0,0 +1,132 @@
+import os
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from almacen_datos import (DIRECTORIO_ALMACEN, DIRECTORIO_DATOS, TABLAS, borrar_anteriores, cargar_tabla,
+                           cargar_tabla_derivada, guardar_tabla_derivada, version_datos)
+from cubo_barrios import poligonos_espacios
+from geometria_barrios import CRS_METRICO_CORRIENTES, CRS_WGS84, proyectar_puntos, reproyectar
+from normalizacion import normalizar_tabla
+
+# Distancia (en metros) a la que un árbol o una parte de un barrio cuenta como cubierta
+# por un espacio verde o un punto verde
+RADIO_COBERTURA_M = 300
+
+PREFIJO_DISTANCIAS = 'distancias_verdes_'
+PREFIJO_COBERTURA = 'cobertura_verde_'
+
+
+# Geometrías verdes en metros (CRS métrico de Corrientes): los polígonos de los espacios
+# verdes y los puntos verdes
+def geometrias_verdes(directorio_datos=DIRECTORIO_DATOS, directorio_almacen=DIRECTORIO_ALMACEN):
+    from geojson_espacios import decodificar_espacios_verdes
+
+    espacios_verdes = cargar_tabla('espacios_verdes', ['gid'], directorio_datos, directorio_almacen)
+    anillos, _ = decodificar_espacios_verdes(os.path.join(directorio_datos, TABLAS['espacios_verdes']))
+    poligonos, _ = poligonos_espacios([anillos.get(gid) for gid in espacios_verdes['gid']])
+    poligonos = shapely.make_valid(poligonos)
+
+    puntos_verdes = normalizar_tabla('puntos_verdes', cargar_tabla(
+        'puntos_verdes', ['lat', 'lng'], directorio_datos, directorio_almacen
+    )).dropna(subset=['lat', 'lng'])
+    puntos = shapely.points(*proyectar_puntos(puntos_verdes['lat'], puntos_verdes['lng']))
+    return poligonos, puntos
+
+
+# Distancia en metros de cada punto (x, y) a la geometría más cercana. Las geometrías van
+# a un índice espacial (STRtree) y para cada punto solo se mide la distancia exacta a los
+# bordes de las candidatas más cercanas (GEOS, sobre todos los puntos de una vez); un
+# punto dentro de un polígono está a 0 m. Sin coordenadas o sin geometrías da NaN.
+def distancia_mas_cercana(x, y, geometrias):
+    distancias = np.full(len(x), np.nan)
+    if len(geometrias) == 0 or len(x) == 0:
+        return distancias
+    puntos = shapely.points(x, y)
+    indices, cercanas = shapely.STRtree(geometrias).query_nearest(puntos, return_distance=True, all_matches=False)
+    distancias[indices[0]] = cercanas
+    return distancias
+
+
+# Distancia de cada árbol al espacio verde y al punto verde más cercanos
+def distancias_arboles(registro_arboles_df, poligonos, puntos):
+    arboles = registro_arboles_df[['id_arbol', 'lat', 'lng']].drop_duplicates(subset='id_arbol', keep='first')
+    x, y = proyectar_puntos(arboles['lat'], arboles['lng'])
+    return pd.DataFrame({
+        'id_arbol': arboles['id_arbol'].to_numpy(),
+        'distancia_espacio_verde_m': distancia_mas_cercana(x, y, poligonos),
+        'distancia_punto_verde_m': distancia_mas_cercana(x, y, puntos),
+    })
+
+
+# Distancias de los árboles de la versión actual de los datos, guardadas en el almacén
+def cargar_distancias_arboles(directorio_datos=DIRECTORIO_DATOS, directorio_almacen=DIRECTORIO_ALMACEN):
+    version = version_datos(directorio_datos, tablas=['registro_arboles', 'espacios_verdes', 'puntos_verdes'])
+    nombre = PREFIJO_DISTANCIAS + version
+    distancias = cargar_tabla_derivada(nombre, directorio_almacen)
+    if distancias is None:
+        registro = normalizar_tabla('registro_arboles', cargar_tabla(
+            'registro_arboles', ['id_arbol', 'lat', 'lng'], directorio_datos, directorio_almacen
+        ))
+        distancias = distancias_arboles(registro, *geometrias_verdes(directorio_datos, directorio_almacen))
+        guardar_tabla_derivada(nombre, distancias, directorio_almacen)
+        borrar_anteriores(PREFIJO_DISTANCIAS, nombre, directorio_almacen)
+    return distancias
+
+
+# Porcentaje del área de cada barrio a menos de `radio` metros de un espacio verde y de un
+# punto verde: se unen los buffers de todas las geometrías en una sola zona cubierta y se
+# intersecta con todos los barrios a la vez. Los barrios cargados en más de una fila se
+# suman por id_barrios.
+def cobertura_barrios(barrios_df, poligonos, puntos, radio=RADIO_COBERTURA_M):
+    geometrias = shapely.from_wkb(barrios_df['the_geom_barrios_wkb'].to_numpy(dtype=object))
+    geometrias = shapely.make_valid(reproyectar(geometrias, CRS_WGS84, CRS_METRICO_CORRIENTES))
+    areas = pd.DataFrame({'id_barrios': barrios_df['id_barrios'].to_numpy(), 'area_m2': shapely.area(geometrias)})
+    for nombre, verdes in [('espacios', poligonos), ('puntos', puntos)]:
+        zona = shapely.union_all(shapely.buffer(verdes, radio)) if len(verdes) else shapely.Polygon()
+        areas[f'area_cubierta_{nombre}_m2'] = shapely.area(shapely.intersection(geometrias, zona))
+
+    cobertura = areas.groupby('id_barrios', as_index=False).sum()
+    area = cobertura['area_m2'].where(cobertura['area_m2'] > 0)
+    for nombre in ['espacios', 'puntos']:
+        cobertura[f'porcentaje_cubierto_{nombre}'] = (cobertura[f'area_cubierta_{nombre}_m2'] / area * 100).fillna(0.0)
+    return cobertura
+
+
+# Cobertura por barrio de la versión actual de los datos, guardada en el almacén, con el
+# nombre del barrio, la cantidad de árboles y el porcentaje de ellos a menos de
+# RADIO_COBERTURA_M de un espacio verde
+def cargar_cobertura(directorio_datos=DIRECTORIO_DATOS, directorio_almacen=DIRECTORIO_ALMACEN):
+    from barrios_espacial import asignar_arboles
+
+    version = version_datos(directorio_datos, tablas=['registro_arboles', 'espacios_verdes', 'puntos_verdes', 'barrios'])
+    nombre = PREFIJO_COBERTURA + version
+    cobertura = cargar_tabla_derivada(nombre, directorio_almacen)
+    if cobertura is None:
+        barrios = cargar_tabla('barrios', ['id_barrios', 'nombre_barrio', 'the_geom_barrios_wkb'],
+                               directorio_datos, directorio_almacen)
+        cobertura = cobertura_barrios(barrios, *geometrias_verdes(directorio_datos, directorio_almacen))
+
+        registro = normalizar_tabla('registro_arboles', cargar_tabla(
+            'registro_arboles', ['id_arbol', 'lat', 'lng'], directorio_datos, directorio_almacen
+        ))
+        arboles = asignar_arboles(registro, directorio_datos, directorio_almacen).merge(
+            cargar_distancias_arboles(directorio_datos, directorio_almacen), on='id_arbol', how='inner'
+        ).dropna(subset=['id_barrios'])
+        arboles['cubierto'] = arboles['distancia_espacio_verde_m'] <= RADIO_COBERTURA_M
+        por_barrio = arboles.groupby('id_barrios').agg(
+            cantidad_arboles=('id_arbol', 'size'), arboles_cubiertos=('cubierto', 'sum')
+        ).reset_index()
+        por_barrio['id_barrios'] = por_barrio['id_barrios'].astype(cobertura['id_barrios'].dtype)
+
+        nombres = barrios.drop_duplicates(subset='id_barrios')[['id_barrios', 'nombre_barrio']]
+        cobertura = nombres.merge(cobertura, on='id_barrios').merge(por_barrio, on='id_barrios', how='left')
+        cobertura[['cantidad_arboles', 'arboles_cubiertos']] = (
+            cobertura[['cantidad_arboles', 'arboles_cubiertos']].fillna(0).astype('int64')
+        )
+        cantidad = cobertura['cantidad_arboles'].where(cobertura['cantidad_arboles'] > 0)
+        cobertura['porcentaje_arboles_cubiertos'] = (cobertura['arboles_cubiertos'] / cantidad * 100).fillna(0.0)
+        guardar_tabla_derivada(nombre, cobertura, directorio_almacen)
+        borrar_anteriores(PREFIJO_COBERTURA, nombre, directorio_almacen)
+    return cobertura
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+# Caja que contiene a la provincia de Corrientes (grados WGS84)
+LIMITES_CORRIENTES = {
+    'lat': (-30.8, -27.2),
+    'lng': (-59.7, -55.6),
+}
+
+# Códigos de diagnóstico por celda / fila, ordenados de menor a mayor gravedad
+COORDENADA_VALIDA = 0        # El valor ya era numérico y está dentro de la caja
+COORDENADA_REPARADA = 1      # Se limpiaron caracteres o puntos sobrantes y quedó válido
+COORDENADA_VACIA = 2         # Sin valor
+COORDENADA_NO_NUMERICA = 3   # No se pudo convertir a número ni siquiera limpiándolo
+COORDENADA_FUERA_DE_RANGO = 4  # Numérico pero fuera de la caja de Corrientes
+
+DESCRIPCION_DIAGNOSTICOS = {
+    COORDENADA_VALIDA: 'válida',
+    COORDENADA_REPARADA: 'reparada',
+    COORDENADA_VACIA: 'vacía',
+    COORDENADA_NO_NUMERICA: 'no numérica',
+    COORDENADA_FUERA_DE_RANGO: 'fuera de rango',
+}
+
+
+# Reparar los textos que no se pudieron leer como número: quitar todo lo que no sea
+# dígito, punto o signo negativo y dejar solo el primer punto decimal
+def reparar_textos(textos):
+    limpio = textos.astype('string').str.strip().str.replace(r'[^0-9.\-]', '', regex=True)
+    partes = limpio.str.partition('.')
+    limpio = partes[0] + partes[1] + partes[2].str.replace('.', '', regex=False)
+    return pd.to_numeric(limpio, errors='coerce')
+
+
+# Sanear una columna de coordenadas ('lat' o 'lng'). Devuelve los valores como float
+# (NaN si no son válidos) y el código de diagnóstico de cada celda.
+def sanear_coordenada(valores, eje, limites=LIMITES_CORRIENTES):
+    serie = pd.Series(valores, copy=False).reset_index(drop=True)
+    vacios = serie.isna().to_numpy()
+
+    # Camino rápido: la mayoría de las celdas ya son números válidos
+    numeros = pd.to_numeric(serie, errors='coerce').to_numpy(dtype='float64', na_value=np.nan, copy=True)
+    codigos = np.full(len(serie), COORDENADA_VALIDA, dtype=np.int8)
+
+    # Solo las celdas que fallaron pasan por la reparación de texto
+    a_reparar = np.isnan(numeros) & ~vacios
+    if a_reparar.any():
+        textos = serie[a_reparar]
+        reparados = reparar_textos(textos).to_numpy(dtype='float64', na_value=np.nan)
+        numeros[a_reparar] = reparados
+        codigos[a_reparar] = np.where(np.isnan(reparados), COORDENADA_NO_NUMERICA, COORDENADA_REPARADA)
+        # Textos vacíos o solo con espacios cuentan como celdas vacías
+        en_blanco = textos.astype('string').str.strip().eq('').fillna(True).to_numpy()
+        indices = np.flatnonzero(a_reparar)[en_blanco]
+        codigos[indices] = COORDENADA_VACIA
+
+    codigos[vacios] = COORDENADA_VACIA
+
+    minimo, maximo = limites[eje]
+    fuera = ~np.isnan(numeros) & ((numeros < minimo) | (numeros > maximo))
+    codigos[fuera] = COORDENADA_FUERA_DE_RANGO
+    numeros[fuera] = np.nan
+
+    return numeros, codigos
+
+
+# Sanear lat y lng de un DataFrame. Devuelve una copia con las coordenadas como float
+# y la columna 'diagnostico_coordenadas' con el peor código de las dos.
+def sanear_coordenadas(df, columna_lat='lat', columna_lng='lng', limites=LIMITES_CORRIENTES):
+    lat, codigos_lat = sanear_coordenada(df[columna_lat], 'lat', limites)
+    lng, codigos_lng = sanear_coordenada(df[columna_lng], 'lng', limites)
+
+    resultado = df.copy()
+    resultado[columna_lat] = lat
+    resultado[columna_lng] = lng
+    resultado['diagnostico_coordenadas'] = np.maximum(codigos_lat, codigos_lng)
+    return resultado
+
+
+# Resumen de cuántas filas quedaron con cada diagnóstico
+def resumen_diagnosticos(df, columna='diagnostico_coordenadas'):
+    conteo = df[columna].value_counts().reindex(list(DESCRIPCION_DIAGNOSTICOS), fill_value=0)
+    conteo.index = [DESCRIPCION_DIAGNOSTICOS[codigo] for codigo in conteo.index]
+    return conteo
@@ -0,0 +1,233 @@
+import json
+import math
+
+import folium
+import numpy as np
+import pandas as pd
+import shapely
+from branca.colormap import StepColormap, linear
+from branca.element import Figure, JavascriptLink, MacroElement
+from jinja2 import Template
+
+from almacen_datos import (DIRECTORIO_ALMACEN, DIRECTORIO_DATOS, cargar_tabla, cargar_tabla_derivada,
+                           guardar_tabla_derivada, version_datos)
+
+# Decimales de las coordenadas en el GeoJSON (1e-6 grados ≈ 0,1 m)
+DECIMALES = 6
+
+# Niveles de detalle precalculados: para cada zoom se simplifica con una tolerancia de
+# medio píxel de pantalla, por lo que la pérdida no es visible en ese zoom o en menores
+ZOOMS_DETALLE = (11, 13, 15)
+
+LATITUD_CORRIENTES = -27.48
+METROS_POR_GRADO = 111_320
+
+PREFIJO_NIVELES = 'barrios_niveles_'
+
+
+def metros_por_pixel(zoom, latitud=LATITUD_CORRIENTES):
+    return 156_543.03392 * math.cos(math.radians(latitud)) / 2 ** zoom
+
+
+# Tolerancia de simplificación (en grados) para un nivel de zoom
+def tolerancia_zoom(zoom):
+    return metros_por_pixel(zoom) / 2 / METROS_POR_GRADO
+
+
+# Simplificar los polígonos preservando la topología. Con GEOS >= 3.12 se simplifica la
+# cobertura completa, así los bordes compartidos entre barrios vecinos se simplifican
+# igual y no aparecen huecos; las geometrías que no queden válidas se simplifican solas.
+def simplificar(geometrias, tolerancia):
+    simplificadas = None
+    if hasattr(shapely, 'coverage_simplify'):
+        try:
+            simplificadas = shapely.coverage_simplify(geometrias, tolerancia)
+        except shapely.errors.GEOSException:
+            simplificadas = None
+    if simplificadas is None:
+        simplificadas = shapely.simplify(geometrias, tolerancia, preserve_topology=True)
+    else:
+        invalidas = ~shapely.is_valid(simplificadas)
+        simplificadas[invalidas] = shapely.simplify(geometrias[invalidas], tolerancia, preserve_topology=True)
+    return shapely.transform(simplificadas, lambda coordenadas: np.round(coordenadas, DECIMALES))
+
+
+# Unir en una sola geometría los polígonos que comparten id_barrios (hay barrios
+# cargados en más de una fila)
+def unir_por_barrio(geometrias, codigos, cantidad):
+    partes, indices = shapely.get_parts(geometrias, return_index=True)
+    orden = np.argsort(codigos[indices], kind='stable')
+    unidas = shapely.multipolygons(partes[orden], indices=codigos[indices][orden])
+    # Los barrios de una sola parte vuelven a ser Polygon
+    simples = shapely.get_num_geometries(unidas) == 1
+    unidas[simples] = shapely.get_geometry(unidas[simples], 0)
+    return unidas[:cantidad]
+
+
+# Precalcular los niveles de detalle de los barrios (uno por zoom de ZOOMS_DETALLE),
+# con una fila por id_barrios
+def precalcular_niveles(barrios_df, zooms=ZOOMS_DETALLE):
+    geometrias = shapely.from_wkb(barrios_df['the_geom_barrios_wkb'].to_numpy(dtype=object))
+    codigos, ids = pd.factorize(barrios_df['id_barrios'])
+    niveles = pd.DataFrame({'id_barrios': ids})
+    for zoom in zooms:
+        simplificadas = simplificar(geometrias, tolerancia_zoom(zoom))
+        niveles[f'wkb_z{zoom}'] = shapely.to_wkb(unir_por_barrio(simplificadas, codigos, len(ids)))
+    return niveles
+
+
+# Niveles de detalle de la versión actual de Barrios.csv, guardados junto al almacén
+def cargar_niveles(directorio_datos=DIRECTORIO_DATOS, directorio_almacen=DIRECTORIO_ALMACEN):
+    nombre = PREFIJO_NIVELES + version_datos(directorio_datos, tablas=['barrios'])
+    niveles = cargar_tabla_derivada(nombre, directorio_almacen)
+    if niveles is None:
+        barrios = cargar_tabla('barrios', ['id_barrios', 'the_geom_barrios_wkb'], directorio_datos, directorio_almacen)
+        niveles = precalcular_niveles(barrios)
+        guardar_tabla_derivada(nombre, niveles, directorio_almacen)
+    return niveles
+
+
+# Nivel de detalle a usar para un zoom: el más simplificado que no pierde detalle visible
+def zoom_detalle(zoom, zooms=ZOOMS_DETALLE):
+    candidatos = [nivel for nivel in zooms if nivel >= zoom]
+    return min(candidatos) if candidatos else max(zooms)
+
+
+# Armar el texto GeoJSON de los barrios con solo las propiedades necesarias. Va dentro
+# de un <script>, así que cada "<" de las propiedades se escribe como \u003c.
+def geojson_barrios(geometrias, propiedades):
+    textos = shapely.to_geojson(geometrias)
+    registros = [json.dumps(registro, ensure_ascii=False, default=str).replace('<', '\\u003c')
+                 for registro in propiedades.to_dict(orient='records')]
+    features = [
+        f'{{"type":"Feature","properties":{registro},"geometry":{texto}}}'
+        for registro, texto in zip(registros, textos) if texto is not None
+    ]
+    return '{"type":"FeatureCollection","features":[' + ','.join(features) + ']}'
+
+
+# GeoJSON que se escribe una sola vez en la página y comparten todas las capas
+class DatosGeoJSON(MacroElement):
+    _template = Template(u"""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = {{ this.datos }};
+        {% endmacro %}
+    """)
+
+    def __init__(self, datos):
+        super().__init__()
+        self._name = 'DatosGeoJSON'
+        self.datos = datos
+
+
+# Capa coroplética que pinta los polígonos de un DatosGeoJSON compartido. Solo lleva
+# el color de cada barrio, no la geometría.
+class CapaCoropletica(folium.map.Layer):
+    _template = Template(u"""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = L.geoJson({{ this.datos.get_name() }}, {
+                style: function(feature) {
+                    var colores = {{ this.colores|tojson }};
+                    return {
+                        fillColor: colores[feature.properties.{{ this.clave }}] || '#cccccc',
+                        fillOpacity: {{ this.fill_opacity }},
+                        color: 'black',
+                        weight: 1,
+                        opacity: {{ this.line_opacity }}
+                    };
+                }
+            });
+            {{ this.get_name() }}.bindTooltip(function(capa) {
+                var p = capa.feature.properties;
+                return '<b>' + p.nombre_barrio + '</b><br>{{ this.etiqueta }}: ' + p.{{ this.columna }};
+            });
+            {% if this.show %}{{ this.get_name() }}.addTo({{ this._parent.get_name() }});{% endif %}
+        {% endmacro %}
+    """)
+
+    def __init__(self, datos, colores, clave, columna, etiqueta, name=None, fill_opacity=0.7,
+                 line_opacity=0.2, overlay=True, control=True, show=True):
+        super().__init__(name=name, overlay=overlay, control=control, show=show)
+        self._name = 'CapaCoropletica'
+        self.datos = datos
+        self.colores = colores
+        self.clave = clave
+        self.columna = columna
+        self.etiqueta = etiqueta
+        self.fill_opacity = fill_opacity
+        self.line_opacity = line_opacity
+
+
+# Leyenda escalonada compacta: branca muestrea 500 colores para cualquier escala, acá
+# solo se escriben los bordes de cada escalón
+class LeyendaEscalonada(StepColormap):
+    def render(self, **kwargs):
+        self.index = [float(i) for i in self.index]
+        self.color_domain = self.index
+        colores = [self.rgba_hex_str(x) for x in self.index[:-1]]
+        self.color_range = [colores[0]] + colores + [colores[-1]]
+        if self.tick_labels is None:
+            self.tick_labels = self.index
+        MacroElement.render(self, **kwargs)
+
+        figura = self.get_root()
+        assert isinstance(figura, Figure), 'La leyenda tiene que estar dentro de una figura'
+        figura.header.add_child(
+            JavascriptLink('https://cdnjs.cloudflare.com/ajax/libs/d3/3.5.5/d3.min.js'), name='d3'
+        )
+
+
+# Valores de una capa: un barrio sin dato cuenta 0 y los valores enteros (conteos,
+# porcentajes redondeados) se escriben sin decimales; los demás quedan como float
+def valores_capa(valores):
+    valores = pd.to_numeric(valores).fillna(0)
+    if pd.api.types.is_integer_dtype(valores) or (valores % 1 == 0).all():
+        return valores.astype('int64')
+    return valores.astype('float64')
+
+
+# Mapa coroplético de barrios: una capa por cada (columna, paleta, leyenda) de `capas`,
+# todas sobre el mismo GeoJSON simplificado para el zoom del mapa.
+# barrios_con_datos debe tener id_barrios, nombre_barrio y las columnas de las capas.
+# Con `url_teselas` los polígonos no van en el HTML: se dibujan desde la capa de barrios
+# de las teselas vectoriales (ver capa_teselas.py) y la página solo lleva los colores.
+def crear_mapa_coropletico(barrios_con_datos, capas, centro=(-27.48, -58.83), zoom=13, niveles=None,
+                           url_teselas=None):
+    datos = barrios_con_datos.drop_duplicates(subset='id_barrios')
+    if url_teselas is None:
+        if niveles is None:
+            niveles = cargar_niveles()
+        nivel = niveles[['id_barrios', f'wkb_z{zoom_detalle(zoom)}']].rename(columns={f'wkb_z{zoom_detalle(zoom)}': 'wkb'})
+        datos = datos.merge(nivel, on='id_barrios', how='inner')
+
+    columnas = ['id_barrios', 'nombre_barrio'] + [columna for columna, _, _ in capas]
+    propiedades = datos[columnas].copy()
+    for columna, _, _ in capas:
+        propiedades[columna] = valores_capa(propiedades[columna])
+
+    mapa = folium.Map(location=list(centro), zoom_start=zoom)
+    if url_teselas is None:
+        compartidos = DatosGeoJSON(geojson_barrios(shapely.from_wkb(datos['wkb'].to_numpy(dtype=object)), propiedades))
+        compartidos.add_to(mapa)
+
+    for indice, (columna, paleta, leyenda) in enumerate(capas):
+        valores = propiedades[columna]
+        paso = getattr(linear, paleta).scale(float(valores.min()), float(max(valores.max(), valores.min() + 1))).to_step(6)
+        escala = LeyendaEscalonada(paso.colors, index=paso.index, vmin=paso.vmin, vmax=paso.vmax, caption=leyenda)
+        colores = {str(i): escala.rgb_hex_str(v) for i, v in zip(propiedades['id_barrios'], valores)}
+        if url_teselas is None:
+            CapaCoropletica(
+                compartidos, colores, 'id_barrios', columna, leyenda, name=leyenda, show=indice == 0
+            ).add_to(mapa)
+        else:
+            from capa_teselas import CapaTeselas
+            CapaTeselas(
+                url_teselas, 'barrios', {'fillOpacity': 0.7, 'color': 'black', 'weight': 1, 'opacity': 0.2},
+                colores=colores, valores=dict(zip(propiedades['id_barrios'].astype(str), valores.tolist())),
+                clave='id_barrios', plantilla_popup=f'{{nombre_barrio}}. {leyenda}: {{valor}}', name=leyenda,
+                show=indice == 0
+            ).add_to(mapa)
+        escala.add_to(mapa)
+
+    folium.LayerControl().add_to(mapa)
+    return mapa
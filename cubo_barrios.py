@@ -0,0 +1,244 @@
+import glob
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from almacen_datos import (DIRECTORIO_ALMACEN, DIRECTORIO_DATOS, TABLAS, borrar_anteriores, cargar_tabla,
+                           cargar_tabla_derivada, guardar_tabla_derivada, version_datos)
+from estado_arboles import ESTADOS_REQUIEREN_MANTENIMIENTO, ultimo_seguimiento
+from geometria_barrios import CRS_METRICO_CORRIENTES, CRS_WGS84, reproyectar
+from normalizacion import normalizar_tabla
+
+# Cubo de indicadores por barrio, guardado como tablas derivadas del almacén:
+# - estado: una fila por árbol con su barrio, especie y último seguimiento
+# - arboles: cantidades de árboles por (id_barrios, especie, estado_salud)
+# - espacios: cantidad y área de espacios verdes por (id_barrios, clasificacion)
+PREFIJO_CUBO = 'cubo_barrios_'
+
+DIMENSIONES_ARBOLES = ['id_barrios', 'especie', 'estado_salud']
+MEDIDAS_ARBOLES = ['cantidad_arboles', 'arboles_requieren_mantenimiento']
+DIMENSIONES_ESPACIOS = ['id_barrios', 'clasificacion']
+MEDIDAS_ESPACIOS = ['cantidad_espacios_verdes', 'area_verde_m2']
+
+COLUMNAS_ESTADO = ['id_arbol', 'id_barrios', 'especie', 'id_seguimiento', 'fecha_hora', 'estado_salud']
+COLUMNAS_SEGUIMIENTOS = ['id_seguimiento', 'id_arbol', 'fecha_hora', 'estado_salud']
+
+
+# Polígonos (en metros, CRS métrico de Corrientes) de los anillos (lat, lng) ya
+# decodificados de los espacios verdes, armados y reproyectados de una vez, y la posición
+# del espacio verde de cada polígono
+def poligonos_espacios(anillos):
+    coordenadas, largos, espacio_de_anillo = [], [], []
+    for posicion, anillos_espacio in enumerate(anillos):
+        for anillo in anillos_espacio or []:
+            if len(anillo) >= 4:
+                coordenadas.append(anillo[:, ::-1])
+                largos.append(len(anillo))
+                espacio_de_anillo.append(posicion)
+    if not coordenadas:
+        return np.array([], dtype=object), np.zeros(0, dtype='int64')
+    indices = np.repeat(np.arange(len(largos)), largos)
+    poligonos = shapely.polygons(shapely.linearrings(np.concatenate(coordenadas), indices=indices))
+    return reproyectar(poligonos, CRS_WGS84, CRS_METRICO_CORRIENTES), np.asarray(espacio_de_anillo, dtype='int64')
+
+
+# Área en m² de cada espacio verde a partir de sus anillos. Sin geometría el área es 0.
+def area_espacios_m2(anillos):
+    poligonos, espacio_de_anillo = poligonos_espacios(anillos)
+    if len(poligonos) == 0:
+        return np.zeros(len(anillos))
+    return np.bincount(espacio_de_anillo, weights=shapely.area(poligonos), minlength=len(anillos))
+
+
+# Estado por árbol para el cubo: barrio asignado (NA si no tiene coordenadas o cae fuera
+# de todos los barrios), especie y último seguimiento
+def estado_por_arbol(registro_arboles_df, mantenimiento_arboles_df, asignaciones):
+    estado = registro_arboles_df[['id_arbol', 'especie']].drop_duplicates(subset='id_arbol', keep='first')
+    seguimientos = ultimo_seguimiento(
+        mantenimiento_arboles_df[['id_seguimiento', 'id_arbol', 'fecha_hora', 'estado_salud']]
+    )
+    barrios = asignaciones[['id_arbol', 'id_barrios']].drop_duplicates(subset='id_arbol')
+    estado = (estado.merge(seguimientos, on='id_arbol', how='left', validate='one_to_one')
+              .merge(barrios, on='id_arbol', how='left')
+              .sort_values('id_arbol', ignore_index=True))
+    estado['id_barrios'] = estado['id_barrios'].astype('Int64')
+    return estado[COLUMNAS_ESTADO]
+
+
+# Sumar las medidas por las dimensiones (las filas con dimensiones NA también cuentan)
+def _agrupar(df, dimensiones, medidas):
+    agrupado = df.groupby(dimensiones, dropna=False, observed=True, sort=True)[medidas].sum().reset_index()
+    return agrupado[(agrupado[medidas] != 0).any(axis=1)].reset_index(drop=True)
+
+
+def agregar_arboles(estado):
+    hechos = estado[DIMENSIONES_ARBOLES].assign(
+        cantidad_arboles=1,
+        arboles_requieren_mantenimiento=estado['estado_salud'].isin(ESTADOS_REQUIEREN_MANTENIMIENTO).astype('int64'),
+    )
+    return _agrupar(hechos, DIMENSIONES_ARBOLES, MEDIDAS_ARBOLES)
+
+
+def agregar_espacios(espacios_verdes_df, areas_m2):
+    hechos = espacios_verdes_df[DIMENSIONES_ESPACIOS].assign(cantidad_espacios_verdes=1, area_verde_m2=areas_m2)
+    return _agrupar(hechos, DIMENSIONES_ESPACIOS, MEDIDAS_ESPACIOS)
+
+
+# Aplicar al cubo de árboles los seguimientos nuevos: solo se recalcula el último
+# seguimiento de los árboles que tienen seguimientos nuevos, y el cubo se corrige
+# restando su aporte anterior y sumando el nuevo. `nuevos_seguimientos` son las filas
+# agregadas al final de MantenimientoArboles desde que se armó el cubo.
+def actualizar_con_seguimientos(estado, arboles, nuevos_seguimientos):
+    nuevos = nuevos_seguimientos[nuevos_seguimientos['id_arbol'].isin(estado['id_arbol'])]
+    if nuevos.empty:
+        return estado, arboles
+
+    afectados = estado['id_arbol'].isin(nuevos['id_arbol'])
+    anteriores = estado[afectados]
+    candidatos = pd.concat([anteriores[COLUMNAS_SEGUIMIENTOS].dropna(subset=['id_seguimiento']),
+                            nuevos[COLUMNAS_SEGUIMIENTOS]], ignore_index=True)
+    ultimos = ultimo_seguimiento(candidatos).set_index('id_arbol')
+
+    actualizados = anteriores[['id_arbol', 'id_barrios', 'especie']].join(ultimos, on='id_arbol')[COLUMNAS_ESTADO]
+    estado = pd.concat([estado[~afectados], actualizados], ignore_index=True)
+    estado = estado.sort_values('id_arbol', ignore_index=True)
+    for columna in ['especie', 'estado_salud']:
+        estado[columna] = estado[columna].astype('category')
+
+    # Diferencia: aporte nuevo menos aporte anterior de los árboles afectados
+    resta = agregar_arboles(anteriores)
+    resta[MEDIDAS_ARBOLES] = -resta[MEDIDAS_ARBOLES]
+    arboles = _agrupar(pd.concat([arboles, resta, agregar_arboles(actualizados)], ignore_index=True),
+                       DIMENSIONES_ARBOLES, MEDIDAS_ARBOLES)
+    for columna in ['especie', 'estado_salud']:
+        arboles[columna] = arboles[columna].astype('category')
+    return estado, arboles
+
+
+# Huella de las primeras `filas` filas de los seguimientos. Si coincide con la guardada
+# con el cubo, las filas que ya se aplicaron no cambiaron y las siguientes se agregaron
+# al final del archivo.
+def huella_seguimientos(mantenimiento_arboles_df, filas):
+    hashes = pd.util.hash_pandas_object(mantenimiento_arboles_df[COLUMNAS_SEGUIMIENTOS].iloc[:filas], index=False)
+    return hashlib.sha1(hashes.to_numpy().tobytes()).hexdigest()
+
+
+# Estado y cubo de árboles de la versión actual. Si a MantenimientoArboles solo se le
+# agregaron filas al final se parte del cubo guardado para la misma versión de árboles y
+# barrios y se aplican las filas nuevas; si cambió el registro de árboles o los barrios,
+# o se modificaron seguimientos ya aplicados, se arma de cero. Junto al cubo se guardan
+# las filas de seguimientos aplicadas y su huella (ver huella_seguimientos).
+def cargar_cubo_arboles(directorio_datos=DIRECTORIO_DATOS, directorio_almacen=DIRECTORIO_ALMACEN,
+                        mantenimiento_arboles_df=None):
+    from barrios_espacial import asignar_arboles
+
+    base = version_datos(directorio_datos, tablas=['registro_arboles', 'barrios'])
+    version = version_datos(directorio_datos, tablas=['mantenimiento_arboles'])
+    prefijo_estado = f'{PREFIJO_CUBO}estado_{base}_'
+    prefijo_arboles = f'{PREFIJO_CUBO}arboles_{base}_'
+    prefijo_seguimientos = f'{PREFIJO_CUBO}seguimientos_{base}_'
+
+    estado = cargar_tabla_derivada(prefijo_estado + version, directorio_almacen)
+    arboles = cargar_tabla_derivada(prefijo_arboles + version, directorio_almacen)
+    if estado is not None and arboles is not None:
+        return estado, arboles
+
+    # Seguimientos ya normalizados (los de la app) o leídos del almacén
+    mantenimiento = mantenimiento_arboles_df
+    if mantenimiento is None:
+        mantenimiento = normalizar_tabla('mantenimiento_arboles', cargar_tabla(
+            'mantenimiento_arboles', ['id_seguimiento', 'id_arbol', 'fecha_hora', 'estado_salud'],
+            directorio_datos, directorio_almacen
+        ))
+
+    # Cubo guardado de una versión anterior de los seguimientos, si lo hay y sus filas
+    # siguen siendo el comienzo de las actuales
+    filas = len(mantenimiento)
+    aplicados = None
+    anteriores = sorted(glob.glob(os.path.join(directorio_almacen, prefijo_seguimientos + '*.*')))
+    if anteriores:
+        version_anterior = os.path.basename(anteriores[-1])[len(prefijo_seguimientos):].split('.')[0]
+        estado = cargar_tabla_derivada(prefijo_estado + version_anterior, directorio_almacen)
+        arboles = cargar_tabla_derivada(prefijo_arboles + version_anterior, directorio_almacen)
+        aplicados = cargar_tabla_derivada(prefijo_seguimientos + version_anterior, directorio_almacen)
+    filas_aplicadas = int(aplicados['filas'].iloc[0]) if aplicados is not None else None
+    if (estado is not None and arboles is not None and filas_aplicadas is not None and filas_aplicadas <= filas
+            and huella_seguimientos(mantenimiento, filas_aplicadas) == aplicados['huella'].iloc[0]):
+        estado, arboles = actualizar_con_seguimientos(estado, arboles, mantenimiento.iloc[filas_aplicadas:])
+    else:
+        registro = normalizar_tabla('registro_arboles', cargar_tabla(
+            'registro_arboles', ['id_arbol', 'especie', 'lat', 'lng'], directorio_datos, directorio_almacen
+        ))
+        estado = estado_por_arbol(registro, mantenimiento, asignar_arboles(registro, directorio_datos, directorio_almacen))
+        arboles = agregar_arboles(estado)
+
+    guardar_tabla_derivada(prefijo_estado + version, estado, directorio_almacen)
+    guardar_tabla_derivada(prefijo_arboles + version, arboles, directorio_almacen)
+    guardar_tabla_derivada(prefijo_seguimientos + version, pd.DataFrame(
+        {'filas': [filas], 'huella': [huella_seguimientos(mantenimiento, filas)]}
+    ), directorio_almacen)
+    for prefijo, vigente in [('estado_', prefijo_estado), ('arboles_', prefijo_arboles),
+                             ('seguimientos_', prefijo_seguimientos)]:
+        borrar_anteriores(PREFIJO_CUBO + prefijo, vigente + version, directorio_almacen)
+    return estado, arboles
+
+
+# Cubo de espacios verdes de la versión actual de EspaciosVerdes
+def cargar_cubo_espacios(directorio_datos=DIRECTORIO_DATOS, directorio_almacen=DIRECTORIO_ALMACEN):
+    from geojson_espacios import decodificar_espacios_verdes
+
+    nombre = f"{PREFIJO_CUBO}espacios_{version_datos(directorio_datos, tablas=['espacios_verdes'])}"
+    espacios = cargar_tabla_derivada(nombre, directorio_almacen)
+    if espacios is None:
+        espacios_verdes = cargar_tabla('espacios_verdes', ['gid', 'clasificacion', 'id_barrios'],
+                                       directorio_datos, directorio_almacen)
+        anillos, _ = decodificar_espacios_verdes(os.path.join(directorio_datos, TABLAS['espacios_verdes']))
+        areas = area_espacios_m2([anillos.get(gid) for gid in espacios_verdes['gid']])
+        espacios = agregar_espacios(espacios_verdes, areas)
+        guardar_tabla_derivada(nombre, espacios, directorio_almacen)
+        borrar_anteriores(f'{PREFIJO_CUBO}espacios_', nombre, directorio_almacen)
+    return espacios
+
+
+# Cortar un cubo: filtrar por valores de sus dimensiones y sumar las medidas agrupando
+# por las dimensiones de `por` (sin `por` devuelve los totales)
+def cortar(cubo, por=(), **filtros):
+    seleccion = cubo
+    for dimension, valores in filtros.items():
+        if not isinstance(valores, (list, tuple, set)):
+            valores = [valores]
+        seleccion = seleccion[seleccion[dimension].isin(valores)]
+    medidas = [c for c in cubo.columns if c in MEDIDAS_ARBOLES + MEDIDAS_ESPACIOS]
+    if not por:
+        return seleccion[medidas].sum()
+    return seleccion.groupby(list(por), observed=True)[medidas].sum()
+
+
+# Resumen por barrio: todas las medidas de ambos cubos junto a los datos del barrio, con
+# árboles por hectárea (sobre sup_ha) y porcentaje de árboles que requieren mantenimiento
+def resumen_barrios(arboles, espacios, barrios_df):
+    resumen = (barrios_df
+               .merge(cortar(arboles, ['id_barrios']).reset_index(), on='id_barrios', how='left')
+               .merge(cortar(espacios, ['id_barrios']).reset_index(), on='id_barrios', how='left'))
+    for medida in MEDIDAS_ARBOLES + MEDIDAS_ESPACIOS:
+        resumen[medida] = resumen[medida].fillna(0)
+    for medida in MEDIDAS_ARBOLES + ['cantidad_espacios_verdes']:
+        resumen[medida] = resumen[medida].astype('int64')
+    if 'sup_ha' in resumen.columns:
+        resumen['arboles_por_ha'] = resumen['cantidad_arboles'] / resumen['sup_ha']
+    cantidad = resumen['cantidad_arboles'].where(resumen['cantidad_arboles'] > 0)
+    resumen['porcentaje_requiere_mantenimiento'] = (resumen['arboles_requieren_mantenimiento'] / cantidad * 100).fillna(0.0)
+    return resumen
+
+
+# Cubo completo de la versión actual de los datos: árboles, espacios y resumen por barrio
+def cargar_cubo(directorio_datos=DIRECTORIO_DATOS, directorio_almacen=DIRECTORIO_ALMACEN, mantenimiento_arboles_df=None):
+    _, arboles = cargar_cubo_arboles(directorio_datos, directorio_almacen, mantenimiento_arboles_df)
+    espacios = cargar_cubo_espacios(directorio_datos, directorio_almacen)
+    barrios = normalizar_tabla('barrios', cargar_tabla(
+        'barrios', ['id_barrios', 'nombre_barrio', 'sup_ha', 'area_m2'], directorio_datos, directorio_almacen
+    ))
+    return {'arboles': arboles, 'espacios': espacios, 'barrios': resumen_barrios(arboles, espacios, barrios)}
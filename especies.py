@@ -0,0 +1,227 @@
+import unicodedata
+from collections import Counter, defaultdict
+
+import numpy as np
+import pandas as pd
+
+from almacen_datos import (DIRECTORIO_ALMACEN, DIRECTORIO_DATOS, cargar_tabla, cargar_tabla_derivada,
+                           guardar_tabla_derivada, version_datos)
+
+# Nombre de especie para los árboles sin dato y variantes que significan lo mismo
+ESPECIE_DESCONOCIDA = 'especie desconocida'
+SINONIMOS_ESPECIE = {
+    'sin información': ESPECIE_DESCONOCIDA,
+    'desconocido': ESPECIE_DESCONOCIDA,
+    'sin identificar': ESPECIE_DESCONOCIDA,
+}
+
+# Especies nativas de Corrientes según las fuentes externas consultadas (ver app.py)
+ESPECIES_NATIVAS_CORRIENTES = [
+    'Jacarandá', 'Lapacho Rosado', 'Lapacho amarillo', 'Lapacho', 'Ingá', 'Ceibo', 'Ombú', 'Sauce', 'Urunday',
+    'Pata de Buey (Nativa)', 'Ñangapirí', 'Palo Borracho', 'Guayaba', 'Mango', 'Sauce criollo', 'Albizia', 'Mamon',
+    'Ambaí', 'Lapachillo', 'Curupí', 'Tipa Blanca', 'Tecoma Lapachillo', 'Timbó Colorado', 'Timbó Blanco', 'Ibirá Pitá',
+]
+
+PREFIJO_REGISTRO = 'especies_'
+
+# Cantidad de candidatos del índice de trigramas que se comparan con distancia de edición
+CANDIDATOS_SIMILARES = 5
+
+
+def sin_acentos(texto):
+    return ''.join(c for c in unicodedata.normalize('NFKD', texto) if not unicodedata.combining(c))
+
+
+_SINONIMOS_CLAVE = {sin_acentos(alias): sin_acentos(especie) for alias, especie in SINONIMOS_ESPECIE.items()}
+
+
+# Clave de comparación de un nombre de especie: minúsculas, sin acentos, espacios
+# simples y variantes de "sin dato" unificadas
+def clave_especie(nombre):
+    if nombre is None or pd.isna(nombre):
+        nombre = ESPECIE_DESCONOCIDA
+    clave = sin_acentos(' '.join(str(nombre).lower().split()))
+    return _SINONIMOS_CLAVE.get(clave, clave)
+
+
+# Nombre para mostrar: con mayúscula inicial en cada palabra, como se mostraba antes
+def nombre_canonico(nombre):
+    if nombre is None or pd.isna(nombre):
+        nombre = ESPECIE_DESCONOCIDA
+    nombre = ' '.join(str(nombre).lower().split())
+    return SINONIMOS_ESPECIE.get(nombre, nombre).title()
+
+
+# Distancia de edición (Levenshtein) cortada en `maximo`: si se pasa devuelve maximo + 1
+def distancia_edicion(a, b, maximo):
+    if abs(len(a) - len(b)) > maximo:
+        return maximo + 1
+    previa = list(range(len(b) + 1))
+    for i, letra_a in enumerate(a, 1):
+        actual = [i]
+        for j, letra_b in enumerate(b, 1):
+            actual.append(min(previa[j] + 1, actual[j - 1] + 1, previa[j - 1] + (letra_a != letra_b)))
+        if min(actual) > maximo:
+            return maximo + 1
+        previa = actual
+    return previa[-1]
+
+
+# Errores de tipeo tolerados según el largo: los nombres cortos tienen que coincidir
+# exactamente (Tipa, Pino, Mora), los largos admiten una o dos letras distintas
+def distancia_maxima(clave):
+    if len(clave) < 6:
+        return 0
+    return 1 if len(clave) < 12 else 2
+
+
+def trigramas(clave):
+    texto = f'  {clave} '
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+# Índice aproximado de claves: trigrama -> posiciones de las claves que lo contienen
+class IndiceSimilares:
+    def __init__(self):
+        self.claves = []
+        self._trigramas = defaultdict(set)
+
+    def agregar(self, clave):
+        posicion = len(self.claves)
+        self.claves.append(clave)
+        for trigrama in trigramas(clave):
+            self._trigramas[trigrama].add(posicion)
+        return posicion
+
+    # Posición de la clave más parecida dentro de la distancia tolerada, o None
+    def buscar(self, clave):
+        maximo = distancia_maxima(clave)
+        if maximo == 0:
+            return None
+        votos = Counter(p for trigrama in trigramas(clave) for p in self._trigramas.get(trigrama, ()))
+        mejores = [
+            (distancia_edicion(clave, self.claves[posicion], maximo), posicion)
+            for posicion, _ in votos.most_common(CANDIDATOS_SIMILARES)
+        ]
+        mejores = [(distancia, posicion) for distancia, posicion in mejores if distancia <= maximo]
+        return min(mejores)[1] if mejores else None
+
+
+# Registro de especies: una fila por cada nombre crudo (alias) con su especie canónica.
+# Los nombres se recorren del más frecuente al menos frecuente, así la grafía más usada
+# queda como canónica y las variantes (mayúsculas, acentos, errores de tipeo) se pliegan
+# a ella. Con `base` se parte de un registro existente y solo se agregan los nombres
+# nuevos. Columnas: alias, id_especie, especie, clave, nativa, cantidad.
+def construir_registro(especies, nativas=ESPECIES_NATIVAS_CORRIENTES, base=None):
+    especies = pd.Series(especies)
+    conteo = especies.value_counts(dropna=True)
+    sin_dato = int(especies.isna().sum())
+
+    indice = IndiceSimilares()
+    posiciones = {}
+    nombres = []
+    cantidades = []
+    alias = {}
+
+    if base is not None:
+        for especie, clave in especies_registro(base)[['especie', 'clave']].itertuples(index=False):
+            posiciones[clave] = indice.agregar(clave)
+            nombres.append(especie)
+            cantidades.append(0)
+        for crudo, clave in base[['alias', 'clave']].dropna().itertuples(index=False):
+            alias[crudo] = posiciones[clave]
+
+    def entrada(clave, nombre):
+        if clave in posiciones:
+            return posiciones[clave]
+        posicion = indice.buscar(clave)
+        if posicion is None:
+            posicion = indice.agregar(clave)
+            nombres.append(nombre)
+            cantidades.append(0)
+        posiciones[clave] = posicion
+        return posicion
+
+    for crudo, cantidad in conteo.items():
+        posicion = entrada(clave_especie(crudo), nombre_canonico(crudo))
+        alias[str(crudo)] = posicion
+        cantidades[posicion] += int(cantidad)
+    desconocida = entrada(clave_especie(None), nombre_canonico(None))
+    cantidades[desconocida] += sin_dato
+
+    # Especies nativas: se buscan en el mismo índice, así también toleran variantes
+    es_nativa = np.zeros(len(nombres), dtype=bool)
+    for nativa in nativas:
+        clave = clave_especie(nativa)
+        posicion = posiciones.get(clave, indice.buscar(clave))
+        if posicion is not None:
+            es_nativa[posicion] = True
+
+    # Los id_especie siguen el orden alfabético de los nombres canónicos
+    orden = np.argsort(np.array(nombres, dtype=object), kind='stable')
+    id_por_posicion = np.empty(len(nombres), dtype='int64')
+    id_por_posicion[orden] = np.arange(len(nombres))
+
+    filas = [(a, p) for a, p in alias.items()] + [(None, desconocida)]
+    posiciones_filas = np.array([p for _, p in filas], dtype='int64')
+    registro = pd.DataFrame({
+        'alias': [a for a, _ in filas],
+        'id_especie': id_por_posicion[posiciones_filas],
+        'especie': np.array(nombres, dtype=object)[posiciones_filas],
+        'clave': np.array(indice.claves, dtype=object)[posiciones_filas],
+        'nativa': es_nativa[posiciones_filas],
+        'cantidad': np.array(cantidades, dtype='int64')[posiciones_filas],
+    })
+    return registro.sort_values(['id_especie', 'alias'], na_position='last', ignore_index=True)
+
+
+# Una fila por especie canónica
+def especies_registro(registro):
+    return (registro.drop_duplicates(subset='id_especie')
+            .set_index('id_especie')[['especie', 'clave', 'nativa', 'cantidad']].sort_index())
+
+
+# Registro de especies de la versión actual de RegistroArboles, guardado junto al almacén
+def cargar_registro_especies(directorio_datos=DIRECTORIO_DATOS, directorio_almacen=DIRECTORIO_ALMACEN):
+    nombre = PREFIJO_REGISTRO + version_datos(directorio_datos, tablas=['registro_arboles'])
+    registro = cargar_tabla_derivada(nombre, directorio_almacen)
+    if registro is None:
+        arboles = cargar_tabla('registro_arboles', ['especie'], directorio_datos, directorio_almacen)
+        registro = construir_registro(arboles['especie'])
+        guardar_tabla_derivada(nombre, registro, directorio_almacen)
+    return registro
+
+
+# Codificar una columna de especies como Categorical de especies canónicas: se traduce
+# cada categoría cruda una sola vez y las filas solo cambian de código. Los nombres que
+# no están en el registro se agregan (plegados a una especie conocida si se parecen).
+def codificar_especies(especies, registro=None):
+    especies = pd.Series(especies).astype('category')
+    crudos = [str(c) for c in especies.cat.categories]
+    if registro is None or not set(crudos) <= set(registro['alias'].dropna()):
+        registro = construir_registro(especies, base=registro)
+
+    canonicas = especies_registro(registro)
+    por_alias = dict(zip(registro['alias'], registro['id_especie']))
+    desconocida = int(registro.loc[registro['alias'].isna(), 'id_especie'].iloc[0])
+    # El código -1 (sin dato) toma el último elemento de la tabla: la especie desconocida
+    tabla = np.array([por_alias[c] for c in crudos] + [desconocida], dtype='int64')
+    codigos = tabla[especies.cat.codes.to_numpy()]
+    categorias = pd.Categorical.from_codes(codigos, canonicas['especie'].tolist())
+    return pd.Series(categorias, index=especies.index, name=especies.name).cat.remove_unused_categories()
+
+
+# Cantidad de árboles por especie, contando los códigos del Categorical, con la marca
+# de especie nativa. Ordenado de mayor a menor cantidad.
+def contar_especies(especies, registro):
+    especies = pd.Series(especies).astype('category')
+    cantidades = np.bincount(especies.cat.codes.to_numpy()[especies.cat.codes.to_numpy() >= 0],
+                             minlength=len(especies.cat.categories))
+    nativas = especies_registro(registro).drop_duplicates(subset='especie').set_index('especie')['nativa']
+    conteo = pd.DataFrame({
+        'especie': especies.cat.categories.astype(object),
+        'cantidad': cantidades,
+    })
+    conteo['nativa'] = conteo['especie'].map(nativas).fillna(False).astype(bool)
+    conteo = conteo[conteo['cantidad'] > 0]
+    return conteo.sort_values('cantidad', ascending=False, kind='stable', ignore_index=True)
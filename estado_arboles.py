@@ -0,0 +1,104 @@
+import threading
+
+import pandas as pd
+
+from normalizacion import concatenar_tablas
+
+# Estados de salud que indican que el árbol necesita mantenimiento
+ESTADOS_REQUIEREN_MANTENIMIENTO = ['Malo', 'Regular']
+
+# Política para la relación uno a muchos entre árboles y seguimientos:
+# cada árbol aporta una sola fila con su seguimiento más reciente (por fecha_hora
+# y, a igual fecha, por id_seguimiento). Así un árbol con varios seguimientos
+# no se cuenta varias veces en los porcentajes.
+POLITICA_UNO_A_MUCHOS = 'ultimo_seguimiento'
+
+# Columnas que se derivan del último seguimiento
+INDICADORES = ['requiere_mantenimiento', 'año_mantenimiento']
+
+
+# Quedarse con el último seguimiento de cada árbol
+def ultimo_seguimiento(mantenimiento_arboles_df):
+    mantenimiento = mantenimiento_arboles_df.copy()
+    mantenimiento['fecha_hora'] = pd.to_datetime(mantenimiento['fecha_hora'], errors='coerce')
+    mantenimiento = mantenimiento.sort_values(['fecha_hora', 'id_seguimiento'], na_position='first')
+    return mantenimiento.drop_duplicates(subset='id_arbol', keep='last')
+
+
+# Construir la tabla de estado de árboles: una fila por id_arbol con su último
+# seguimiento y los indicadores derivados que usan las vistas
+def construir_estado_arboles(registro_arboles_df, mantenimiento_arboles_df):
+    arboles = registro_arboles_df.drop_duplicates(subset='id_arbol', keep='first')
+    estado = pd.merge(
+        arboles,
+        ultimo_seguimiento(mantenimiento_arboles_df),
+        on='id_arbol',
+        how='left',
+        validate='one_to_one'
+    )
+
+    return completar_indicadores(estado).set_index('id_arbol', verify_integrity=True).sort_index()
+
+
+def completar_indicadores(estado):
+    estado['requiere_mantenimiento'] = estado['estado_salud'].isin(ESTADOS_REQUIEREN_MANTENIMIENTO)
+    estado['prox_fecha_mante'] = pd.to_datetime(estado['prox_fecha_mante'], errors='coerce')
+    estado['año_mantenimiento'] = estado['prox_fecha_mante'].dt.year.astype('Int64')
+    return estado
+
+
+# Aplicar a la tabla de estado los seguimientos agregados después de armarla: solo se
+# recalcula el último seguimiento de los árboles que tienen seguimientos nuevos. Devuelve
+# una tabla nueva (la anterior puede estar en uso por otras sesiones).
+def actualizar_estado_arboles(estado_arboles_df, nuevos_seguimientos):
+    nuevos = nuevos_seguimientos[nuevos_seguimientos['id_arbol'].isin(estado_arboles_df.index)]
+    if nuevos.empty:
+        return estado_arboles_df
+
+    afectados = estado_arboles_df.index.isin(nuevos['id_arbol'])
+    anteriores = estado_arboles_df[afectados].reset_index()
+    columnas_arbol = [c for c in anteriores.columns
+                      if c == 'id_arbol' or (c not in nuevos.columns and c not in INDICADORES)]
+    ultimos = ultimo_seguimiento(concatenar_tablas(
+        anteriores[list(nuevos.columns)].dropna(subset=['id_seguimiento']), nuevos
+    ))
+    actualizados = completar_indicadores(
+        anteriores[columnas_arbol].merge(ultimos, on='id_arbol', how='left', validate='one_to_one')
+    )
+    estado = concatenar_tablas(estado_arboles_df[~afectados].reset_index(), actualizados[anteriores.columns])
+    return estado.set_index('id_arbol', verify_integrity=True).sort_index()
+
+
+# Tabla de estado compartida entre reruns y sesiones que se pone al día con los
+# seguimientos nuevos en lugar de rearmarse. `recarga` cambia cuando la tabla de
+# seguimientos se volvió a cargar completa (ver tablas_compartidas.py): entonces, o si
+# cambió el registro de árboles, se arma de cero.
+class EstadoArbolesIncremental:
+    def __init__(self):
+        self.estado = None
+        self._registro = None
+        self._recarga = None
+        self._seguimientos = 0
+        self._lock = threading.Lock()
+
+    def obtener(self, registro_arboles_df, mantenimiento_arboles_df, recarga):
+        with self._lock:
+            filas = len(mantenimiento_arboles_df)
+            if (self.estado is None or registro_arboles_df is not self._registro
+                    or recarga != self._recarga or filas < self._seguimientos):
+                self.estado = construir_estado_arboles(registro_arboles_df, mantenimiento_arboles_df)
+            elif filas > self._seguimientos:
+                self.estado = actualizar_estado_arboles(
+                    self.estado, mantenimiento_arboles_df.iloc[self._seguimientos:]
+                )
+            self._registro = registro_arboles_df
+            self._recarga = recarga
+            self._seguimientos = filas
+            return self.estado
+
+
+# Porcentaje de árboles en estado 'Malo' o 'Regular' sobre el total de árboles
+def porcentaje_requiere_mantenimiento(estado_arboles_df):
+    if len(estado_arboles_df) == 0:
+        return 0.0
+    return estado_arboles_df['requiere_mantenimiento'].mean() * 100
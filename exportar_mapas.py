@@ -0,0 +1,338 @@
+import argparse
+import ast
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sys
+import textwrap
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+
+from almacen_datos import DIRECTORIO_DATOS, TABLAS, huella_csv, ingestar, pa
+from geojson_espacios import hash_archivo
+
+# Exportación por lotes de los mapas y gráficos (reemplaza a los scripts de análisis).
+# Cada artefacto es un trabajo independiente que se genera en su propio proceso; se salta
+# si no cambió el contenido de los CSV que usa ni el código que lo genera.
+#
+# Uso: python exportar_mapas.py [--datos ./data] [--salida ./mapas_generados] [--procesos N]
+#                               [--forzar] [artefacto ...]
+
+ARCHIVO_MANIFIESTO_EXPORTACION = 'exportacion.json'
+
+DIRECTORIO_CODIGO = os.path.dirname(os.path.abspath(__file__))
+
+CENTRO_MAPA = [-27.48, -58.83]
+
+
+# Mapa con los espacios verdes, los puntos verdes y los árboles (cada uno en su capa)
+def exportar_mapa_marcadores(directorio_datos, directorio_almacen, ruta):
+    import folium
+
+    from almacen_datos import cargar_tabla
+    from capa_marcadores import agregar_marcadores
+    from geojson_espacios import decodificar_espacios_verdes
+    from normalizacion import normalizar_tabla
+
+    mapa = folium.Map(location=CENTRO_MAPA, zoom_start=13)
+
+    anillos_espacios, _ = decodificar_espacios_verdes(os.path.join(directorio_datos, TABLAS['espacios_verdes']))
+    espacios = folium.FeatureGroup(name='Espacios verdes')
+    for gid, anillos in anillos_espacios.items():
+        if anillos is None:
+            continue
+        folium.Polygon(
+            locations=anillos[0].tolist() if len(anillos) == 1 else [[anillo.tolist()] for anillo in anillos],
+            color='blue',
+            fill=True,
+            fill_opacity=0.3,
+            popup=f"Espacio verde: {gid}"
+        ).add_to(espacios)
+    espacios.add_to(mapa)
+
+    puntos_verdes = normalizar_tabla('puntos_verdes', cargar_tabla(
+        'puntos_verdes', ['ubicacion', 'lat', 'lng'], directorio_datos, directorio_almacen
+    ))
+    agregar_marcadores(mapa, puntos_verdes.dropna(subset=['lat', 'lng']), "Punto verde: {ubicacion}",
+                       icono='leaf', nombre='Puntos verdes')
+
+    arboles = normalizar_tabla('registro_arboles', cargar_tabla(
+        'registro_arboles', ['id_arbol', 'especie', 'lat', 'lng'], directorio_datos, directorio_almacen
+    ))
+    agregar_marcadores(mapa, arboles.dropna(subset=['lat', 'lng']), "Árbol: {id_arbol}, Especie: {especie}",
+                       icono='tree', nombre='Árboles')
+
+    folium.LayerControl().add_to(mapa)
+    mapa.save(ruta)
+
+
+# Mapa de calor de los árboles (puntos ponderados por celda, como en la app)
+def exportar_mapa_calor(directorio_datos, directorio_almacen, ruta):
+    import folium
+
+    from almacen_datos import cargar_tabla
+    from mapa_calor import agregar_mapa_calor
+    from normalizacion import normalizar_tabla
+
+    arboles = normalizar_tabla('registro_arboles', cargar_tabla(
+        'registro_arboles', ['lat', 'lng'], directorio_datos, directorio_almacen
+    )).dropna(subset=['lat', 'lng'])
+    mapa = folium.Map(location=CENTRO_MAPA, zoom_start=13)
+    agregar_mapa_calor(mapa, arboles['lat'], arboles['lng'], modo='ponderado', zoom=13)
+    mapa.save(ruta)
+
+
+# Mapa coroplético de árboles y espacios verdes por barrio, del cubo de indicadores
+def exportar_mapa_coropletico(directorio_datos, directorio_almacen, ruta):
+    from coropletico import cargar_niveles, crear_mapa_coropletico
+    from cubo_barrios import cargar_cubo
+
+    barrios = cargar_cubo(directorio_datos, directorio_almacen)['barrios']
+    mapa = crear_mapa_coropletico(
+        barrios.fillna({'cantidad_arboles': 0, 'cantidad_espacios_verdes': 0}),
+        [
+            ('cantidad_arboles', 'YlGn_09', 'Cantidad de Árboles por Barrio'),
+            ('cantidad_espacios_verdes', 'BuPu_09', 'Cantidad de Espacios Verdes por Barrio'),
+        ],
+        centro=CENTRO_MAPA,
+        zoom=13,
+        niveles=cargar_niveles(directorio_datos, directorio_almacen)
+    )
+    mapa.save(ruta)
+
+
+# Gráfica de árboles por estado de salud (último seguimiento de cada árbol, del cubo)
+def exportar_conteo_estado_salud(directorio_datos, directorio_almacen, ruta):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    from cubo_barrios import cargar_cubo
+    from indicadores import arboles_por_estado
+
+    conteo = arboles_por_estado(cargar_cubo(directorio_datos, directorio_almacen)['arboles'])
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    sns.barplot(x='estado_salud', y='cantidad_arboles', data=conteo, hue='estado_salud', palette='viridis', ax=ax)
+    ax.set_title('Conteo de árboles por estado de salud')
+    ax.set_xlabel('Estado de salud')
+    ax.set_ylabel('Número de árboles')
+    ax.tick_params(axis='x', rotation=45)
+    fig.tight_layout()
+    fig.savefig(ruta)
+    plt.close(fig)
+
+
+# Artefactos a exportar: función que lo genera y tablas que usa. Los que usan el cubo de
+# barrios lo encuentran ya armado en el almacén (ver preparar_almacen).
+ARTEFACTOS = {
+    'mapa_arboles_y_espacios_verdes.html': {
+        'funcion': exportar_mapa_marcadores,
+        'tablas': ['registro_arboles', 'espacios_verdes', 'puntos_verdes'],
+    },
+    'mapa_calor_arboles.html': {
+        'funcion': exportar_mapa_calor,
+        'tablas': ['registro_arboles'],
+    },
+    'mapa_coropletico.html': {
+        'funcion': exportar_mapa_coropletico,
+        'tablas': ['registro_arboles', 'espacios_verdes', 'mantenimiento_arboles', 'barrios'],
+        'cubo': True,
+    },
+    'conteo_estado_salud.png': {
+        'funcion': exportar_conteo_estado_salud,
+        'tablas': ['registro_arboles', 'mantenimiento_arboles', 'barrios'],
+        'cubo': True,
+    },
+}
+
+
+def leer_manifiesto_exportacion(directorio_salida):
+    try:
+        with open(os.path.join(directorio_salida, ARCHIVO_MANIFIESTO_EXPORTACION), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def guardar_manifiesto_exportacion(manifiesto, directorio_salida):
+    ruta = os.path.join(directorio_salida, ARCHIVO_MANIFIESTO_EXPORTACION)
+    with open(ruta + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=2)
+    os.replace(ruta + '.tmp', ruta)
+
+
+# Hash del contenido de cada CSV. Solo se vuelve a leer un archivo si cambió su tamaño o
+# su fecha de modificación desde la exportación anterior; si solo se tocó la fecha, el
+# hash sale igual y los artefactos no se regeneran.
+def hashes_tablas(directorio_datos, anteriores):
+    hashes = {}
+    for nombre, archivo in TABLAS.items():
+        ruta = os.path.join(directorio_datos, archivo)
+        try:
+            huella = huella_csv(ruta)
+        except OSError:
+            hashes[nombre] = {'huella': None, 'hash': None}
+            continue
+        anterior = anteriores.get(nombre) or {}
+        contenido = anterior['hash'] if anterior.get('huella') == huella else hash_archivo(ruta)
+        hashes[nombre] = {'huella': huella, 'hash': contenido}
+    return hashes
+
+
+# Módulos locales (archivos .py de este directorio) que importan los nodos de un árbol
+# de sintaxis, incluidas las importaciones dentro de funciones
+def modulos_locales(nodos):
+    modulos = set()
+    for nodo in nodos:
+        if isinstance(nodo, ast.Import):
+            nombres = [alias.name for alias in nodo.names]
+        elif isinstance(nodo, ast.ImportFrom) and nodo.level == 0 and nodo.module:
+            nombres = [nodo.module]
+        else:
+            continue
+        for nombre in nombres:
+            modulo = nombre.split('.')[0]
+            if os.path.exists(os.path.join(DIRECTORIO_CODIGO, modulo + '.py')):
+                modulos.add(modulo)
+    return modulos
+
+
+@functools.lru_cache(maxsize=None)
+def importados_por(modulo):
+    with open(os.path.join(DIRECTORIO_CODIGO, modulo + '.py'), encoding='utf-8') as f:
+        return modulos_locales(ast.walk(ast.parse(f.read())))
+
+
+# Módulos de los que depende el código de un artefacto: este archivo, lo que importa su
+# función y lo que este archivo importa al cargarse, y recursivamente todo lo que
+# importan esos módulos
+def modulos_artefacto(funcion):
+    propio = os.path.splitext(os.path.basename(__file__))[0]
+    with open(os.path.join(DIRECTORIO_CODIGO, propio + '.py'), encoding='utf-8') as f:
+        nivel_modulo = ast.parse(f.read()).body
+    pendientes = modulos_locales(ast.walk(ast.parse(textwrap.dedent(inspect.getsource(funcion)))))
+    pendientes |= modulos_locales(nivel_modulo)
+    modulos = {propio}
+    while pendientes:
+        modulo = pendientes.pop()
+        if modulo not in modulos:
+            modulos.add(modulo)
+            pendientes |= importados_por(modulo)
+    return sorted(modulos)
+
+
+# Huella de un artefacto: hash de sus tablas de entrada y del código que lo genera
+def huella_artefacto(artefacto, hashes):
+    digesto = hashlib.sha1()
+    for nombre in artefacto['tablas']:
+        digesto.update(f"{nombre}:{hashes[nombre]['hash']}\n".encode('utf-8'))
+    for modulo in modulos_artefacto(artefacto['funcion']):
+        digesto.update(f"{modulo}:{hash_archivo(os.path.join(DIRECTORIO_CODIGO, modulo + '.py'))}\n".encode('utf-8'))
+    return digesto.hexdigest()
+
+
+# Poner al día el almacén y el cubo de barrios antes de repartir los trabajos, así los
+# procesos solo leen y no arman lo mismo a la vez
+def preparar_almacen(directorio_datos, directorio_almacen, pendientes):
+    if pa is not None:
+        ingestar(directorio_datos, directorio_almacen, solo_vencidas=True)
+    if any(ARTEFACTOS[nombre].get('cubo') for nombre in pendientes):
+        from cubo_barrios import cargar_cubo
+        cargar_cubo(directorio_datos, directorio_almacen)
+
+
+# Generar un artefacto (en un proceso aparte). Se escribe a un temporal y se reemplaza,
+# así un artefacto a medio generar nunca pisa al anterior.
+def generar_artefacto(nombre, directorio_datos, directorio_almacen, directorio_salida):
+    ruta = os.path.join(directorio_salida, nombre)
+    base, extension = os.path.splitext(ruta)
+    ruta_temporal = f'{base}.tmp{extension}'
+    inicio = time.perf_counter()
+    ARTEFACTOS[nombre]['funcion'](directorio_datos, directorio_almacen, ruta_temporal)
+    os.replace(ruta_temporal, ruta)
+    return time.perf_counter() - inicio
+
+
+# Exportar los artefactos pedidos (todos si no se indica ninguno) al directorio de salida.
+# Devuelve, por artefacto, si se generó o se saltó y cuánto tardó.
+def exportar(directorio_datos=DIRECTORIO_DATOS, directorio_salida='mapas_generados', nombres=None, procesos=None,
+             forzar=False, directorio_almacen=None):
+    directorio_almacen = directorio_almacen or os.path.join(directorio_datos, 'almacen')
+    nombres = list(nombres or ARTEFACTOS)
+    os.makedirs(directorio_salida, exist_ok=True)
+
+    manifiesto = leer_manifiesto_exportacion(directorio_salida)
+    hashes = hashes_tablas(directorio_datos, manifiesto.get('tablas', {}))
+    huellas = {nombre: huella_artefacto(ARTEFACTOS[nombre], hashes) for nombre in nombres}
+    artefactos = manifiesto.get('artefactos', {})
+    pendientes = [
+        nombre for nombre in nombres
+        if forzar or (artefactos.get(nombre) or {}).get('huella') != huellas[nombre]
+        or not os.path.exists(os.path.join(directorio_salida, nombre))
+    ]
+    resultados = {nombre: {'estado': 'sin cambios', 'segundos': 0.0} for nombre in nombres if nombre not in pendientes}
+    if pendientes:
+        preparar_almacen(directorio_datos, directorio_almacen, pendientes)
+
+    procesos = os.cpu_count() if procesos is None else procesos
+    argumentos = (directorio_datos, directorio_almacen, directorio_salida)
+    if procesos <= 1 or len(pendientes) < 2:
+        completadas = ((nombre, functools.partial(generar_artefacto, nombre, *argumentos)) for nombre in pendientes)
+        pool = None
+    else:
+        # 'spawn' como en rutas_cuadrillas.py: cada proceso arranca limpio
+        pool = ProcessPoolExecutor(max_workers=min(procesos, len(pendientes)), mp_context=get_context('spawn'))
+        futuros = {pool.submit(generar_artefacto, nombre, *argumentos): nombre for nombre in pendientes}
+        completadas = ((futuros[futuro], futuro.result) for futuro in as_completed(futuros))
+
+    try:
+        for nombre, resultado in completadas:
+            try:
+                segundos = resultado()
+            except Exception as error:
+                resultados[nombre] = {'estado': f'error: {error}', 'segundos': 0.0}
+                artefactos.pop(nombre, None)
+                continue
+            resultados[nombre] = {'estado': 'generado', 'segundos': round(segundos, 3)}
+            artefactos[nombre] = {'huella': huellas[nombre], 'segundos': round(segundos, 3)}
+            # El manifiesto se guarda después de cada artefacto: si la exportación se corta,
+            # lo ya generado no se repite
+            guardar_manifiesto_exportacion({'tablas': hashes, 'artefactos': artefactos}, directorio_salida)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    guardar_manifiesto_exportacion({'tablas': hashes, 'artefactos': artefactos}, directorio_salida)
+    return {nombre: resultados[nombre] for nombre in nombres}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Exportar los mapas y gráficos de Corrientes Verde')
+    parser.add_argument('artefactos', nargs='*', metavar='artefacto',
+                        help=f"Artefactos a generar (todos si no se indica ninguno): {', '.join(ARTEFACTOS)}")
+    parser.add_argument('--datos', default=DIRECTORIO_DATOS, help='Directorio con los CSV de origen')
+    parser.add_argument('--salida', default='mapas_generados', help='Directorio donde guardar los artefactos')
+    parser.add_argument('--almacen', help='Directorio del almacén (por defecto, almacen/ dentro de --datos)')
+    parser.add_argument('--procesos', type=int, help='Procesos en paralelo (por defecto, uno por núcleo)')
+    parser.add_argument('--forzar', action='store_true', help='Generar todo aunque no haya cambios')
+    args = parser.parse_args()
+    desconocidos = [nombre for nombre in args.artefactos if nombre not in ARTEFACTOS]
+    if desconocidos:
+        parser.error(f"Artefactos desconocidos: {', '.join(desconocidos)}")
+
+    inicio = time.perf_counter()
+    resultados = exportar(args.datos, args.salida, args.artefactos, args.procesos, args.forzar, args.almacen)
+    for nombre, resultado in resultados.items():
+        print(f"{nombre:<40} {resultado['estado']:<12} {resultado['segundos']:>8.2f} s")
+    print(f"Total: {time.perf_counter() - inicio:.2f} s")
+    if any(resultado['estado'].startswith('error') for resultado in resultados.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
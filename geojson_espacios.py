@@ -0,0 +1,141 @@
+import hashlib
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+# orjson es opcional: si está instalado se usa como decodificador rápido
+try:
+    import orjson
+    cargar_texto_json = orjson.loads
+except ImportError:
+    orjson = None
+    cargar_texto_json = json.loads
+
+RUTA_ESPACIOS_VERDES = './data/EspaciosVerdes.csv'
+
+# Caché en memoria de los archivos ya decodificados, por hash del contenido.
+# El módulo sobrevive a las re-ejecuciones de Streamlit, así que los polígonos
+# se decodifican una sola vez por proceso y versión del archivo.
+_cache_decodificados = {}
+
+
+# Reparación con expresiones regulares (comillas duplicadas y claves sin comillas)
+def reparar_geojson(geojson_str):
+    geojson_str = geojson_str.replace('""', '"')
+    geojson_str = re.sub(r'([{,])\s*([A-Za-z0-9]+):', r'\1"\2":', geojson_str)
+    geojson_str = geojson_str.replace('""', '"')
+    geojson_str = re.sub(r'(?<=[{\[,])\s*([A-Za-z0-9]+):', r'"\1":', geojson_str)
+    return geojson_str
+
+
+# Completar un Polygon truncado (por ejemplo, cortado por un límite de longitud al
+# exportar): se corta en la última coordenada completa y se cierra el anillo
+def completar_truncado(geojson_str):
+    inicio = geojson_str.find('[[[')
+    fin = geojson_str.rfind(']')
+    if inicio == -1 or fin <= inicio + 3 or '"Polygon"' not in geojson_str:
+        return None
+    # El último ']' cierra la última coordenada completa
+    anillo = geojson_str[inicio + 3:fin + 1]
+    primera = anillo[:anillo.index(']') + 1]
+    return geojson_str[:inicio] + '[[[' + anillo + ',[' + primera + ']]}'
+
+
+# Decodificar una fila: primero tal cual, después con las reparaciones.
+# Devuelve el objeto y si hizo falta reparar, o (None, False) si no se pudo.
+def decodificar_fila(geojson_str):
+    if not isinstance(geojson_str, str):
+        return None, False
+    try:
+        return cargar_texto_json(geojson_str), False
+    except ValueError:
+        pass
+    reparado = reparar_geojson(geojson_str)
+    for candidato in (reparado, completar_truncado(reparado)):
+        if candidato is None:
+            continue
+        try:
+            return cargar_texto_json(candidato), True
+        except ValueError:
+            continue
+    return None, False
+
+
+# Anillos exteriores de una geometría como arreglos (n, 2) en orden (lat, lng)
+def anillos_exteriores(geometria):
+    if geometria['type'] == 'Polygon':
+        poligonos = [geometria['coordinates']]
+    elif geometria['type'] == 'MultiPolygon':
+        poligonos = geometria['coordinates']
+    else:
+        raise ValueError(f"Tipo de geometría no soportado: {geometria['type']}")
+    return [np.asarray(poligono[0], dtype='float64')[:, 1::-1] for poligono in poligonos]
+
+
+# Decodificar toda una columna de GeoJSON de una vez. Devuelve una lista alineada
+# con las filas (lista de anillos o None) y un reporte con las filas reparadas y las
+# que no se pudieron leer.
+def decodificar_geojson(textos, ids=None):
+    textos = list(textos)
+    ids = list(ids) if ids is not None else list(range(len(textos)))
+
+    # Intento en bloque: un único arreglo JSON con todas las filas
+    geometrias = None
+    reparadas = [False] * len(textos)
+    if all(isinstance(texto, str) for texto in textos):
+        try:
+            geometrias = cargar_texto_json('[' + ','.join(textos) + ']')
+        except ValueError:
+            geometrias = None
+        if geometrias is not None and len(geometrias) != len(textos):
+            geometrias = None
+
+    # Si el bloque falla se decodifica fila por fila, con reparación solo donde haga falta
+    if geometrias is None:
+        geometrias = []
+        for i, texto in enumerate(textos):
+            geometria, reparadas[i] = decodificar_fila(texto)
+            geometrias.append(geometria)
+
+    anillos = []
+    ids_fallidos = []
+    for identificador, geometria in zip(ids, geometrias):
+        try:
+            anillos.append(anillos_exteriores(geometria))
+        except (TypeError, KeyError, IndexError, ValueError):
+            anillos.append(None)
+            ids_fallidos.append(identificador)
+
+    ids_reparados = [i for i, reparada, a in zip(ids, reparadas, anillos) if reparada and a is not None]
+    reporte = {
+        'total': len(textos),
+        'decodificadas': len(textos) - len(ids_fallidos),
+        'reparadas': len(ids_reparados),
+        'ids_reparados': ids_reparados,
+        'fallidas': len(ids_fallidos),
+        'ids_fallidos': ids_fallidos,
+    }
+    return anillos, reporte
+
+
+# Hash del contenido de un archivo, leído por bloques para no cargarlo entero en memoria
+def hash_archivo(ruta, bloque=1 << 20):
+    digesto = hashlib.sha1()
+    with open(ruta, 'rb') as f:
+        for parte in iter(lambda: f.read(bloque), b''):
+            digesto.update(parte)
+    return digesto.hexdigest()
+
+
+# Decodificar la columna st_asgeojson de EspaciosVerdes una sola vez por versión del
+# archivo. Devuelve un diccionario gid -> anillos y el reporte de errores.
+def decodificar_espacios_verdes(ruta=RUTA_ESPACIOS_VERDES):
+    clave = hash_archivo(ruta)
+    if clave not in _cache_decodificados:
+        espacios = pd.read_csv(ruta, usecols=['gid', 'st_asgeojson'])
+        anillos, reporte = decodificar_geojson(espacios['st_asgeojson'], espacios['gid'])
+        _cache_decodificados.clear()
+        _cache_decodificados[clave] = (dict(zip(espacios['gid'], anillos)), reporte)
+    return _cache_decodificados[clave]
@@ -0,0 +1,78 @@
+import numpy as np
+import shapely
+from pyproj import Transformer
+
+CRS_WGS84 = 'EPSG:4326'
+
+# CRS métrico oficial de la ciudad de Corrientes (POSGAR 2007 / Argentina 5)
+CRS_METRICO_CORRIENTES = 'EPSG:5347'
+
+# POSGAR 2007 / Argentina fajas 1 a 7 (EPSG:5343 a 5349). Cada faja tiene un falso
+# este de (faja * 1.000.000 + 500.000) metros, así que la faja se deduce de la x.
+EPSG_POSGAR_2007_FAJA_1 = 5343
+FAJAS_POSGAR = range(1, 8)
+
+# Columnas derivadas que se guardan junto a la geometría reproyectada
+COLUMNAS_GEOMETRIA = ['crs_origen', 'area_m2', 'centroide_lat', 'centroide_lng']
+
+
+# Detectar el sistema de referencia a partir del rango de las coordenadas
+def detectar_crs(geometrias):
+    xmin, ymin, xmax, ymax = shapely.total_bounds(geometrias)
+    if np.isnan(xmin):
+        return CRS_WGS84
+    if -180 <= xmin <= xmax <= 180 and -90 <= ymin <= ymax <= 90:
+        return CRS_WGS84
+    # Coordenadas métricas de Argentina: y (norte) entre ~5.000.000 y ~8.000.000 m
+    if 1_000_000 <= xmin <= xmax < 8_000_000 and 4_000_000 <= ymin <= ymax <= 8_000_000:
+        faja = int(np.floor((xmin + xmax) / 2 / 1_000_000))
+        if faja in FAJAS_POSGAR:
+            return f'EPSG:{EPSG_POSGAR_2007_FAJA_1 + faja - 1}'
+    raise ValueError(f'No se pudo detectar el sistema de referencia de las geometrías (x: {xmin}..{xmax}, y: {ymin}..{ymax})')
+
+
+# Reproyectar todas las geometrías de una vez: se transforman todos los vértices
+# en un único llamado a pyproj
+def reproyectar(geometrias, crs_origen, crs_destino=CRS_WGS84):
+    if crs_origen == crs_destino:
+        return geometrias
+    transformador = Transformer.from_crs(crs_origen, crs_destino, always_xy=True)
+    return shapely.transform(geometrias, lambda coordenadas: np.column_stack(
+        transformador.transform(coordenadas[:, 0], coordenadas[:, 1])
+    ))
+
+
+# Proyectar puntos lat/lng a coordenadas métricas (x, y en metros)
+def proyectar_puntos(lat, lng, crs_destino=CRS_METRICO_CORRIENTES):
+    transformador = Transformer.from_crs(CRS_WGS84, crs_destino, always_xy=True)
+    x, y = transformador.transform(np.asarray(lng, dtype='float64'), np.asarray(lat, dtype='float64'))
+    return np.asarray(x), np.asarray(y)
+
+
+# Preparar las geometrías de los barrios para el almacén: detectar el CRS, calcular el
+# área (en metros, en el CRS métrico de origen) y reproyectar a WGS84 con su centroide
+def preparar_geometrias(geometrias):
+    crs_origen = detectar_crs(geometrias)
+    if crs_origen == CRS_WGS84:
+        area_m2 = shapely.area(reproyectar(geometrias, CRS_WGS84, CRS_METRICO_CORRIENTES))
+    else:
+        area_m2 = shapely.area(geometrias)
+    wgs84 = reproyectar(geometrias, crs_origen)
+    centroides = shapely.centroid(wgs84)
+    return wgs84, {
+        'crs_origen': crs_origen,
+        'area_m2': area_m2,
+        'centroide_lat': shapely.get_y(centroides),
+        'centroide_lng': shapely.get_x(centroides),
+    }
+
+
+# GeoDataFrame de barrios en WGS84 a partir de la geometría ya reproyectada del almacén
+def barrios_geodataframe(barrios_df, columna_wkb='the_geom_barrios_wkb'):
+    import geopandas as gpd
+    atributos = barrios_df.drop(columns=[c for c in barrios_df.columns if c.startswith('the_geom_barrios')])
+    return gpd.GeoDataFrame(
+        atributos,
+        geometry=gpd.GeoSeries.from_wkb(barrios_df[columna_wkb].to_numpy(dtype=object)),
+        crs=CRS_WGS84
+    )
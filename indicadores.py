@@ -0,0 +1,39 @@
+from cubo_barrios import cortar
+
+# Indicadores del tablero calculados a partir de las tablas derivadas (cubo de barrios)
+# y de los seguimientos, sin nada de Streamlit: los usan las vistas de app.py para sus
+# textos y gráficos y la API de datos (api_datos.py) para otros sistemas. El conteo de
+# especies está en especies.py (contar_especies).
+
+
+# Porcentaje de árboles en mal estado ('Malo' y 'Regular', que requieren mantenimiento)
+def porcentaje_mal_estado(cubo_arboles):
+    totales = cortar(cubo_arboles)
+    if totales['cantidad_arboles'] == 0:
+        return 0.0
+    return totales['arboles_requieren_mantenimiento'] / totales['cantidad_arboles'] * 100
+
+
+# Cantidad de árboles por estado de salud, de mayor a menor
+def arboles_por_estado(cubo_arboles):
+    conteo = cortar(cubo_arboles, ['estado_salud'])['cantidad_arboles']
+    return conteo.sort_values(ascending=False, kind='stable').reset_index()
+
+
+# Mantenimientos por año: cada fila de MantenimientoArboles (ya normalizada, con el año
+# de prox_fecha_mante) cuenta en su año, no solo el último seguimiento de cada árbol
+def contar_mantenimientos_por_año(mantenimiento_arboles_df):
+    # Filtrar años válidos
+    primer_año = mantenimiento_arboles_df['año_mantenimiento'].min()
+    ultimo_año = mantenimiento_arboles_df['año_mantenimiento'].max()
+    mantenimientos = mantenimiento_arboles_df[mantenimiento_arboles_df['año_mantenimiento'].between(primer_año, ultimo_año)]
+    return mantenimientos.groupby('año_mantenimiento').size().reset_index(name='cantidad_mantenimientos')
+
+
+# Cantidad de espacios verdes por barrio y porcentaje sobre el total, del resumen por
+# barrio del cubo
+def espacios_por_barrio(cubo_resumen):
+    espacios = cubo_resumen[['id_barrios', 'nombre_barrio', 'cantidad_espacios_verdes']].copy()
+    total_espacios_verdes = espacios['cantidad_espacios_verdes'].sum()
+    espacios['porcentaje_espacios_verdes'] = (espacios['cantidad_espacios_verdes'] / total_espacios_verdes) * 100
+    return espacios
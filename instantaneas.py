@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from datetime import datetime, timezone
+
+from almacen_datos import DIRECTORIO_DATOS, feather, pa
+
+# Instantáneas del tablero: una carpeta por versión de los datos con las tablas que usan
+# las vistas, las tablas derivadas (cubo de barrios, estado de los árboles, cobertura,
+# conteo de especies) en Arrow sin comprimir, para leerlas con memory mapping, y los
+# mapas (HTML) y gráficos (JSON) ya serializados. Las arma precalculo.py en una carpeta
+# temporal y las publica de una vez: la carpeta se renombra y se reemplaza actual.json,
+# así la app nunca ve una instantánea a medio escribir.
+DIRECTORIO_INSTANTANEAS = os.path.join(DIRECTORIO_DATOS, 'instantaneas')
+ARCHIVO_ACTUAL = 'actual.json'
+ARCHIVO_MANIFIESTO_INSTANTANEA = 'manifiesto.json'
+# Teselas vectoriales de los mapas (solo con MAPAS_CON_TESELAS=1, ver servidor_teselas.py)
+ARCHIVO_TESELAS = 'teselas.mbtiles'
+PREFIJO_PREPARACION = '.preparando-'
+
+# Con USAR_INSTANTANEAS=1 la app lee la última instantánea publicada en lugar de los CSV
+VARIABLE_INSTANTANEAS = 'USAR_INSTANTANEAS'
+# Instantánea en preparación: precalculo.py corre la app sobre ella para guardar las figuras
+VARIABLE_PREPARACION = 'INSTANTANEA_EN_PREPARACION'
+
+# Instantáneas publicadas que se conservan (la actual y la anterior, que puede estar
+# leyendo una sesión que todavía no pasó a la nueva)
+INSTANTANEAS_CONSERVADAS = 2
+
+EXTENSIONES_FIGURAS = ['.html', '.json']
+
+
+def instantaneas_activas():
+    return (os.environ.get(VARIABLE_INSTANTANEAS, '') not in ('', '0')
+            or bool(os.environ.get(VARIABLE_PREPARACION)))
+
+
+def leer_json(ruta):
+    try:
+        with open(ruta, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def escribir_json(contenido, ruta):
+    with open(ruta + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(contenido, f, indent=2, ensure_ascii=False, default=int)
+    os.replace(ruta + '.tmp', ruta)
+
+
+# Carpeta de la instantánea que tiene que leer la app: la que se está preparando (si la
+# app corre dentro de precalculo.py) o la última publicada. None si no hay ninguna.
+def ruta_instantanea_actual(directorio=DIRECTORIO_INSTANTANEAS):
+    preparacion = os.environ.get(VARIABLE_PREPARACION)
+    if preparacion:
+        return preparacion
+    actual = leer_json(os.path.join(directorio, ARCHIVO_ACTUAL))
+    if not actual:
+        return None
+    return os.path.join(directorio, actual['carpeta'])
+
+
+def version_publicada(directorio=DIRECTORIO_INSTANTANEAS):
+    actual = leer_json(os.path.join(directorio, ARCHIVO_ACTUAL))
+    return actual['version'] if actual else None
+
+
+# Nombre de archivo de una figura a partir de su clave en la caché de figuras (nombre de
+# la función y argumentos)
+def nombre_figura(clave):
+    argumentos = hashlib.sha1(repr(clave[1:]).encode('utf-8')).hexdigest()[:16]
+    return f'{clave[0]}_{argumentos}'
+
+
+def extension_figura(valor):
+    return '.html' if valor.lstrip().startswith('<') else '.json'
+
+
+def escribir_tabla(df, ruta):
+    # Con el índice (el estado de los árboles está indexado por id_arbol)
+    feather.write_feather(pa.Table.from_pandas(df), ruta + '.tmp', compression='uncompressed')
+    os.replace(ruta + '.tmp', ruta)
+
+
+# Instantánea abierta para lectura. Las tablas se leen la primera vez que se piden y
+# quedan en memoria; las figuras se leen del disco cada vez (la caché de figuras de la
+# app guarda las que ya se usaron). Con `escribir` (solo en preparación) las figuras
+# que se arman se guardan en la instantánea.
+class Instantanea:
+    def __init__(self, ruta, escribir=False):
+        self.ruta = ruta
+        self.escribir = escribir
+        manifiesto = leer_json(os.path.join(ruta, ARCHIVO_MANIFIESTO_INSTANTANEA))
+        if manifiesto is None:
+            raise FileNotFoundError(f'Instantánea sin manifiesto: {ruta}')
+        self.version = manifiesto['version']
+        self.reporte_geojson = manifiesto['reporte_geojson']
+        self._tablas = {}
+        self._lock = threading.Lock()
+
+    def tabla(self, nombre):
+        with self._lock:
+            if nombre not in self._tablas:
+                self._tablas[nombre] = feather.read_table(
+                    os.path.join(self.ruta, 'tablas', f'{nombre}.arrow'), memory_map=True
+                ).to_pandas()
+            return self._tablas[nombre]
+
+    def tablas(self, nombres):
+        return {nombre: self.tabla(nombre) for nombre in nombres}
+
+    def cubo(self):
+        return {parte: self.tabla(f'cubo_{parte}') for parte in ['arboles', 'espacios', 'barrios']}
+
+    def ruta_teselas(self):
+        ruta = os.path.join(self.ruta, ARCHIVO_TESELAS)
+        return ruta if os.path.exists(ruta) else None
+
+    def leer_figura(self, clave):
+        for extension in EXTENSIONES_FIGURAS:
+            try:
+                with open(os.path.join(self.ruta, 'figuras', nombre_figura(clave) + extension), encoding='utf-8') as f:
+                    return f.read()
+            except OSError:
+                continue
+        return None
+
+    def guardar_figura(self, clave, valor):
+        if not self.escribir or not isinstance(valor, str):
+            return
+        ruta = os.path.join(self.ruta, 'figuras', nombre_figura(clave) + extension_figura(valor))
+        with open(ruta + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(valor)
+        os.replace(ruta + '.tmp', ruta)
+
+
+# Abrir la instantánea de `ruta` (para escribir las figuras si es la que se está
+# preparando). None si ya no existe: se borró porque hay dos más nuevas.
+def abrir_instantanea(ruta):
+    try:
+        return Instantanea(ruta, escribir=ruta == os.environ.get(VARIABLE_PREPARACION))
+    except FileNotFoundError:
+        return None
+
+
+# Carpeta temporal para armar una instantánea nueva
+def crear_preparacion(version, reporte_geojson, directorio=DIRECTORIO_INSTANTANEAS):
+    if pa is None:
+        raise RuntimeError('Se necesita pyarrow para armar instantáneas')
+    ruta = os.path.join(directorio, f'{PREFIJO_PREPARACION}{version}-{uuid.uuid4().hex[:8]}')
+    os.makedirs(os.path.join(ruta, 'tablas'))
+    os.makedirs(os.path.join(ruta, 'figuras'))
+    escribir_json({'version': version, 'reporte_geojson': reporte_geojson, 'publicada': None},
+                  os.path.join(ruta, ARCHIVO_MANIFIESTO_INSTANTANEA))
+    return ruta
+
+
+# Publicar una instantánea preparada: se renombra la carpeta, se reemplaza actual.json y
+# se borran las publicadas más viejas
+def publicar(ruta_preparacion, directorio=DIRECTORIO_INSTANTANEAS):
+    ruta_manifiesto = os.path.join(ruta_preparacion, ARCHIVO_MANIFIESTO_INSTANTANEA)
+    manifiesto = leer_json(ruta_manifiesto)
+    manifiesto['publicada'] = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    escribir_json(manifiesto, ruta_manifiesto)
+
+    carpeta = os.path.basename(ruta_preparacion)[len(PREFIJO_PREPARACION):]
+    os.rename(ruta_preparacion, os.path.join(directorio, carpeta))
+    anterior = leer_json(os.path.join(directorio, ARCHIVO_ACTUAL)) or {}
+    historial = [carpeta] + [c for c in anterior.get('historial', []) if c != carpeta]
+    escribir_json({'version': manifiesto['version'], 'carpeta': carpeta, 'publicada': manifiesto['publicada'],
+                   'historial': historial[:INSTANTANEAS_CONSERVADAS]},
+                  os.path.join(directorio, ARCHIVO_ACTUAL))
+    for vieja in historial[INSTANTANEAS_CONSERVADAS:]:
+        shutil.rmtree(os.path.join(directorio, vieja), ignore_errors=True)
+    return carpeta
+
+
+# Borrar preparaciones que quedaron de un precálculo interrumpido
+def borrar_preparaciones(directorio=DIRECTORIO_INSTANTANEAS):
+    if not os.path.isdir(directorio):
+        return
+    for carpeta in os.listdir(directorio):
+        if carpeta.startswith(PREFIJO_PREPARACION):
+            shutil.rmtree(os.path.join(directorio, carpeta), ignore_errors=True)
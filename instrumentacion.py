@@ -0,0 +1,231 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Con REGISTRO_INSTRUMENTACION=ruta.jsonl cada rerun de la app agrega una línea JSON con
+# sus mediciones a ese archivo (con "-" van a stderr). Sin la variable se emiten igual en
+# el logger, para que el despliegue les ponga el handler que quiera.
+VARIABLE_REGISTRO = 'REGISTRO_INSTRUMENTACION'
+
+logger = logging.getLogger('corrientes_verde.instrumentacion')
+
+# Valores de `cache` que cuentan como acierto (una figura leída de la instantánea
+# publicada también, ver instantaneas.py)
+ACIERTOS = ('acierto', 'instantanea')
+
+# Rerun que se está midiendo en este hilo (Streamlit corre cada sesión en su propio hilo)
+_rerun_actual = contextvars.ContextVar('rerun_actual', default=None)
+
+
+# Mediciones de un rerun de la app, en el orden en que empezaron. Cada medición tiene el
+# tipo (vista, carga, figura, envio), el nombre, el tiempo, las filas procesadas, los bytes
+# y si salió de una caché; `nivel` es la profundidad, para ver qué medición contiene a cuál.
+class Rerun:
+    def __init__(self):
+        self.inicio = datetime.now(timezone.utc)
+        self.vista = None
+        self.segundos = None
+        self.mediciones = []
+        self._abiertas = []
+        self._reloj = time.perf_counter()
+
+    def terminar(self, vista):
+        self.vista = vista
+        self.segundos = time.perf_counter() - self._reloj
+
+    def registro(self):
+        enviados = [m for m in self.mediciones if m['tipo'] == 'envio']
+        return {
+            'inicio': self.inicio.isoformat(timespec='milliseconds'),
+            'vista': self.vista,
+            'segundos': redondear(self.segundos),
+            'bytes_enviados': sum(m['bytes'] or 0 for m in enviados),
+            'aciertos': sum(m['cache'] in ACIERTOS for m in self.mediciones),
+            'fallos': sum(m['cache'] == 'fallo' for m in self.mediciones),
+            'mediciones': [dict(m, segundos=redondear(m['segundos'])) for m in self.mediciones],
+        }
+
+
+def redondear(segundos):
+    return None if segundos is None else round(segundos, 4)
+
+
+def iniciar_rerun():
+    rerun = Rerun()
+    _rerun_actual.set(rerun)
+    return rerun
+
+
+# Cerrar el rerun y escribir su registro estructurado
+def terminar_rerun(rerun, vista):
+    rerun.terminar(vista)
+    _rerun_actual.set(None)
+    configurar_registro()
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps(rerun.registro(), ensure_ascii=False))
+    return rerun
+
+
+_configurado = False
+
+
+def configurar_registro():
+    global _configurado
+    if _configurado:
+        return
+    _configurado = True
+    logger.setLevel(logging.INFO)
+    ruta = os.environ.get(VARIABLE_REGISTRO, '')
+    if ruta:
+        handler = logging.StreamHandler(sys.stderr) if ruta == '-' else logging.FileHandler(ruta, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.propagate = False
+
+
+# Medir el bloque: la medición se puede completar adentro (filas, bytes, cache). Fuera de
+# un rerun (scripts, exportar_mapas.py) no se guarda nada.
+@contextmanager
+def medir(nombre, tipo):
+    rerun = _rerun_actual.get()
+    medicion = {'tipo': tipo, 'nombre': nombre, 'nivel': 0, 'segundos': None, 'filas': None, 'bytes': None,
+                'cache': None}
+    if rerun is not None:
+        medicion['nivel'] = len(rerun._abiertas)
+        rerun.mediciones.append(medicion)
+        rerun._abiertas.append(medicion)
+    inicio = time.perf_counter()
+    try:
+        yield medicion
+    finally:
+        medicion['segundos'] = time.perf_counter() - inicio
+        if rerun is not None:
+            rerun._abiertas.pop()
+
+
+# Completar la medición abierta más interna (o la última abierta con ese nombre)
+def anotar(nombre=None, **datos):
+    rerun = _rerun_actual.get()
+    if rerun is None:
+        return
+    for medicion in reversed(rerun._abiertas):
+        if nombre is None or medicion['nombre'] == nombre:
+            medicion.update(datos)
+            return
+
+
+# Filas de un DataFrame, o la suma de las de los DataFrames de una tupla, lista o dict
+def contar_filas(valor):
+    if isinstance(valor, dict):
+        valor = list(valor.values())
+    if isinstance(valor, (tuple, list)):
+        filas = [contar_filas(parte) for parte in valor]
+        filas = [cantidad for cantidad in filas if cantidad is not None]
+        return sum(filas) if filas else None
+    if hasattr(valor, 'columns') and hasattr(valor, '__len__'):
+        return len(valor)
+    return None
+
+
+# Decorador: mide cada llamada con las filas del resultado
+def instrumentar(tipo):
+    def decorar(funcion):
+        @functools.wraps(funcion)
+        def envuelta(*args, **kwargs):
+            with medir(funcion.__name__, tipo) as medicion:
+                resultado = funcion(*args, **kwargs)
+                medicion['filas'] = contar_filas(resultado)
+            return resultado
+        return envuelta
+    return decorar
+
+
+# Decorador para funciones con caché de Streamlit (cache_resource o cache_data): además
+# del tiempo anota si hubo acierto, porque la función solo corre adentro de la caché
+# cuando falla. Uso: @cacheada(st.cache_resource(max_entries=1))
+def cacheada(decorador_cache, tipo='carga'):
+    def decorar(funcion):
+        @functools.wraps(funcion)
+        def calcular(*args, **kwargs):
+            anotar(funcion.__name__, cache='fallo')
+            return funcion(*args, **kwargs)
+
+        en_cache = decorador_cache(calcular)
+
+        @functools.wraps(funcion)
+        def envuelta(*args, **kwargs):
+            with medir(funcion.__name__, tipo) as medicion:
+                medicion['cache'] = 'acierto'
+                resultado = en_cache(*args, **kwargs)
+                medicion['filas'] = contar_filas(resultado)
+            return resultado
+
+        envuelta.clear = en_cache.clear
+        return envuelta
+    return decorar
+
+
+def percentil(valores, q):
+    import numpy as np
+    return round(float(np.percentile(valores, q)), 4) if len(valores) else None
+
+
+# p50/p95 de los reruns de cada vista y de cada medición en un registro JSON lines
+def resumir_registro(ruta):
+    import pandas as pd
+
+    reruns, mediciones = [], []
+    with open(ruta, encoding='utf-8') as f:
+        for linea in f:
+            try:
+                registro = json.loads(linea)
+            except ValueError:
+                continue
+            reruns.append({'vista': registro['vista'], 'segundos': registro['segundos'],
+                           'bytes_enviados': registro['bytes_enviados']})
+            mediciones.extend({'vista': registro['vista'], **medicion} for medicion in registro['mediciones'])
+
+    def agregar(df, columnas, **extra):
+        if df.empty:
+            return df
+        return df.groupby(columnas, dropna=False).agg(
+            cantidad=('segundos', 'size'),
+            p50_s=('segundos', lambda s: percentil(s, 50)),
+            p95_s=('segundos', lambda s: percentil(s, 95)),
+            maximo_s=('segundos', 'max'),
+            **extra,
+        ).reset_index()
+
+    mediciones = pd.DataFrame(mediciones)
+    if not mediciones.empty:
+        mediciones['aciertos'] = mediciones['cache'].isin(ACIERTOS)
+        mediciones['fallos'] = mediciones['cache'] == 'fallo'
+    por_medicion = agregar(mediciones, ['vista', 'tipo', 'nombre'], aciertos=('aciertos', 'sum'),
+                           fallos=('fallos', 'sum'), p95_bytes=('bytes', lambda b: percentil(b.dropna(), 95)))
+    return agregar(pd.DataFrame(reruns), ['vista'], p95_bytes=('bytes_enviados', lambda b: percentil(b, 95))), por_medicion
+
+
+def main():
+    import argparse
+
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description='Latencias p50/p95 por vista a partir del registro de instrumentación')
+    parser.add_argument('registro', help='Archivo JSON lines escrito con REGISTRO_INSTRUMENTACION')
+    args = parser.parse_args()
+
+    por_vista, por_medicion = resumir_registro(args.registro)
+    with pd.option_context('display.width', 200, 'display.max_rows', None):
+        print(por_vista.to_string(index=False))
+        print()
+        print(por_medicion.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+import numpy as np
+import folium
+from folium.plugins import HeatMap
+
+# Mismo gradiente que usa Leaflet.heat por defecto
+GRADIENTE = {0.4: 'blue', 0.6: 'cyan', 0.7: 'lime', 0.8: 'yellow', 1.0: 'red'}
+
+# Valores RGB de los colores del gradiente, para pintar la imagen en el servidor
+COLORES_RGB = {
+    'blue': (0, 0, 255), 'cyan': (0, 255, 255), 'lime': (0, 255, 0),
+    'yellow': (255, 255, 0), 'red': (255, 0, 0),
+}
+
+# Niveles de zoom para los que se precalcula la grilla de densidad: solo el zoom inicial
+# del mapa de la app, que es la única que se manda al navegador (al acercar o alejar,
+# Leaflet.heat vuelve a dibujar esos mismos puntos ponderados)
+ZOOMS = (13,)
+
+# Tamaño de cada celda de la grilla en píxeles de pantalla
+PIXELES_POR_CELDA = 4
+
+# Límite de celdas por grilla: si la extensión es muy grande se agrandan las celdas
+MAXIMO_CELDAS = 250_000
+
+
+# Grados de longitud que ocupa un píxel de la tesela en un nivel de zoom
+def grados_por_pixel(zoom):
+    return 360.0 / (256 * 2 ** zoom)
+
+
+# Extensión de los puntos, con un pequeño margen
+def limites_puntos(lat, lng, margen=0.002):
+    return (float(lat.min()) - margen, float(lat.max()) + margen,
+            float(lng.min()) - margen, float(lng.max()) + margen)
+
+
+# Contar los árboles por celda con un histograma 2D. Devuelve los conteos
+# (filas = latitud de sur a norte, columnas = longitud) y los bordes de las celdas.
+def grilla_densidad(lat, lng, zoom, limites=None):
+    lat = np.asarray(lat, dtype='float64')
+    lng = np.asarray(lng, dtype='float64')
+    if limites is None:
+        limites = limites_puntos(lat, lng)
+    lat_min, lat_max, lng_min, lng_max = limites
+
+    tamano_celda = grados_por_pixel(zoom) * PIXELES_POR_CELDA
+    celdas_lat = max(1, int(np.ceil((lat_max - lat_min) / tamano_celda)))
+    celdas_lng = max(1, int(np.ceil((lng_max - lng_min) / tamano_celda)))
+    if celdas_lat * celdas_lng > MAXIMO_CELDAS:
+        escala = np.sqrt(celdas_lat * celdas_lng / MAXIMO_CELDAS)
+        celdas_lat = max(1, int(celdas_lat / escala))
+        celdas_lng = max(1, int(celdas_lng / escala))
+
+    conteos, bordes_lat, bordes_lng = np.histogram2d(
+        lat, lng, bins=(celdas_lat, celdas_lng), range=((lat_min, lat_max), (lng_min, lng_max))
+    )
+    return conteos, bordes_lat, bordes_lng
+
+
+# Precalcular la grilla de cada nivel de zoom sobre la misma extensión
+def precalcular_grillas(lat, lng, zooms=ZOOMS):
+    limites = limites_puntos(np.asarray(lat), np.asarray(lng))
+    return {zoom: grilla_densidad(lat, lng, zoom, limites) for zoom in zooms}
+
+
+# Convertir una grilla en puntos ponderados (centro de cada celda no vacía y su peso
+# normalizado entre 0 y 1). La cantidad de puntos depende de la grilla, no del censo.
+def puntos_ponderados(conteos, bordes_lat, bordes_lng, percentil=99):
+    filas, columnas = np.nonzero(conteos)
+    if len(filas) == 0:
+        return np.empty((0, 3))
+    centros_lat = (bordes_lat[:-1] + bordes_lat[1:]) / 2
+    centros_lng = (bordes_lng[:-1] + bordes_lng[1:]) / 2
+    pesos = conteos[filas, columnas]
+    # Normalizar con un percentil alto para que unas pocas celdas no saturen la escala
+    pesos = np.clip(pesos / max(np.percentile(pesos, percentil), 1.0), 0.0, 1.0)
+    return np.column_stack([centros_lat[filas], centros_lng[columnas], np.round(pesos, 3)])
+
+
+# Suavizado gaussiano separable con NumPy (radio en celdas)
+def suavizar(grilla, radio=2):
+    if radio <= 0:
+        return grilla
+    x = np.arange(-2 * radio, 2 * radio + 1)
+    nucleo = np.exp(-(x ** 2) / (2.0 * radio ** 2))
+    nucleo /= nucleo.sum()
+    ancho = len(x) // 2
+    resultado = np.pad(grilla, ancho, mode='constant')
+    resultado = sum(peso * np.roll(resultado, desplazamiento, axis=0) for desplazamiento, peso in zip(x, nucleo))
+    resultado = sum(peso * np.roll(resultado, desplazamiento, axis=1) for desplazamiento, peso in zip(x, nucleo))
+    return resultado[ancho:-ancho, ancho:-ancho]
+
+
+# Pintar una grilla de densidad como imagen RGBA con el gradiente de Leaflet.heat
+def imagen_densidad(conteos, radio=2, gradiente=GRADIENTE):
+    densidad = suavizar(conteos, radio)
+    maximo = np.percentile(densidad[densidad > 0], 99) if (densidad > 0).any() else 1.0
+    intensidad = np.clip(densidad / maximo, 0.0, 1.0)
+
+    paradas = sorted(gradiente)
+    rgb = np.array([COLORES_RGB[gradiente[parada]] for parada in paradas], dtype='float64')
+    imagen = np.zeros(conteos.shape + (4,), dtype='uint8')
+    for canal in range(3):
+        imagen[..., canal] = np.interp(intensidad, paradas, rgb[:, canal]).astype('uint8')
+    imagen[..., 3] = (np.clip(intensidad / paradas[0], 0.0, 1.0) * 200).astype('uint8')
+    # La fila 0 de la imagen es el norte
+    return imagen[::-1]
+
+
+# Añadir un mapa de calor a un mapa de folium.
+#   modo='ponderado': puntos ponderados por celda (HeatMap con pocas filas)
+#   modo='imagen': grilla renderizada en el servidor como imagen superpuesta
+#   modo='puntos': todos los puntos (comportamiento anterior, solo para comparar)
+def agregar_mapa_calor(mapa, lat, lng, modo='ponderado', zoom=13, grillas=None):
+    lat = np.asarray(lat, dtype='float64')
+    lng = np.asarray(lng, dtype='float64')
+    if modo == 'puntos':
+        HeatMap(np.column_stack([lat, lng]).tolist()).add_to(mapa)
+        return mapa
+
+    if grillas is None:
+        grillas = precalcular_grillas(lat, lng, (zoom,))
+    conteos, bordes_lat, bordes_lng = grillas[zoom]
+
+    if modo == 'ponderado':
+        HeatMap(puntos_ponderados(conteos, bordes_lat, bordes_lng).tolist()).add_to(mapa)
+    elif modo == 'imagen':
+        folium.raster_layers.ImageOverlay(
+            image=imagen_densidad(conteos),
+            bounds=[[bordes_lat[0], bordes_lng[0]], [bordes_lat[-1], bordes_lng[-1]]],
+            mercator_project=False,
+        ).add_to(mapa)
+    else:
+        raise ValueError(f"Modo de mapa de calor desconocido: {modo}")
+    return mapa
@@ -0,0 +1,103 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from coordenadas import sanear_coordenadas
+from especies import cargar_registro_especies, codificar_especies
+
+# Con VERIFICAR_MUTACIONES=1 la app comprueba en cada rerun que ninguna vista haya
+# modificado las tablas compartidas
+VARIABLE_VERIFICAR_MUTACIONES = 'VERIFICAR_MUTACIONES'
+
+
+# Especies con el registro canónico (ver especies.py): variantes de mayúsculas, acentos,
+# espacios y errores de tipeo quedan en la misma categoría
+def normalizar_registro_arboles(df, registro=None):
+    df = sanear_coordenadas(df)
+    if 'especie' in df.columns:
+        if registro is None:
+            registro = cargar_registro_especies()
+        df['especie'] = codificar_especies(df['especie'], registro)
+    return df
+
+
+# Fechas de mantenimiento como datetime y año del próximo mantenimiento
+def normalizar_mantenimiento_arboles(df):
+    df = df.copy()
+    for columna in ['fecha_hora', 'prox_fecha_mante']:
+        if columna in df.columns:
+            df[columna] = pd.to_datetime(df[columna], errors='coerce')
+    if 'prox_fecha_mante' in df.columns:
+        df['año_mantenimiento'] = df['prox_fecha_mante'].dt.year.astype('Int64')
+    return df
+
+
+# sup_ha viene con todos los separadores convertidos en puntos ("488.214.568.517.694"),
+# así que no se sabe dónde va la coma decimal: se ubica en la posición que deja el valor
+# más cerca del área de la geometría (area_m2). Sin sup_ha se usa directamente ese área.
+def leer_superficie_ha(sup_ha, area_m2):
+    digitos = pd.to_numeric(pd.Series(sup_ha, dtype='str').str.replace('.', '', regex=False), errors='coerce')
+    digitos = digitos.to_numpy(dtype='float64')
+    referencia = np.asarray(area_m2, dtype='float64') / 10_000
+    with np.errstate(divide='ignore', invalid='ignore'):
+        exponente = np.round(np.log10(digitos) - np.log10(referencia))
+        superficie = digitos / 10 ** exponente
+    return np.where(np.isfinite(superficie) & (superficie > 0), superficie, referencia)
+
+
+def normalizar_barrios(df):
+    if 'sup_ha' in df.columns and 'area_m2' in df.columns:
+        df['sup_ha'] = leer_superficie_ha(df['sup_ha'], df['area_m2'])
+    return df
+
+
+NORMALIZACIONES = {
+    'registro_arboles': normalizar_registro_arboles,
+    'puntos_verdes': sanear_coordenadas,
+    'mantenimiento_arboles': normalizar_mantenimiento_arboles,
+    'barrios': normalizar_barrios,
+}
+
+
+# Normalizar una tabla recién cargada (las tablas sin normalización se devuelven igual)
+def normalizar_tabla(nombre, df):
+    normalizar = NORMALIZACIONES.get(nombre)
+    return normalizar(df) if normalizar else df
+
+
+# Agregar filas nuevas al final de una tabla ya normalizada. Las columnas categóricas
+# se llevan a la unión de categorías de ambas partes para que sigan siendo categóricas.
+def concatenar_tablas(df, nuevas):
+    df_cat, nuevas_cat = {}, {}
+    for columna in df.columns:
+        if isinstance(df[columna].dtype, pd.CategoricalDtype) and isinstance(nuevas[columna].dtype, pd.CategoricalDtype):
+            categorias = df[columna].cat.categories.union(nuevas[columna].cat.categories)
+            if not df[columna].cat.categories.equals(categorias):
+                df_cat[columna] = df[columna].cat.set_categories(categorias)
+            nuevas_cat[columna] = nuevas[columna].cat.set_categories(categorias)
+    return pd.concat([df.assign(**df_cat), nuevas.assign(**nuevas_cat)[df.columns]], ignore_index=True)
+
+
+# Huella de una tabla: columnas, tipos, largo y hash del contenido
+def huella(df):
+    return (
+        tuple(df.columns),
+        tuple(str(tipo) for tipo in df.dtypes),
+        len(df),
+        int(pd.util.hash_pandas_object(df, index=True).sum()),
+    )
+
+
+def huellas_tablas(tablas):
+    return {nombre: huella(df) for nombre, df in tablas.items()}
+
+
+def verificacion_mutaciones_activa():
+    return os.environ.get(VARIABLE_VERIFICAR_MUTACIONES, '') not in ('', '0')
+
+
+# Fallar si alguna de las tablas compartidas cambió desde que se cargó
+def verificar_sin_mutaciones(tablas, huellas):
+    modificadas = [nombre for nombre, df in tablas.items() if huella(df) != huellas[nombre]]
+    assert not modificadas, f'Las vistas modificaron tablas compartidas: {", ".join(modificadas)}'
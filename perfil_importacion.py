@@ -0,0 +1,142 @@
+# Perfil de arranque de app.py por vista, al estilo de `python -X importtime` pero agrupado:
+# cada vista se abre en un proceso nuevo (con AppTest de Streamlit) y las importaciones se
+# reparten en lo que carga Streamlit, lo que carga el arranque común de la app y lo que
+# suma cada vista. También mide la primera ejecución de la vista y un rerun.
+#
+# Uso: python perfil_importacion.py [--vistas "Árboles y Especies" ...] [--top 8] [--salida perfil.json]
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(DIRECTORIO, 'app.py')
+
+VISTAS = ["Puntos y Espacios Verdes", "Árboles y Especies", "Estado de Salud de Árboles", "Espacios Verdes en Barrios"]
+
+MARCA = '#perfil_importacion '
+
+# Fases de cada proceso: Streamlit y AppTest, la primera ejecución de la vista y un rerun
+FASES = ('streamlit', 'app', 'rerun')
+
+SCRIPT_VISTA = '''
+import json, sys, time
+def fase(nombre):
+    sys.stderr.write({marca!r} + nombre + "\\n")
+    sys.stderr.flush()
+fase("streamlit")
+from streamlit.testing.v1 import AppTest
+fase("app")
+at = AppTest.from_file({app!r}, default_timeout=600)
+at.session_state["vista"] = {vista!r}
+inicio = time.perf_counter()
+at.run()
+primera = time.perf_counter() - inicio
+fase("rerun")
+inicio = time.perf_counter()
+at.run()
+rerun = time.perf_counter() - inicio
+print(json.dumps({{"primera_s": primera, "rerun_s": rerun, "error": str(at.exception[0].message) if at.exception else None}}))
+'''
+
+PATRON_IMPORTTIME = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s(\s*)(\S+)$')
+
+
+# Leer la salida de -X importtime: tiempo propio (µs) de cada módulo, por fase
+def leer_importtime(stderr):
+    modulos = {fase: {} for fase in FASES}
+    fase = None
+    for linea in stderr.splitlines():
+        if linea.startswith(MARCA):
+            fase = linea[len(MARCA):].strip()
+            continue
+        coincidencia = PATRON_IMPORTTIME.match(linea)
+        if coincidencia and fase in modulos:
+            modulos[fase][coincidencia.group(4)] = int(coincidencia.group(1))
+    return modulos
+
+
+# Perfilar una vista en un proceso nuevo
+def perfilar_vista(vista):
+    script = SCRIPT_VISTA.format(marca=MARCA, app=APP, vista=vista)
+    proceso = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', script],
+        cwd=DIRECTORIO, capture_output=True, text=True, encoding='utf-8'
+    )
+    if proceso.returncode != 0 or not proceso.stdout.strip():
+        raise RuntimeError(f'No se pudo perfilar la vista {vista!r}:\n{proceso.stderr[-2000:]}')
+    resultado = json.loads(proceso.stdout.strip().splitlines()[-1])
+    resultado['modulos'] = leer_importtime(proceso.stderr)
+    return resultado
+
+
+# Resumen de un grupo de módulos: total y paquetes que más tardan (tiempo propio sumado)
+def resumir(modulos, top):
+    por_paquete = defaultdict(int)
+    for nombre, micros in modulos.items():
+        por_paquete[nombre.split('.')[0]] += micros
+    paquetes = sorted(por_paquete.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        'ms': round(sum(modulos.values()) / 1000, 1),
+        'modulos': len(modulos),
+        'paquetes': [{'paquete': paquete, 'ms': round(micros / 1000, 1)} for paquete, micros in paquetes],
+    }
+
+
+# Agrupar: lo que importan todas las vistas es el arranque común, el resto se atribuye a la vista
+def agrupar(perfiles, top):
+    comunes = set.intersection(*(set(perfil['modulos']['app']) for perfil in perfiles.values()))
+    primera = next(iter(perfiles.values()))
+    reporte = {
+        'streamlit': resumir(primera['modulos']['streamlit'], top),
+        'arranque_comun': resumir({m: primera['modulos']['app'][m] for m in comunes}, top),
+        'vistas': {},
+    }
+    for vista, perfil in perfiles.items():
+        propios = {m: t for m, t in perfil['modulos']['app'].items() if m not in comunes}
+        reporte['vistas'][vista] = {
+            'importaciones': resumir(propios, top),
+            'importaciones_en_rerun': sorted(perfil['modulos']['rerun']),
+            'primera_s': round(perfil['primera_s'], 3),
+            'rerun_s': round(perfil['rerun_s'], 3),
+            'error': perfil['error'],
+        }
+    return reporte
+
+
+def imprimir(reporte):
+    def paquetes(resumen):
+        return ', '.join(f"{p['paquete']} {p['ms']:.0f}" for p in resumen['paquetes'])
+
+    print(f"{'Streamlit + AppTest':<30} {reporte['streamlit']['ms']:>8.1f} ms")
+    comun = reporte['arranque_comun']
+    print(f"{'Arranque común de app.py':<30} {comun['ms']:>8.1f} ms  {comun['modulos']:>4} módulos  ({paquetes(comun)})")
+    for vista, datos in reporte['vistas'].items():
+        propios = datos['importaciones']
+        print(f"{vista:<30} {propios['ms']:>8.1f} ms  {propios['modulos']:>4} módulos  ({paquetes(propios)})")
+        print(f"{'':<30} primera ejecución {datos['primera_s']:.3f} s, rerun {datos['rerun_s']:.3f} s"
+              + (f", importa en rerun: {', '.join(datos['importaciones_en_rerun'])}" if datos['importaciones_en_rerun'] else '')
+              + (f", ERROR: {datos['error']}" if datos['error'] else ''))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Perfil de importación y arranque de app.py por vista')
+    parser.add_argument('--vistas', nargs='+', default=VISTAS, choices=VISTAS)
+    parser.add_argument('--top', type=int, default=8, help='Paquetes a mostrar por grupo')
+    parser.add_argument('--salida', help='Archivo JSON donde guardar el reporte')
+    args = parser.parse_args()
+
+    perfiles = {vista: perfilar_vista(vista) for vista in args.vistas}
+    reporte = agrupar(perfiles, args.top)
+    imprimir(reporte)
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(reporte, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+from almacen_datos import DIRECTORIO_ALMACEN, DIRECTORIO_DATOS, TABLAS, ingestar, pa, version_datos
+from instantaneas import (ARCHIVO_TESELAS, DIRECTORIO_INSTANTANEAS, VARIABLE_PREPARACION, borrar_preparaciones,
+                          crear_preparacion, escribir_tabla, publicar, version_publicada)
+from servidor_teselas import teselas_activas
+from tablas_compartidas import COLUMNAS_VISTAS, TablasCompartidas
+
+# Proceso de precálculo del tablero: vigila los CSV de ./data y, cuando cambian, arma una
+# instantánea con todas las tablas que usan las vistas, las tablas derivadas y los mapas y
+# gráficos ya serializados, y la publica (ver instantaneas.py). La app, con
+# USAR_INSTANTANEAS=1, solo lee la última publicada: las sesiones no calculan nada y un
+# cambio de datos no frena ninguna página, que sigue mostrando la instantánea anterior
+# hasta que está lista la nueva.
+#
+# Uso: python precalculo.py [--intervalo 5] [--una-vez] [--forzar]
+#
+# Se corre desde el directorio de la app (lee ./data como ella). Las figuras se arman
+# corriendo la app sin servidor (streamlit.testing.AppTest) sobre la instantánea en
+# preparación, en un proceso aparte: son las mismas funciones que usa la app.
+
+RUTA_APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+
+# Segundos entre revisiones de los CSV
+INTERVALO_S = 5
+TIEMPO_MAXIMO_S = 3600
+
+# Vistas que tienen mapas o gráficos; en la primera se recorren todas las clasificaciones
+VISTAS_CON_FIGURAS = ['Puntos y Espacios Verdes', 'Árboles y Especies', 'Estado de Salud de Árboles',
+                      'Espacios Verdes en Barrios', 'Cobertura de Espacios Verdes']
+
+
+# Tablas de las vistas (sin los seguimientos, que las vistas usan solo a través de las
+# tablas derivadas) y tablas derivadas, en Arrow
+def escribir_tablas(ruta, directorio_datos=DIRECTORIO_DATOS, directorio_almacen=DIRECTORIO_ALMACEN):
+    from cobertura_verde import cargar_cobertura, cargar_distancias_arboles
+    from cubo_barrios import cargar_cubo
+    from especies import cargar_registro_especies, contar_especies
+    from estado_arboles import construir_estado_arboles
+    from indicadores import contar_mantenimientos_por_año
+
+    tablas, _ = TablasCompartidas(COLUMNAS_VISTAS, directorio_datos, directorio_almacen).obtener()
+    mantenimiento = tablas.pop('mantenimiento_arboles')
+    derivadas = {
+        'estado_arboles': construir_estado_arboles(tablas['registro_arboles'], mantenimiento),
+        'conteo_especies': contar_especies(tablas['registro_arboles']['especie'], cargar_registro_especies()),
+        'mantenimientos_por_año': contar_mantenimientos_por_año(mantenimiento),
+        'distancias_verdes': cargar_distancias_arboles(directorio_datos, directorio_almacen),
+        'cobertura_verde': cargar_cobertura(directorio_datos, directorio_almacen),
+    }
+    for parte, df in cargar_cubo(directorio_datos, directorio_almacen, mantenimiento).items():
+        derivadas[f'cubo_{parte}'] = df
+    for nombre, df in {**tablas, **derivadas}.items():
+        escribir_tabla(df, os.path.join(ruta, 'tablas', f'{nombre}.arrow'))
+
+
+# Correr la app sobre la instantánea en preparación (en este proceso): cada mapa y gráfico
+# que arma la caché de figuras se guarda en la instantánea
+def guardar_figuras(ruta):
+    from streamlit.testing.v1 import AppTest
+
+    os.environ[VARIABLE_PREPARACION] = ruta
+    at = AppTest.from_file(RUTA_APP, default_timeout=TIEMPO_MAXIMO_S)
+    at.run()
+    for vista in VISTAS_CON_FIGURAS:
+        at.sidebar.selectbox(key='vista').set_value(vista).run()
+        if vista == 'Puntos y Espacios Verdes':
+            for clasificacion in at.sidebar.selectbox[1].options[1:]:
+                at.sidebar.selectbox[1].set_value(clasificacion).run()
+        if at.exception:
+            raise RuntimeError(f"Error en la vista {vista}: {at.exception[0].message}")
+
+
+# Armar y publicar la instantánea de la versión actual de los datos. Si los CSV cambian
+# mientras se arma, se descarta (la próxima revisión arma la nueva).
+def preparar_instantanea(directorio=DIRECTORIO_INSTANTANEAS):
+    from geojson_espacios import decodificar_espacios_verdes
+
+    version = version_datos()
+    tiempos = {}
+    inicio = time.perf_counter()
+    if pa is not None:
+        ingestar(DIRECTORIO_DATOS, DIRECTORIO_ALMACEN, solo_vencidas=True)
+    os.makedirs(directorio, exist_ok=True)
+    _, reporte_geojson = decodificar_espacios_verdes(os.path.join(DIRECTORIO_DATOS, TABLAS['espacios_verdes']))
+    ruta = crear_preparacion(version, reporte_geojson, directorio)
+    try:
+        escribir_tablas(ruta)
+        tiempos['tablas'] = time.perf_counter() - inicio
+
+        # Con los mapas en teselas, el MBTiles que sirve la app va en la instantánea
+        if teselas_activas():
+            from teselas_vectoriales import generar_mbtiles
+
+            inicio = time.perf_counter()
+            generar_mbtiles(os.path.join(ruta, ARCHIVO_TESELAS))
+            tiempos['teselas'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, os.path.abspath(__file__), '--caso', 'figuras', '--preparacion', ruta],
+                       check=True)
+        tiempos['figuras'] = time.perf_counter() - inicio
+
+        if version_datos() != version:
+            shutil.rmtree(ruta, ignore_errors=True)
+            return None, tiempos
+        publicar(ruta, directorio)
+    except BaseException:
+        shutil.rmtree(ruta, ignore_errors=True)
+        raise
+    return version, tiempos
+
+
+def informar(version, tiempos):
+    detalle = '  '.join(f'{paso} {segundos:.2f} s' for paso, segundos in tiempos.items())
+    if version is None:
+        print(f'Los datos cambiaron durante el precálculo, se descarta ({detalle})', flush=True)
+    else:
+        print(f'Instantánea {version} publicada ({detalle})', flush=True)
+
+
+# Revisar los CSV cada `intervalo` segundos. Se espera a que la versión se mantenga una
+# revisión completa (un CSV que se está copiando cambia entre revisiones) y una versión
+# que falló no se vuelve a intentar hasta que cambien los datos.
+def vigilar(intervalo=INTERVALO_S, directorio=DIRECTORIO_INSTANTANEAS):
+    borrar_preparaciones(directorio)
+    anterior = None
+    fallida = None
+    while True:
+        version = version_datos()
+        if version == anterior and version not in (version_publicada(directorio), fallida):
+            try:
+                informar(*preparar_instantanea(directorio))
+            except Exception as error:
+                print(f'Error al preparar la instantánea {version}: {error}', flush=True)
+                fallida = version
+        anterior = version
+        time.sleep(intervalo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precalcular y publicar instantáneas del tablero')
+    parser.add_argument('--intervalo', type=float, default=INTERVALO_S, help='Segundos entre revisiones de los CSV')
+    parser.add_argument('--una-vez', action='store_true', help='Publicar la instantánea de los datos actuales y salir')
+    parser.add_argument('--forzar', action='store_true', help='Con --una-vez, publicar aunque la versión ya esté publicada')
+    parser.add_argument('--caso', help=argparse.SUPPRESS)
+    parser.add_argument('--preparacion', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.caso == 'figuras':
+        guardar_figuras(args.preparacion)
+        return
+    if not args.una_vez:
+        vigilar(args.intervalo)
+        return
+
+    borrar_preparaciones()
+    if not args.forzar and version_datos() == version_publicada():
+        print(f'La instantánea {version_publicada()} ya está publicada')
+        return
+    version, tiempos = preparar_instantanea()
+    informar(version, tiempos)
+    if version is None:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+# Paradas por paquete de trabajo (lo que una cuadrilla recorre en un día)
+PARADAS_POR_PAQUETE = 40
+
+# Bits por eje de la grilla sobre la que se ordenan las paradas con la curva de Hilbert
+# (2**16 celdas por lado: en la ciudad, celdas de menos de un metro)
+BITS_GRILLA = 16
+
+# Vueltas máximas de 2-opt por paquete y mejora mínima (en metros) para aceptar un cambio
+MAXIMO_VUELTAS_2OPT = 50
+MEJORA_MINIMA_M = 1e-6
+
+# Con menos paradas que estas en total no conviene levantar procesos (cada uno tarda en
+# arrancar más de lo que se tarda en ordenar unos pocos paquetes): se ordenan en este proceso
+MINIMO_PARADAS_PROCESOS = 5000
+
+
+# Índice de cada celda (x, y) de una grilla de 2**bits por lado en la curva de Hilbert:
+# celdas cercanas en la curva están cerca en el plano
+def indice_hilbert(x, y, bits=BITS_GRILLA):
+    x = np.asarray(x, dtype='int64').copy()
+    y = np.asarray(y, dtype='int64').copy()
+    lado = 1 << bits
+    indice = np.zeros(len(x), dtype='int64')
+    s = lado >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        indice += s * s * ((3 * rx) ^ ry)
+        # Rotar el cuadrante para que la curva siga continua
+        rotar = ~ry
+        espejar = rotar & rx
+        x[espejar] = lado - 1 - x[espejar]
+        y[espejar] = lado - 1 - y[espejar]
+        x[rotar], y[rotar] = y[rotar], x[rotar].copy()
+        s >>= 1
+    return indice
+
+
+# Repartir las paradas en paquetes de trabajo: se ordenan por la curva de Hilbert sobre una
+# grilla de la zona y la secuencia se corta cada `paradas` paradas, así cada paquete junta
+# paradas vecinas. Devuelve el número de paquete (desde 0) de cada parada.
+def agrupar_paradas(x, y, paradas=PARADAS_POR_PAQUETE, bits=BITS_GRILLA):
+    if len(x) == 0:
+        return np.zeros(0, dtype='int64')
+    celdas = (1 << bits) - 1
+    ancho = max(np.ptp(x), np.ptp(y), 1.0)
+    columna = np.floor((x - x.min()) / ancho * celdas).astype('int64')
+    fila = np.floor((y - y.min()) / ancho * celdas).astype('int64')
+    orden = np.argsort(indice_hilbert(columna, fila, bits), kind='stable')
+    paquetes = np.empty(len(x), dtype='int64')
+    paquetes[orden] = np.arange(len(x)) // paradas
+    return paquetes
+
+
+def matriz_distancias(x, y):
+    return np.hypot(x[:, None] - x[None, :], y[:, None] - y[None, :])
+
+
+# Recorrido por vecino más cercano desde el nodo 0 (el punto de partida)
+def vecino_mas_cercano(distancias):
+    cantidad = len(distancias)
+    visitado = np.zeros(cantidad, dtype=bool)
+    recorrido = np.empty(cantidad, dtype='int64')
+    actual = 0
+    for paso in range(cantidad):
+        recorrido[paso] = actual
+        visitado[actual] = True
+        if paso < cantidad - 1:
+            candidatas = np.where(visitado, np.inf, distancias[actual])
+            actual = int(np.argmin(candidatas))
+    return recorrido
+
+
+# Mejorar un recorrido abierto que empieza en el nodo 0 con 2-opt: invertir el tramo
+# recorrido[i..j] si acorta el camino. Para cada i se evalúan todos los j a la vez.
+def dos_opt(recorrido, distancias, maximo_vueltas=MAXIMO_VUELTAS_2OPT):
+    recorrido = recorrido.copy()
+    cantidad = len(recorrido)
+    for _ in range(maximo_vueltas):
+        mejoro = False
+        for i in range(1, cantidad - 1):
+            a, b = recorrido[i - 1], recorrido[i]
+            c = recorrido[i + 1:]
+            # El nodo que sigue a cada j (el último no tiene siguiente)
+            e = recorrido[i + 2:]
+            delta = distancias[a, c] - distancias[a, b]
+            delta[:-1] += distancias[b, e] - distancias[c[:-1], e]
+            j = int(np.argmin(delta))
+            if delta[j] < -MEJORA_MINIMA_M:
+                recorrido[i:i + j + 2] = recorrido[i:i + j + 2][::-1].copy()
+                mejoro = True
+        if not mejoro:
+            break
+    return recorrido
+
+
+# Ordenar las paradas de un paquete partiendo del punto verde (primer punto). Devuelve el
+# orden de visita de las paradas (posiciones desde 0, sin el punto de partida) y el largo
+# de cada tramo en metros.
+def ordenar_paquete(x, y):
+    distancias = matriz_distancias(x, y)
+    recorrido = dos_opt(vecino_mas_cercano(distancias), distancias)
+    tramos = distancias[recorrido[:-1], recorrido[1:]]
+    return recorrido[1:] - 1, tramos
+
+
+def _ordenar_paquete(args):
+    return ordenar_paquete(*args)
+
+
+# Ordenar varios paquetes, en procesos aparte si son muchas paradas (`procesos` None usa
+# todos los núcleos; 1, ninguno)
+def ordenar_paquetes(puntos, procesos=None):
+    procesos = os.cpu_count() if procesos is None else procesos
+    if procesos <= 1 or len(puntos) < 2 or sum(len(x) for x, _ in puntos) < MINIMO_PARADAS_PROCESOS:
+        return [ordenar_paquete(x, y) for x, y in puntos]
+    # 'spawn' porque el proceso de la app tiene hilos (Streamlit) y fork no es seguro con ellos
+    with ProcessPoolExecutor(max_workers=min(procesos, len(puntos)), mp_context=get_context('spawn')) as pool:
+        return list(pool.map(_ordenar_paquete, puntos, chunksize=max(1, len(puntos) // (4 * procesos))))
+
+
+# Planificar las rutas de las cuadrillas para las paradas (árboles con lat y lng): se
+# reparten en paquetes diarios de paradas vecinas, cada paquete sale del punto verde más
+# cercano a su centro y se ordena con vecino más cercano y 2-opt. Los paquetes se numeran
+# empezando por el de mayor puntaje de riesgo (si las paradas lo traen). Devuelve una fila
+# por parada con paquete, orden, punto_verde y distancia_m (largo del tramo hasta ella).
+def planificar_rutas(paradas_df, puntos_verdes_df, paradas=PARADAS_POR_PAQUETE, procesos=None):
+    from geometria_barrios import proyectar_puntos
+
+    paradas_df = paradas_df.dropna(subset=['lat', 'lng']).reset_index(drop=True)
+    depositos = puntos_verdes_df.dropna(subset=['lat', 'lng']).reset_index(drop=True)
+    columnas = ['paquete', 'orden', 'punto_verde'] + list(paradas_df.columns) + ['distancia_m']
+    if paradas_df.empty or depositos.empty:
+        return pd.DataFrame(columns=columnas)
+
+    x, y = proyectar_puntos(paradas_df['lat'], paradas_df['lng'])
+    deposito_x, deposito_y = proyectar_puntos(depositos['lat'], depositos['lng'])
+    paquetes = agrupar_paradas(x, y, paradas)
+
+    # Punto verde más cercano al centro de cada paquete
+    cantidad_paquetes = int(paquetes.max()) + 1
+    paradas_paquete = np.bincount(paquetes, minlength=cantidad_paquetes)
+    centro_x = np.bincount(paquetes, weights=x, minlength=cantidad_paquetes) / paradas_paquete
+    centro_y = np.bincount(paquetes, weights=y, minlength=cantidad_paquetes) / paradas_paquete
+    deposito = np.argmin(np.hypot(centro_x[:, None] - deposito_x[None, :], centro_y[:, None] - deposito_y[None, :]), axis=1)
+
+    miembros = np.split(np.argsort(paquetes, kind='stable'), np.cumsum(paradas_paquete)[:-1])
+    puntos = [
+        (np.concatenate([[deposito_x[deposito[paquete]]], x[indices]]),
+         np.concatenate([[deposito_y[deposito[paquete]]], y[indices]]))
+        for paquete, indices in enumerate(miembros)
+    ]
+    rutas = []
+    for paquete, (orden, tramos) in enumerate(ordenar_paquetes(puntos, procesos)):
+        ruta = paradas_df.iloc[miembros[paquete][orden]].reset_index(drop=True)
+        ruta.insert(0, 'paquete', paquete)
+        ruta.insert(1, 'orden', np.arange(1, len(ruta) + 1))
+        ruta.insert(2, 'punto_verde', depositos['ubicacion'].iloc[deposito[paquete]])
+        ruta['distancia_m'] = tramos.round(1)
+        rutas.append(ruta)
+    rutas = pd.concat(rutas, ignore_index=True)
+
+    # Numerar los paquetes por prioridad: primero el de la parada más riesgosa
+    if 'puntaje_riesgo' in rutas.columns:
+        prioridad = rutas.groupby('paquete')['puntaje_riesgo'].agg(['max', 'sum'])
+        prioridad = prioridad.sort_values(['max', 'sum'], ascending=False, kind='stable')
+        numero = pd.Series(np.arange(1, len(prioridad) + 1), index=prioridad.index)
+    else:
+        numero = pd.Series(np.arange(1, cantidad_paquetes + 1))
+    rutas['paquete'] = rutas['paquete'].map(numero)
+    return rutas.sort_values(['paquete', 'orden'], ignore_index=True)[columnas]
+
+
+# Resumen por paquete: punto verde de partida, paradas y distancia total
+def resumen_rutas(rutas):
+    return rutas.groupby('paquete').agg(
+        punto_verde=('punto_verde', 'first'),
+        paradas=('orden', 'size'),
+        distancia_km=('distancia_m', lambda distancias: round(distancias.sum() / 1000, 2)),
+    ).reset_index()
@@ -0,0 +1,142 @@
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+# Servidor local de las teselas vectoriales de un MBTiles (ver teselas_vectoriales.py), con
+# la biblioteca estándar: GET /teselas/{z}/{x}/{y}.pbf devuelve la tesela tal como está
+# guardada (comprimida con gzip) y /teselas/metadata.json los metadatos. Una tesela sin
+# elementos no está en el MBTiles y se responde 204. El MBTiles se puede cambiar con el
+# servidor andando (cuando cambian los datos): las conexiones se abren por hilo y archivo.
+PUERTO_TESELAS = 8765
+
+# Con MAPAS_CON_TESELAS=1 los mapas de la app piden las geometrías como teselas en lugar
+# de llevarlas en el HTML. URL_TESELAS es la dirección del servidor vista desde el
+# navegador (por defecto, localhost con el puerto PUERTO_TESELAS).
+VARIABLE_TESELAS = 'MAPAS_CON_TESELAS'
+VARIABLE_URL = 'URL_TESELAS'
+VARIABLE_PUERTO = 'PUERTO_TESELAS'
+
+# Segundos que el navegador puede guardar una tesela: la URL de los mapas lleva la
+# versión de los datos, así que una tesela vieja no se vuelve a pedir
+SEGUNDOS_CACHE = 86400
+
+PATRON_TESELA = re.compile(r'/teselas/(\d+)/(\d+)/(\d+)\.pbf')
+
+
+def teselas_activas():
+    return os.environ.get(VARIABLE_TESELAS, '') not in ('', '0')
+
+
+def puerto_teselas():
+    return int(os.environ.get(VARIABLE_PUERTO) or PUERTO_TESELAS)
+
+
+# URL de las teselas para Leaflet, con la versión de los datos para que el navegador no
+# use teselas guardadas de otra versión
+def url_teselas(version):
+    base = os.environ.get(VARIABLE_URL) or f'http://localhost:{puerto_teselas()}'
+    return f"{base.rstrip('/')}/teselas/{{z}}/{{x}}/{{y}}.pbf?v={version}"
+
+
+class ServidorTeselas(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, direccion, ruta_mbtiles):
+        super().__init__(direccion, ManejadorTeselas)
+        self.ruta_mbtiles = ruta_mbtiles
+        self._local = threading.local()
+
+    # Conexión de solo lectura del hilo al MBTiles actual
+    def conexion(self):
+        ruta = self.ruta_mbtiles
+        if getattr(self._local, 'ruta', None) != ruta:
+            if getattr(self._local, 'conexion', None) is not None:
+                self._local.conexion.close()
+            self._local.conexion = sqlite3.connect(f'file:{ruta}?mode=ro', uri=True)
+            self._local.ruta = ruta
+        return self._local.conexion
+
+    def leer_tesela(self, zoom, x, y):
+        fila = self.conexion().execute(
+            'SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?',
+            (zoom, x, (1 << zoom) - 1 - y)
+        ).fetchone()
+        return fila[0] if fila else None
+
+    def leer_metadatos(self):
+        metadatos = dict(self.conexion().execute('SELECT name, value FROM metadata').fetchall())
+        if 'json' in metadatos:
+            metadatos.update(json.loads(metadatos.pop('json')))
+        return metadatos
+
+
+class ManejadorTeselas(BaseHTTPRequestHandler):
+    def do_GET(self):
+        ruta = urlsplit(self.path).path
+        if ruta == '/teselas/metadata.json':
+            cuerpo = json.dumps(self.server.leer_metadatos(), ensure_ascii=False).encode('utf-8')
+            self.responder(200, cuerpo, {'Content-Type': 'application/json'})
+            return
+        coincidencia = PATRON_TESELA.fullmatch(ruta)
+        if coincidencia is None:
+            self.responder(404)
+            return
+        datos = self.server.leer_tesela(*(int(valor) for valor in coincidencia.groups()))
+        if datos is None:
+            self.responder(204)
+            return
+        self.responder(200, datos, {'Content-Type': 'application/vnd.mapbox-vector-tile', 'Content-Encoding': 'gzip'})
+
+    def responder(self, estado, cuerpo=b'', encabezados=None):
+        self.send_response(estado)
+        # Los mapas están en el iframe de la app, en otro origen
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Cache-Control', f'public, max-age={SEGUNDOS_CACHE}')
+        for nombre, valor in (encabezados or {}).items():
+            self.send_header(nombre, valor)
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        if cuerpo:
+            self.wfile.write(cuerpo)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+# Servidor en un hilo aparte (la app lo arranca una vez, ver app.py). None si el puerto ya
+# está ocupado: otro proceso de la app (o servidor_teselas.py) ya está sirviendo las teselas.
+def iniciar_servidor(ruta_mbtiles, puerto=None, host='127.0.0.1'):
+    try:
+        servidor = ServidorTeselas((host, puerto or puerto_teselas()), ruta_mbtiles)
+    except OSError:
+        return None
+    threading.Thread(target=servidor.serve_forever, name='servidor_teselas', daemon=True).start()
+    return servidor
+
+
+def main():
+    from teselas_vectoriales import cargar_mbtiles
+
+    parser = argparse.ArgumentParser(description='Servir las teselas vectoriales del MBTiles')
+    parser.add_argument('--mbtiles', help='Archivo MBTiles (por defecto, el del almacén para los datos actuales)')
+    parser.add_argument('--puerto', type=int, default=None)
+    parser.add_argument('--host', default='127.0.0.1')
+    args = parser.parse_args()
+
+    ruta = args.mbtiles or cargar_mbtiles()
+    puerto = args.puerto or puerto_teselas()
+    servidor = ServidorTeselas((args.host, puerto), ruta)
+    print(f'Sirviendo {ruta} en http://{args.host}:{puerto}/teselas/{{z}}/{{x}}/{{y}}.pbf', flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+import threading
+
+from almacen_datos import (DIRECTORIO_ALMACEN, DIRECTORIO_DATOS, actualizar_incremental, cargar_tabla, leer_tramos,
+                           ordenar_categorias, version_datos)
+from normalizacion import concatenar_tablas, huella, normalizar_tabla
+
+# Columnas que usan las vistas de la app de cada tabla (solo se leen estas del almacén)
+COLUMNAS_VISTAS = {
+    'registro_arboles': ['id_arbol', 'especie', 'lat', 'lng'],
+    'espacios_verdes': ['gid', 'clasificacion', 'id_barrios'],
+    'puntos_verdes': ['ubicacion', 'lat', 'lng'],
+    'mantenimiento_arboles': [
+        'id_seguimiento', 'id_arbol', 'fecha_hora', 'estado_salud', 'prox_fecha_mante', 'riesgo', 'inclinacion',
+        'ahuecamiento'
+    ],
+    'barrios': ['id_barrios', 'nombre_barrio'],
+}
+
+
+# Tablas normalizadas que comparten los reruns y las sesiones de la app. En cada rerun
+# se revisa la versión de cada CSV por separado y solo se vuelve a cargar la tabla que
+# cambió. En las tablas incrementales (ver TABLAS_INCREMENTALES en almacen_datos.py) se
+# leen y normalizan solo las filas agregadas, que se suman al final de la tabla ya cargada.
+# `recargas` cuenta por tabla las cargas completas: mientras no cambie, las filas que ya
+# estaban no cambiaron y lo que sigue a ellas es lo nuevo.
+class TablasCompartidas:
+    def __init__(self, columnas, directorio_datos=DIRECTORIO_DATOS, directorio_almacen=DIRECTORIO_ALMACEN,
+                 verificar=False):
+        self.columnas = columnas
+        self.directorio_datos = directorio_datos
+        self.directorio_almacen = directorio_almacen
+        self.verificar = verificar
+        self.recargas = {}
+        self._tablas = {}
+        self._huellas = {}
+        self._versiones = {}
+        self._leidas = {}
+        self._lock = threading.Lock()
+
+    # Tablas al día y sus huellas (solo con verificar, para VERIFICAR_MUTACIONES)
+    def obtener(self):
+        with self._lock:
+            for nombre in self.columnas:
+                version = version_datos(self.directorio_datos, tablas=[nombre])
+                if self._versiones.get(nombre) != version:
+                    self._actualizar(nombre)
+                    self._versiones[nombre] = version
+            return dict(self._tablas), dict(self._huellas)
+
+    def _actualizar(self, nombre):
+        columnas = self.columnas[nombre]
+        entrada = actualizar_incremental(nombre, self.directorio_datos, self.directorio_almacen)
+        if entrada is None:
+            self._recargar(nombre, normalizar_tabla(nombre, cargar_tabla(
+                nombre, columnas, self.directorio_datos, self.directorio_almacen
+            )))
+            return
+
+        filas = sum(entrada['tramos'])
+        generacion, leidas = self._leidas.get(nombre, (None, 0))
+        if generacion == entrada['generacion'] and filas >= leidas:
+            if filas > leidas:
+                nuevas = leer_tramos(nombre, entrada['tramos'], columnas, desde=leidas,
+                                     directorio_almacen=self.directorio_almacen).to_pandas()
+                self._tablas[nombre] = concatenar_tablas(self._tablas[nombre], normalizar_tabla(nombre, nuevas))
+                self._guardar_huella(nombre)
+        else:
+            tabla = leer_tramos(nombre, entrada['tramos'], columnas, directorio_almacen=self.directorio_almacen)
+            self._recargar(nombre, normalizar_tabla(nombre, ordenar_categorias(tabla.to_pandas())))
+        self._leidas[nombre] = (entrada['generacion'], filas)
+
+    def _recargar(self, nombre, df):
+        self._tablas[nombre] = df
+        self.recargas[nombre] = self.recargas.get(nombre, 0) + 1
+        self._guardar_huella(nombre)
+
+    def _guardar_huella(self, nombre):
+        if self.verificar:
+            self._huellas[nombre] = huella(self._tablas[nombre])
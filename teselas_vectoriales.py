@@ -0,0 +1,389 @@
+import argparse
+import gzip
+import json
+import math
+import os
+import sqlite3
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from almacen_datos import DIRECTORIO_ALMACEN, DIRECTORIO_DATOS, TABLAS, borrar_anteriores, cargar_tabla, version_datos
+from normalizacion import normalizar_tabla
+
+# Teselas vectoriales (Mapbox Vector Tiles) de los árboles, los espacios verdes y los
+# barrios, guardadas en un archivo MBTiles (SQLite) en el almacén. Los mapas piden solo las
+# teselas que se ven en lugar de llevar todas las geometrías dentro del HTML (ver
+# servidor_teselas.py). El formato MVT es un protobuf chico: se codifica acá, sin
+# dependencias además de shapely.
+
+PREFIJO_TESELAS = 'teselas_'
+
+# Unidades de una tesela por lado y margen que se deja alrededor de cada una para que los
+# bordes de los polígonos no se vean cortados
+EXTENSION = 4096
+MARGEN = 64
+
+# Tolerancia de simplificación en unidades de tesela (4096 unidades ≈ 256 píxeles, así que
+# 8 unidades es medio píxel de pantalla: la pérdida no se ve en ese zoom)
+TOLERANCIA = 8
+
+ZOOM_MAXIMO = 16
+
+# Capas de las teselas: zoom mínimo desde el que aparecen y propiedades de cada elemento
+# (la primera es el id del elemento)
+CAPAS = {
+    'barrios': {'zoom_minimo': 8, 'propiedades': ['id_barrios', 'nombre_barrio']},
+    'espacios_verdes': {'zoom_minimo': 10, 'propiedades': ['gid', 'clasificacion']},
+    'arboles': {'zoom_minimo': 13, 'propiedades': ['id_arbol', 'especie']},
+}
+
+# Tipos de geometría y comandos de MVT
+PUNTO = 1
+POLIGONO = 3
+MOVER = 1
+LINEA = 2
+CERRAR = 7
+
+
+# Codificación protobuf: enteros sin signo en varint y campos con clave (número << 3 | tipo)
+def varint(valor):
+    partes = bytearray()
+    while valor > 0x7f:
+        partes.append((valor & 0x7f) | 0x80)
+        valor >>= 7
+    partes.append(valor)
+    return bytes(partes)
+
+
+def campo_varint(numero, valor):
+    return varint(numero << 3) + varint(valor)
+
+
+def campo_bytes(numero, datos):
+    return varint(numero << 3 | 2) + varint(len(datos)) + datos
+
+
+def campo_empaquetado(numero, valores):
+    return campo_bytes(numero, b''.join(varint(valor) for valor in valores))
+
+
+def zigzag(valores):
+    return np.where(valores >= 0, valores * 2, -valores * 2 - 1)
+
+
+def comando(identificador, cantidad):
+    return identificador & 0x7 | cantidad << 3
+
+
+# Valor de una propiedad (mensaje Value): texto, entero o doble
+def codificar_valor(valor):
+    if isinstance(valor, str):
+        return campo_bytes(1, valor.encode('utf-8'))
+    if isinstance(valor, int) and valor >= 0:
+        return campo_varint(4, valor)
+    if isinstance(valor, int):
+        return campo_varint(6, int(zigzag(np.int64(valor))))
+    return varint(3 << 3 | 1) + np.float64(valor).tobytes()
+
+
+# Coordenadas de lng/lat a Web Mercator normalizado (0 a 1, con y hacia el sur)
+def mercator(lng, lat):
+    lat = np.clip(np.asarray(lat, dtype='float64'), -85.0511, 85.0511)
+    x = (np.asarray(lng, dtype='float64') + 180) / 360
+    y = 0.5 - np.log(np.tan(np.pi / 4 + np.radians(lat) / 2)) / (2 * np.pi)
+    return x, y
+
+
+# Anillos de un polígono ya en coordenadas de la tesela: enteros, sin el punto de cierre
+# ni puntos repetidos, con el exterior de área positiva y los agujeros de área negativa
+# (como pide MVT, con y hacia abajo). Los anillos que quedan sin área se descartan.
+def anillos_tesela(poligono):
+    anillos = []
+    for posicion, anillo in enumerate([poligono.exterior, *poligono.interiors]):
+        puntos = np.asarray(anillo.coords)[:-1]
+        if len(puntos) < 3:
+            continue
+        puntos = np.round(puntos).astype('int64')
+        puntos = puntos[np.any(puntos != np.roll(puntos, 1, axis=0), axis=1)]
+        if len(puntos) < 3:
+            continue
+        x, y = puntos[:, 0], puntos[:, 1]
+        area = np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y)
+        if area == 0:
+            if posicion == 0:
+                return []
+            continue
+        if (area > 0) != (posicion == 0):
+            puntos = puntos[::-1]
+        anillos.append(puntos)
+    return anillos
+
+
+# Comandos de geometría de un polígono o multipolígono: cada anillo es un MoveTo, un
+# LineTo con el resto de los puntos y un ClosePath, con coordenadas relativas al punto
+# anterior (el cursor sigue entre anillos)
+def geometria_poligono(geometria):
+    comandos = []
+    cursor = np.zeros(2, dtype='int64')
+    for poligono in shapely.get_parts(geometria):
+        if not isinstance(poligono, shapely.Polygon):
+            continue
+        for puntos in anillos_tesela(poligono):
+            deltas = zigzag(np.diff(np.vstack([cursor, puntos]), axis=0)).ravel().tolist()
+            comandos += [comando(MOVER, 1), *deltas[:2], comando(LINEA, len(puntos) - 1), *deltas[2:],
+                         comando(CERRAR, 1)]
+            cursor = puntos[-1]
+    return comandos
+
+
+# Mensaje Layer: los nombres y valores de las propiedades se guardan una sola vez por capa
+# y cada elemento los referencia por posición
+def codificar_capa(nombre, elementos):
+    claves, valores = {}, {}
+    partes = [campo_varint(15, 2), campo_bytes(1, nombre.encode('utf-8'))]
+    for identificador, propiedades, tipo, geometria in elementos:
+        etiquetas = []
+        for clave, valor in propiedades.items():
+            if valor is None:
+                continue
+            etiquetas += [claves.setdefault(clave, len(claves)), valores.setdefault((type(valor), valor), len(valores))]
+        elemento = campo_varint(1, identificador) if identificador is not None else b''
+        elemento += campo_empaquetado(2, etiquetas) + campo_varint(3, tipo) + campo_empaquetado(4, geometria)
+        partes.append(campo_bytes(2, elemento))
+    partes += [campo_bytes(3, clave.encode('utf-8')) for clave in claves]
+    partes += [campo_bytes(4, codificar_valor(valor)) for _, valor in valores]
+    partes.append(campo_varint(5, EXTENSION))
+    return b''.join(partes)
+
+
+# Mensaje Tile con las capas que tienen elementos en la tesela
+def codificar_tesela(capas):
+    return b''.join(campo_bytes(3, codificar_capa(nombre, elementos)) for nombre, elementos in capas.items())
+
+
+# Propiedades de cada fila como tipos de Python (los NaN se omiten) y el id del elemento
+# (la primera columna, si es un entero no negativo)
+def propiedades_filas(df, columnas):
+    registros = df[columnas].astype(object).where(df[columnas].notna(), None).to_dict(orient='records')
+    for registro in registros:
+        for clave, valor in registro.items():
+            if isinstance(valor, (np.integer, np.floating)):
+                registro[clave] = valor.item()
+            elif valor is not None and not isinstance(valor, (int, float)):
+                registro[clave] = str(valor)
+    ids = [r[columnas[0]] if isinstance(r[columnas[0]], int) and r[columnas[0]] >= 0 else None for r in registros]
+    return ids, registros
+
+
+# Elementos de una capa de puntos en un zoom, agrupados por tesela
+def elementos_puntos(capa, zoom):
+    escala = 2 ** zoom
+    x, y = capa['x'] * escala, capa['y'] * escala
+    teselas_x, teselas_y = np.floor(x).astype('int64'), np.floor(y).astype('int64')
+    locales_x = zigzag(np.round((x - teselas_x) * EXTENSION).astype('int64')).tolist()
+    locales_y = zigzag(np.round((y - teselas_y) * EXTENSION).astype('int64')).tolist()
+
+    orden = np.lexsort((teselas_y, teselas_x))
+    claves = teselas_x[orden] * escala + teselas_y[orden]
+    cortes = np.flatnonzero(np.diff(claves)) + 1
+    for grupo in np.split(orden, cortes):
+        if len(grupo) == 0:
+            continue
+        yield (int(teselas_x[grupo[0]]), int(teselas_y[grupo[0]])), [
+            (capa['ids'][i], capa['propiedades'][i], PUNTO, [comando(MOVER, 1), locales_x[i], locales_y[i]])
+            for i in grupo.tolist()
+        ]
+
+
+# Elementos de una capa de polígonos en un zoom, agrupados por tesela: cada polígono se
+# simplifica para el zoom y se recorta (con el margen) en cada tesela que toca
+def elementos_poligonos(capa, zoom):
+    escala = 2 ** zoom * EXTENSION
+    geometrias = shapely.transform(capa['geometrias'], lambda coordenadas: coordenadas * escala)
+    geometrias = shapely.simplify(geometrias, TOLERANCIA, preserve_topology=True)
+    limites = shapely.bounds(geometrias)
+    desde = np.floor((limites[:, :2] - MARGEN) / EXTENSION).astype('int64')
+    hasta = np.floor((limites[:, 2:] + MARGEN) / EXTENSION).astype('int64')
+    anchos = hasta - desde + 1
+    cantidades = anchos[:, 0] * anchos[:, 1]
+
+    geometria_de_par = np.repeat(np.arange(len(geometrias)), cantidades)
+    posicion = np.arange(len(geometria_de_par)) - np.repeat(np.cumsum(cantidades) - cantidades, cantidades)
+    teselas_x = desde[geometria_de_par, 0] + posicion // anchos[geometria_de_par, 1]
+    teselas_y = desde[geometria_de_par, 1] + posicion % anchos[geometria_de_par, 1]
+    recortes = np.array([
+        shapely.clip_by_rect(geometrias[i], x * EXTENSION - MARGEN, y * EXTENSION - MARGEN,
+                             (x + 1) * EXTENSION + MARGEN, (y + 1) * EXTENSION + MARGEN)
+        for i, x, y in zip(geometria_de_par.tolist(), teselas_x.tolist(), teselas_y.tolist())
+    ], dtype=object)
+
+    # Coordenadas relativas a la esquina de cada tesela
+    coordenadas, pares = shapely.get_coordinates(recortes, return_index=True)
+    coordenadas -= np.column_stack([teselas_x, teselas_y])[pares] * EXTENSION
+    recortes = shapely.set_coordinates(recortes, coordenadas)
+
+    por_tesela = {}
+    for par in np.flatnonzero(~shapely.is_empty(recortes)).tolist():
+        geometria = geometria_poligono(recortes[par])
+        if geometria:
+            i = geometria_de_par[par]
+            por_tesela.setdefault((int(teselas_x[par]), int(teselas_y[par])), []).append(
+                (capa['ids'][i], capa['propiedades'][i], POLIGONO, geometria)
+            )
+    yield from por_tesela.items()
+
+
+# Todas las teselas (zoom, x, y, datos) de las capas, del zoom más chico al más grande
+def generar_teselas(capas, zoom_maximo=ZOOM_MAXIMO):
+    for zoom in range(min(capa['zoom_minimo'] for capa in capas.values()), zoom_maximo + 1):
+        teselas = {}
+        for nombre, capa in capas.items():
+            if zoom < capa['zoom_minimo']:
+                continue
+            elementos = elementos_puntos if 'x' in capa else elementos_poligonos
+            for tesela, elementos_tesela in elementos(capa, zoom):
+                teselas.setdefault(tesela, {})[nombre] = elementos_tesela
+        for (x, y), capas_tesela in sorted(teselas.items()):
+            yield zoom, x, y, codificar_tesela(capas_tesela)
+
+
+# Geometrías en Mercator normalizado de una capa de polígonos
+def capa_poligonos(nombre, geometrias, df):
+    geometrias = shapely.transform(geometrias, lambda coordenadas: np.column_stack(
+        mercator(coordenadas[:, 0], coordenadas[:, 1])))
+    validas = ~(shapely.is_missing(geometrias) | shapely.is_empty(geometrias))
+    ids, propiedades = propiedades_filas(df[validas], CAPAS[nombre]['propiedades'])
+    return {'zoom_minimo': CAPAS[nombre]['zoom_minimo'], 'geometrias': geometrias[validas], 'ids': ids,
+            'propiedades': propiedades}
+
+
+# Capas de las teselas a partir de las tablas del almacén. Los espacios verdes se dibujan
+# con un polígono por anillo, como en el mapa de puntos y espacios verdes.
+def cargar_capas(directorio_datos=DIRECTORIO_DATOS, directorio_almacen=DIRECTORIO_ALMACEN):
+    from geojson_espacios import decodificar_espacios_verdes
+
+    barrios = cargar_tabla('barrios', ['id_barrios', 'nombre_barrio', 'the_geom_barrios_wkb'],
+                           directorio_datos, directorio_almacen)
+    capas = {'barrios': capa_poligonos(
+        'barrios', shapely.from_wkb(barrios['the_geom_barrios_wkb'].to_numpy(dtype=object)), barrios)}
+
+    espacios_verdes = cargar_tabla('espacios_verdes', ['gid', 'clasificacion'], directorio_datos, directorio_almacen)
+    anillos, _ = decodificar_espacios_verdes(os.path.join(directorio_datos, TABLAS['espacios_verdes']))
+    poligonos, filas = [], []
+    for posicion, gid in enumerate(espacios_verdes['gid']):
+        for anillo in anillos.get(gid) or []:
+            if len(anillo) >= 4:
+                poligonos.append(shapely.Polygon(anillo[:, ::-1]))
+                filas.append(posicion)
+    capas['espacios_verdes'] = capa_poligonos('espacios_verdes', np.array(poligonos, dtype=object),
+                                              espacios_verdes.iloc[filas])
+
+    arboles = normalizar_tabla('registro_arboles', cargar_tabla(
+        'registro_arboles', ['id_arbol', 'especie', 'lat', 'lng'], directorio_datos, directorio_almacen
+    )).dropna(subset=['lat', 'lng']).drop_duplicates(subset='id_arbol', keep='first')
+    x, y = mercator(arboles['lng'], arboles['lat'])
+    ids, propiedades = propiedades_filas(arboles, CAPAS['arboles']['propiedades'])
+    capas['arboles'] = {'zoom_minimo': CAPAS['arboles']['zoom_minimo'], 'x': x, 'y': y, 'ids': ids,
+                        'propiedades': propiedades}
+    return capas
+
+
+# Metadatos del MBTiles: límites y centro (de los barrios) y las capas con sus campos
+def metadatos_mbtiles(capas, zoom_maximo=ZOOM_MAXIMO):
+    oeste, sur, este, norte = shapely.bounds(shapely.union_all(capas['barrios']['geometrias'])).tolist()
+    oeste, este = oeste * 360 - 180, este * 360 - 180
+    sur, norte = [math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y)))) for y in (norte, sur)]
+    capas_vectoriales = [{
+        'id': nombre,
+        'fields': {campo: 'String' if isinstance(valor, str) else 'Number'
+                   for campo, valor in (capa['propiedades'][0] if capa['propiedades'] else {}).items()},
+        'minzoom': capa['zoom_minimo'],
+        'maxzoom': zoom_maximo,
+    } for nombre, capa in capas.items()]
+    return {
+        'name': 'corrientes_verde',
+        'format': 'pbf',
+        'type': 'overlay',
+        'bounds': f'{oeste:.6f},{sur:.6f},{este:.6f},{norte:.6f}',
+        'center': f'{(oeste + este) / 2:.6f},{(sur + norte) / 2:.6f},13',
+        'minzoom': str(min(capa['zoom_minimo'] for capa in capas.values())),
+        'maxzoom': str(zoom_maximo),
+        'json': json.dumps({'vector_layers': capas_vectoriales}, ensure_ascii=False),
+    }
+
+
+# Escribir las teselas en un MBTiles: las filas van en el esquema TMS (y desde el sur) y
+# los datos comprimidos con gzip, como los sirven los servidores de teselas
+def escribir_mbtiles(teselas, metadatos, ruta):
+    if os.path.exists(ruta + '.tmp'):
+        os.remove(ruta + '.tmp')
+    conexion = sqlite3.connect(ruta + '.tmp')
+    try:
+        conexion.executescript('''
+            CREATE TABLE metadata (name TEXT, value TEXT);
+            CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB);
+        ''')
+        conexion.executemany('INSERT INTO metadata VALUES (?, ?)', metadatos.items())
+        conexion.executemany('INSERT INTO tiles VALUES (?, ?, ?, ?)', (
+            (zoom, x, (1 << zoom) - 1 - y, gzip.compress(datos, mtime=0)) for zoom, x, y, datos in teselas
+        ))
+        conexion.execute('CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row)')
+        conexion.commit()
+    finally:
+        conexion.close()
+    os.replace(ruta + '.tmp', ruta)
+
+
+def ruta_mbtiles(directorio_datos=DIRECTORIO_DATOS, directorio_almacen=DIRECTORIO_ALMACEN):
+    version = version_datos(directorio_datos, tablas=['registro_arboles', 'espacios_verdes', 'barrios'])
+    return os.path.join(directorio_almacen, f'{PREFIJO_TESELAS}{version}.mbtiles')
+
+
+# Generar el MBTiles de los datos actuales en `ruta`
+def generar_mbtiles(ruta, directorio_datos=DIRECTORIO_DATOS, directorio_almacen=DIRECTORIO_ALMACEN,
+                    zoom_maximo=ZOOM_MAXIMO):
+    capas = cargar_capas(directorio_datos, directorio_almacen)
+    escribir_mbtiles(generar_teselas(capas, zoom_maximo), metadatos_mbtiles(capas, zoom_maximo), ruta)
+    return ruta
+
+
+# MBTiles de la versión actual de los datos, generado la primera vez que se pide
+def cargar_mbtiles(directorio_datos=DIRECTORIO_DATOS, directorio_almacen=DIRECTORIO_ALMACEN,
+                   zoom_maximo=ZOOM_MAXIMO):
+    ruta = ruta_mbtiles(directorio_datos, directorio_almacen)
+    if not os.path.exists(ruta):
+        os.makedirs(directorio_almacen, exist_ok=True)
+        generar_mbtiles(ruta, directorio_datos, directorio_almacen, zoom_maximo)
+        borrar_anteriores(PREFIJO_TESELAS, os.path.basename(ruta), directorio_almacen)
+    return ruta
+
+
+# Cantidad y tamaño (comprimido) de las teselas de cada zoom
+def resumen_mbtiles(ruta):
+    with closing(sqlite3.connect(f'file:{ruta}?mode=ro', uri=True)) as conexion:
+        return pd.read_sql_query(
+            'SELECT zoom_level AS zoom, COUNT(*) AS teselas, SUM(LENGTH(tile_data)) AS bytes, '
+            'MAX(LENGTH(tile_data)) AS bytes_maximo FROM tiles GROUP BY zoom_level ORDER BY zoom_level', conexion
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generar las teselas vectoriales (MBTiles) de árboles, espacios '
+                                                 'verdes y barrios')
+    parser.add_argument('--zoom-maximo', type=int, default=ZOOM_MAXIMO)
+    parser.add_argument('--salida', help='Ruta del MBTiles (por defecto, en el almacén según la versión de los datos)')
+    args = parser.parse_args()
+
+    if args.salida:
+        ruta = generar_mbtiles(args.salida, zoom_maximo=args.zoom_maximo)
+    else:
+        ruta = cargar_mbtiles(zoom_maximo=args.zoom_maximo)
+    print(ruta)
+    print(resumen_mbtiles(ruta).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,19 @@
+import glob
+import os
+import shutil
+import sys
+
+import pytest
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, RAIZ)
+
+
+# Copia de los CSV de data/ en un directorio temporal, con su propio almacén
+@pytest.fixture
+def directorio_datos(tmp_path):
+    destino = tmp_path / 'data'
+    destino.mkdir()
+    for ruta in glob.glob(os.path.join(RAIZ, 'data', '*.csv')):
+        shutil.copy(ruta, destino)
+    return str(destino)
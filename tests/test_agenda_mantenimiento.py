@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from agenda_mantenimiento import AgendaMantenimiento, COLUMNAS_RIESGO
+
+HOY = pd.Timestamp('2025-03-01')
+
+
+def agenda_aleatoria(cantidad, semilla=0):
+    rng = np.random.default_rng(semilla)
+    opciones = {
+        'estado_salud': ['Bueno', 'Regular', 'Malo', 'Muerto'],
+        'riesgo': ['Sin riesgo de caída', 'Con riesgo de caída (alto)', 'Arbol parasitado (insectos)'],
+        'inclinacion': ['Sin inclinación', 'Leve', 'Pronunciado'],
+        'ahuecamiento': ['No', 'Alto', None],
+    }
+    return AgendaMantenimiento(pd.DataFrame({
+        'id_arbol': np.arange(cantidad),
+        'especie': 'Lapacho',
+        'lat': -27.48,
+        'lng': -58.83,
+        'prox_fecha_mante': HOY + pd.to_timedelta(rng.integers(-60, 60, cantidad), unit='D'),
+        **{columna: rng.choice(opciones[columna], cantidad) for columna in COLUMNAS_RIESGO},
+    }))
+
+
+# Los K de mayor riesgo salen igual que ordenando todo el rango por puntaje (y por fecha
+# a igual puntaje)
+def test_prioridades_igual_que_ordenar_el_rango():
+    agenda = agenda_aleatoria(500)
+    for desde, hasta, cantidad in [(None, HOY, 20), (HOY, HOY + pd.Timedelta(days=30), 7),
+                                   (HOY - pd.Timedelta(days=5), HOY, 1000), (HOY, HOY, 5)]:
+        rango = agenda.vencimientos(desde, hasta).reset_index(drop=True)
+        esperado = rango.iloc[np.lexsort((np.arange(len(rango)), -rango['puntaje_riesgo'].to_numpy()))[:cantidad]]
+        pd.testing.assert_frame_equal(agenda.prioridades(cantidad, desde, hasta), esperado.reset_index(drop=True))
+
+
+def test_pendientes_separa_atrasados_de_proximos():
+    agenda = agenda_aleatoria(500)
+    fechas = agenda.arboles['prox_fecha_mante']
+    atrasados, proximos = agenda.pendientes(30, hoy=HOY)
+    assert atrasados == (fechas < HOY).sum()
+    assert proximos == ((fechas >= HOY) & (fechas < HOY + pd.Timedelta(days=30))).sum()
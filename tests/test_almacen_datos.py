@@ -0,0 +1,111 @@
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from almacen_datos import TABLAS, cargar_tabla, ingestar, leer_manifiesto
+
+COLUMNAS = ['id_seguimiento', 'id_arbol', 'estado_salud']
+
+
+def ruta_seguimientos(directorio_datos):
+    return os.path.join(directorio_datos, TABLAS['mantenimiento_arboles'])
+
+
+# Línea de un seguimiento existente con otro id_seguimiento (sin salto de línea)
+def linea_seguimiento(directorio_datos, id_seguimiento):
+    with open(ruta_seguimientos(directorio_datos), encoding='utf-8') as f:
+        ultima = f.read().rstrip('\n').split('\n')[-1]
+    return str(id_seguimiento) + ultima[ultima.index(','):]
+
+
+def agregar(directorio_datos, texto):
+    with open(ruta_seguimientos(directorio_datos), 'a', encoding='utf-8') as f:
+        f.write(texto)
+
+
+def cargar(directorio_datos):
+    almacen = os.path.join(directorio_datos, 'almacen')
+    df = cargar_tabla('mantenimiento_arboles', COLUMNAS, directorio_datos, almacen)
+    return df, leer_manifiesto(almacen)['mantenimiento_arboles']
+
+
+def como_csv(directorio_datos):
+    return pd.read_csv(ruta_seguimientos(directorio_datos), usecols=COLUMNAS)[COLUMNAS]
+
+
+@pytest.fixture
+def ingestado(directorio_datos):
+    ingestar(directorio_datos, os.path.join(directorio_datos, 'almacen'))
+    df, entrada = cargar(directorio_datos)
+    return directorio_datos, df, entrada
+
+
+def test_cola_agregada_se_ingesta_como_tramo(ingestado):
+    directorio_datos, df, entrada = ingestado
+    maximo = int(df['id_seguimiento'].max())
+    agregar(directorio_datos, '\n' + linea_seguimiento(directorio_datos, maximo + 1) + '\n')
+
+    despues, entrada_despues = cargar(directorio_datos)
+    assert entrada_despues['generacion'] == entrada['generacion']
+    assert entrada_despues['tramos'] == entrada['tramos'] + [1]
+    pd.testing.assert_frame_equal(despues.astype({'estado_salud': 'str'}),
+                                  como_csv(directorio_datos).astype({'estado_salud': 'str'}))
+
+
+def test_ultima_linea_a_medio_escribir_espera_a_la_proxima_ingesta(ingestado):
+    directorio_datos, df, entrada = ingestado
+    maximo = int(df['id_seguimiento'].max())
+    completa = linea_seguimiento(directorio_datos, maximo + 1)
+    media = linea_seguimiento(directorio_datos, maximo + 2)
+    agregar(directorio_datos, '\n' + completa + '\n' + media[:25])
+
+    despues, entrada_despues = cargar(directorio_datos)
+    assert entrada_despues['generacion'] == entrada['generacion']
+    assert despues['id_seguimiento'].max() == maximo + 1
+    assert despues['estado_salud'].notna().sum() == df['estado_salud'].notna().sum() + 1
+
+    agregar(directorio_datos, media[25:] + '\n')
+    despues, entrada_despues = cargar(directorio_datos)
+    assert entrada_despues['generacion'] == entrada['generacion']
+    assert despues['id_seguimiento'].tolist() == como_csv(directorio_datos)['id_seguimiento'].tolist()
+
+
+# Una ingesta completa que leyó una línea cortada dentro de un texto entre comillas: el
+# resto de la línea no tiene un id_seguimiento válido y la tabla se vuelve a ingestar
+def test_resto_de_una_linea_cortada_vuelve_a_ingestar(directorio_datos):
+    maximo = int(como_csv(directorio_datos)['id_seguimiento'].max())
+    agregar(directorio_datos, '\n' + linea_seguimiento(directorio_datos, maximo + 1)[:40] + '"texto, con coma')
+    ingestar(directorio_datos, os.path.join(directorio_datos, 'almacen'))
+    _, entrada = cargar(directorio_datos)
+
+    agregar(directorio_datos, ' y más"\n' + linea_seguimiento(directorio_datos, maximo + 2) + '\n')
+    despues, entrada_despues = cargar(directorio_datos)
+    assert entrada_despues['generacion'] != entrada['generacion']
+    assert despues['id_seguimiento'].max() == maximo + 2
+
+
+def test_ids_no_crecientes_vuelven_a_ingestar(ingestado):
+    directorio_datos, df, entrada = ingestado
+    agregar(directorio_datos, '\n' + linea_seguimiento(directorio_datos, int(df['id_seguimiento'].min())) + '\n')
+
+    despues, entrada_despues = cargar(directorio_datos)
+    assert entrada_despues['generacion'] != entrada['generacion']
+    assert entrada_despues['tramos'] == [len(df) + 1]
+    assert despues['id_seguimiento'].tolist() == como_csv(directorio_datos)['id_seguimiento'].tolist()
+
+
+def test_archivo_modificado_vuelve_a_ingestar(ingestado):
+    directorio_datos, df, entrada = ingestado
+    ruta = ruta_seguimientos(directorio_datos)
+    with open(ruta, encoding='utf-8') as f:
+        contenido = f.read()
+    with open(ruta, 'w', encoding='utf-8') as f:
+        f.write(contenido.replace(',Bueno,', ',Malo,'))
+
+    despues, entrada_despues = cargar(directorio_datos)
+    assert entrada_despues['generacion'] != entrada['generacion']
+    assert (despues['estado_salud'] == 'Bueno').sum() == 0
+    assert len(despues) == len(df)
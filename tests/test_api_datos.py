@@ -0,0 +1,66 @@
+import json
+
+import numpy as np
+import pytest
+
+pytest.importorskip('starlette')
+
+import api_datos
+from api_datos import DatosApi, coincide_etag, elegir_codificacion, leer_bbox, leer_limite
+
+
+@pytest.mark.parametrize('texto, esperado', [
+    ('-58.9,-27.5,-58.8,-27.4', (-58.9, -27.5, -58.8, -27.4)),
+    (' -58.9 , -27.5,-58.8,-27.4 ', (-58.9, -27.5, -58.8, -27.4)),
+    ('-58.87654321,-27.5,-58.8,-27.4', (-58.876543, -27.5, -58.8, -27.4)),
+    ('1,2,1,2', (1.0, 2.0, 1.0, 2.0)),
+])
+def test_leer_bbox(texto, esperado):
+    assert leer_bbox(texto) == esperado
+
+
+@pytest.mark.parametrize('texto', [None, '', '1,2,3', '1,2,3,4,5', 'a,b,c,d', '1,2,nan,4', '1,2,inf,4', '3,2,1,4',
+                                   '1,4,3,2'])
+def test_leer_bbox_invalido(texto):
+    with pytest.raises(ValueError):
+        leer_bbox(texto)
+
+
+def test_leer_limite():
+    assert leer_limite(None) == api_datos.LIMITE_DEFECTO
+    assert leer_limite('25') == 25
+    for texto in ['0', '-1', 'diez', str(api_datos.LIMITE_MAXIMO + 1)]:
+        with pytest.raises(ValueError):
+            leer_limite(texto)
+
+
+def test_elegir_codificacion(monkeypatch):
+    monkeypatch.setattr(api_datos, 'brotli', None)
+    assert elegir_codificacion('gzip, deflate, br') == 'gzip'
+    assert elegir_codificacion('gzip;q=0, deflate') is None
+    assert elegir_codificacion('*') == 'gzip'
+    assert elegir_codificacion('') is None
+
+
+def test_coincide_etag():
+    assert coincide_etag('"abc"', '"abc"')
+    assert coincide_etag('W/"abc", "def"', '"abc"')
+    assert coincide_etag('*', '"abc"')
+    assert not coincide_etag(None, '"abc"')
+    assert not coincide_etag('"def"', '"abc"')
+
+
+# Árboles en un rectángulo: los bordes cuentan y el límite corta la lista pero no la cantidad
+def test_consultar_arboles():
+    datos = object.__new__(DatosApi)
+    datos.arboles_lng = np.array([-58.9, -58.85, -58.8, -58.7])
+    datos.arboles_lat = np.array([-27.5, -27.45, -27.6, -27.45])
+    datos.arboles = [{'id_arbol': i} for i in range(4)]
+
+    coleccion = json.loads(datos.consultar_arboles((-58.9, -27.5, -58.8, -27.4), 10))
+    assert [f['properties']['id_arbol'] for f in coleccion['features']] == [0, 1]
+    assert coleccion['cantidad'] == 2 and not coleccion['truncado']
+
+    coleccion = json.loads(datos.consultar_arboles((-59, -28, -58, -27), 3))
+    assert len(coleccion['features']) == 3
+    assert coleccion['cantidad'] == 4 and coleccion['truncado']
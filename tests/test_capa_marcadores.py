@@ -0,0 +1,20 @@
+import json
+import re
+
+import folium
+import pandas as pd
+
+from capa_marcadores import agregar_marcadores, datos_marcadores
+
+
+# Un atributo con "</script>" no puede cerrar el <script> de la página y llega intacto
+def test_atributos_con_cierre_de_script():
+    df = pd.DataFrame({'lat': [-27.48, -27.47], 'lng': [-58.83, -58.82],
+                       'nombre': ['</script><script>alert(1)</script>', 'Plaza <b>25</b>']})
+    mapa = folium.Map(location=[-27.48, -58.83])
+    agregar_marcadores(mapa, df, plantilla_popup='{nombre}', columnas=['nombre'])
+    html = mapa.get_root().render()
+
+    assert 'alert(1)</script>' not in html
+    texto = re.search(r'var datos = (.*);\n', html).group(1)
+    assert json.loads(texto) == datos_marcadores(df['lat'], df['lng'], {'nombre': df['nombre']})
@@ -0,0 +1,70 @@
+import os
+
+import pandas as pd
+import pytest
+
+import cubo_barrios
+from cubo_barrios import cargar_cubo_arboles, cortar
+
+RUTA_SEGUIMIENTOS = 'MantenimientoArboles.csv'
+
+
+def comparable(arboles):
+    return (arboles.astype({'especie': 'str', 'estado_salud': 'str'})
+            .sort_values(['id_barrios', 'especie', 'estado_salud'], ignore_index=True))
+
+
+# Cubo armado de cero con otro almacén, para comparar
+def cubo_de_cero(directorio_datos):
+    _, arboles = cargar_cubo_arboles(directorio_datos, os.path.join(directorio_datos, 'almacen_cero'))
+    return arboles
+
+
+@pytest.fixture
+def caminos(monkeypatch):
+    llamadas = []
+    for nombre in ['actualizar_con_seguimientos', 'estado_por_arbol']:
+        original = getattr(cubo_barrios, nombre)
+
+        def espia(*args, nombre=nombre, original=original):
+            llamadas.append(nombre)
+            return original(*args)
+        monkeypatch.setattr(cubo_barrios, nombre, espia)
+    return llamadas
+
+
+def test_seguimientos_modificados_rearman_el_cubo(directorio_datos, caminos):
+    almacen = os.path.join(directorio_datos, 'almacen')
+    _, antes = cargar_cubo_arboles(directorio_datos, almacen)
+
+    ruta = os.path.join(directorio_datos, RUTA_SEGUIMIENTOS)
+    with open(ruta, encoding='utf-8') as f:
+        contenido = f.read()
+    with open(ruta, 'w', encoding='utf-8') as f:
+        f.write(contenido.replace(',Bueno,', ',Malo,'))
+    caminos.clear()
+    _, despues = cargar_cubo_arboles(directorio_datos, almacen)
+
+    assert caminos == ['estado_por_arbol']
+    assert cortar(despues)['arboles_requieren_mantenimiento'] > cortar(antes)['arboles_requieren_mantenimiento']
+    pd.testing.assert_frame_equal(comparable(despues), comparable(cubo_de_cero(directorio_datos)), check_dtype=False)
+
+
+def test_seguimientos_agregados_actualizan_el_cubo(directorio_datos, caminos):
+    almacen = os.path.join(directorio_datos, 'almacen')
+    _, antes = cargar_cubo_arboles(directorio_datos, almacen)
+
+    ruta = os.path.join(directorio_datos, RUTA_SEGUIMIENTOS)
+    seguimientos = pd.read_csv(ruta)
+    bueno = seguimientos[seguimientos['estado_salud'] == 'Bueno'].iloc[-1].copy()
+    bueno['id_seguimiento'] = seguimientos['id_seguimiento'].max() + 1
+    bueno['fecha_hora'] = '2099-01-01 00:00:00.000'
+    bueno['estado_salud'] = 'Malo'
+    with open(ruta, 'a', encoding='utf-8') as f:
+        f.write('\n' + bueno.to_frame().T.to_csv(header=False, index=False))
+    caminos.clear()
+    _, despues = cargar_cubo_arboles(directorio_datos, almacen)
+
+    assert caminos == ['actualizar_con_seguimientos']
+    assert cortar(despues)['arboles_requieren_mantenimiento'] == cortar(antes)['arboles_requieren_mantenimiento'] + 1
+    pd.testing.assert_frame_equal(comparable(despues), comparable(cubo_de_cero(directorio_datos)), check_dtype=False)
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pandas as pd
+
+from almacen_datos import TABLAS
+from cubo_barrios import cargar_cubo, cortar
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+
+from datos_sinteticos import generar  # noqa: E402
+
+
+# Dos copias de la ciudad: el doble de filas, identificadores sin repetir y cada copia con
+# sus árboles dentro de sus propios barrios
+def test_ciudad_duplicada(directorio_datos, tmp_path):
+    sinteticos = str(tmp_path / 'sinteticos')
+    filas = generar(sinteticos, 2, directorio_datos)
+
+    for nombre, archivo in TABLAS.items():
+        original = pd.read_csv(os.path.join(directorio_datos, archivo))
+        assert filas[nombre] == len(pd.read_csv(os.path.join(sinteticos, archivo))) == 2 * len(original)
+    seguimientos = pd.read_csv(os.path.join(sinteticos, TABLAS['mantenimiento_arboles']))
+    assert seguimientos['id_seguimiento'].is_unique
+
+    original = cargar_cubo(directorio_datos, os.path.join(directorio_datos, 'almacen'))
+    copia = cargar_cubo(sinteticos, os.path.join(sinteticos, 'almacen'))
+    for medida, valor in cortar(original['arboles']).items():
+        assert cortar(copia['arboles'])[medida] == 2 * valor
+    assert len(copia['barrios']) == 2 * len(original['barrios'])
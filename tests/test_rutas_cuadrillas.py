@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+import rutas_cuadrillas
+from rutas_cuadrillas import (agrupar_paradas, dos_opt, indice_hilbert, matriz_distancias, ordenar_paquete,
+                              ordenar_paquetes, planificar_rutas, vecino_mas_cercano)
+
+
+def largo(recorrido, distancias):
+    return distancias[recorrido[:-1], recorrido[1:]].sum()
+
+
+def test_hilbert_recorre_cada_celda_una_vez_por_celdas_vecinas():
+    bits = 4
+    lado = 1 << bits
+    x, y = np.meshgrid(np.arange(lado), np.arange(lado))
+    x, y = x.ravel(), y.ravel()
+    indice = indice_hilbert(x, y, bits)
+    assert sorted(indice.tolist()) == list(range(lado * lado))
+
+    orden = np.argsort(indice)
+    pasos = np.abs(np.diff(x[orden])) + np.abs(np.diff(y[orden]))
+    assert (pasos == 1).all()
+
+
+def test_agrupar_paradas_reparte_en_paquetes_completos():
+    rng = np.random.default_rng(1)
+    x, y = rng.uniform(0, 5000, 103), rng.uniform(0, 5000, 103)
+    paquetes = agrupar_paradas(x, y, paradas=10)
+    assert np.bincount(paquetes).tolist() == [10] * 10 + [3]
+
+
+def test_dos_opt_deja_un_optimo_local():
+    rng = np.random.default_rng(2)
+    x, y = rng.uniform(0, 1000, 30), rng.uniform(0, 1000, 30)
+    distancias = matriz_distancias(x, y)
+    inicial = vecino_mas_cercano(distancias)
+    recorrido = dos_opt(inicial, distancias)
+
+    assert recorrido[0] == 0
+    assert sorted(recorrido.tolist()) == list(range(len(x)))
+    assert largo(recorrido, distancias) <= largo(inicial, distancias)
+    # Ninguna inversión de un tramo (sin mover el punto de partida) acorta el recorrido
+    base = largo(recorrido, distancias)
+    for i in range(1, len(recorrido) - 1):
+        for j in range(i + 1, len(recorrido)):
+            candidato = recorrido.copy()
+            candidato[i:j + 1] = candidato[i:j + 1][::-1]
+            assert largo(candidato, distancias) >= base - 1e-6
+
+
+def test_paquetes_en_procesos_igual_que_en_serie(monkeypatch):
+    rng = np.random.default_rng(3)
+    puntos = [(rng.uniform(0, 1000, 25), rng.uniform(0, 1000, 25)) for _ in range(4)]
+    monkeypatch.setattr(rutas_cuadrillas, 'MINIMO_PARADAS_PROCESOS', 0)
+
+    en_procesos = ordenar_paquetes(puntos, procesos=2)
+    en_serie = [ordenar_paquete(x, y) for x, y in puntos]
+    for (orden, tramos), (orden_serie, tramos_serie) in zip(en_procesos, en_serie):
+        np.testing.assert_array_equal(orden, orden_serie)
+        np.testing.assert_allclose(tramos, tramos_serie)
+
+
+def test_planificar_rutas_visita_cada_parada_una_vez():
+    rng = np.random.default_rng(4)
+    paradas = pd.DataFrame({
+        'id_arbol': np.arange(95),
+        'lat': rng.uniform(-31.45, -31.35, 95),
+        'lng': rng.uniform(-64.25, -64.15, 95),
+        'puntaje_riesgo': rng.uniform(0, 10, 95),
+    })
+    puntos_verdes = pd.DataFrame({'ubicacion': ['Norte', 'Sur'], 'lat': [-31.36, -31.44], 'lng': [-64.2, -64.2]})
+    rutas = planificar_rutas(paradas, puntos_verdes, paradas=40, procesos=1)
+
+    assert sorted(rutas['id_arbol'].tolist()) == list(range(95))
+    assert rutas.groupby('paquete')['orden'].apply(lambda orden: orden.tolist() == list(range(1, len(orden) + 1))).all()
+    # El paquete 1 tiene la parada de mayor riesgo
+    assert rutas.loc[rutas['puntaje_riesgo'].idxmax(), 'paquete'] == 1
@@ -0,0 +1,118 @@
+import numpy as np
+import shapely
+
+from teselas_vectoriales import (CERRAR, EXTENSION, LINEA, MOVER, PUNTO, codificar_tesela, comando,
+                                 generar_teselas, geometria_poligono, mercator, varint, zigzag)
+
+
+# Decodificador protobuf mínimo: (número de campo, valor) de cada campo del mensaje
+def leer_varint(datos, posicion):
+    valor, corrimiento = 0, 0
+    while True:
+        byte = datos[posicion]
+        valor |= (byte & 0x7f) << corrimiento
+        posicion += 1
+        corrimiento += 7
+        if byte < 0x80:
+            return valor, posicion
+
+
+def campos(datos):
+    posicion = 0
+    while posicion < len(datos):
+        clave, posicion = leer_varint(datos, posicion)
+        numero, tipo = clave >> 3, clave & 0x7
+        if tipo == 0:
+            valor, posicion = leer_varint(datos, posicion)
+        elif tipo == 1:
+            valor, posicion = datos[posicion:posicion + 8], posicion + 8
+        else:
+            largo, posicion = leer_varint(datos, posicion)
+            valor, posicion = datos[posicion:posicion + largo], posicion + largo
+        yield numero, valor
+
+
+def empaquetados(datos):
+    valores, posicion = [], 0
+    while posicion < len(datos):
+        valor, posicion = leer_varint(datos, posicion)
+        valores.append(valor)
+    return valores
+
+
+def desde_zigzag(valor):
+    return (valor >> 1) ^ -(valor & 1)
+
+
+# Anillos con coordenadas absolutas a partir de los comandos de geometría
+def anillos(comandos):
+    resultado, cursor, i = [], [0, 0], 0
+    while i < len(comandos):
+        identificador, cantidad = comandos[i] & 0x7, comandos[i] >> 3
+        i += 1
+        if identificador == CERRAR:
+            continue
+        if identificador == MOVER:
+            resultado.append([])
+        for _ in range(cantidad):
+            cursor = [cursor[0] + desde_zigzag(comandos[i]), cursor[1] + desde_zigzag(comandos[i + 1])]
+            resultado[-1].append(tuple(cursor))
+            i += 2
+    return resultado
+
+
+def area(anillo):
+    x, y = np.array(anillo).T
+    return np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y)
+
+
+def test_varint_y_zigzag():
+    assert varint(1) == b'\x01'
+    assert varint(300) == b'\xac\x02'
+    assert zigzag(np.array([0, -1, 1, -2])).tolist() == [0, 1, 2, 3]
+
+
+def test_tesela_con_un_punto():
+    geometria = [comando(MOVER, 1), *zigzag(np.array([10, 20])).tolist()]
+    datos = codificar_tesela({'arboles': [(7, {'id_arbol': 7, 'especie': 'Lapacho', 'altura': None}, PUNTO, geometria)]})
+
+    [(numero, capa)] = list(campos(datos))
+    assert numero == 3
+    capa = list(campos(capa))
+    assert (15, 2) in capa and (1, b'arboles') in capa and (5, EXTENSION) in capa
+    claves = [valor.decode() for numero, valor in capa if numero == 3]
+    valores = [dict(campos(valor)) for numero, valor in capa if numero == 4]
+    assert claves == ['id_arbol', 'especie']
+    assert valores == [{4: 7}, {1: b'Lapacho'}]
+
+    [elemento] = [dict(campos(valor)) for numero, valor in capa if numero == 2]
+    assert elemento[1] == 7
+    assert elemento[3] == PUNTO
+    assert empaquetados(elemento[2]) == [0, 0, 1, 1]
+    assert anillos(empaquetados(elemento[4])) == [[(10, 20)]]
+
+
+def test_poligono_con_agujero():
+    exterior = [(0, 0), (0, 100), (100, 100), (100, 0)]
+    agujero = [(20, 20), (80, 20), (80, 80), (20, 80)]
+    comandos = geometria_poligono(shapely.Polygon(exterior, [agujero]))
+
+    # MoveTo, LineTo con 3 puntos y ClosePath por anillo
+    assert comandos[0] == comando(MOVER, 1) and comandos[3] == comando(LINEA, 3) and comandos[10] == comando(CERRAR, 1)
+    assert comandos[11] == comando(MOVER, 1) and comandos[-1] == comando(CERRAR, 1)
+    afuera, adentro = anillos(comandos)
+    assert set(afuera) == set(exterior) and set(adentro) == set(agujero)
+    # Exterior con área positiva y agujero con área negativa
+    assert area(afuera) > 0 > area(adentro)
+
+
+def test_cada_punto_en_una_tesela_por_zoom():
+    x, y = mercator(np.array([-58.83, -58.84, -58.70]), np.array([-27.48, -27.47, -27.40]))
+    capa = {'zoom_minimo': 10, 'x': x, 'y': y, 'ids': [1, 2, 3],
+            'propiedades': [{'id_arbol': 1}, {'id_arbol': 2}, {'id_arbol': 3}]}
+    por_zoom = {}
+    for zoom, _, _, datos in generar_teselas({'arboles': capa}, zoom_maximo=14):
+        for _, datos_capa in campos(datos):
+            ids = [dict(campos(valor))[1] for numero, valor in campos(datos_capa) if numero == 2]
+            por_zoom.setdefault(zoom, []).extend(ids)
+    assert {zoom: sorted(ids) for zoom, ids in por_zoom.items()} == {zoom: [1, 2, 3] for zoom in range(10, 15)}